@@ -0,0 +1,160 @@
+"""
+Batched, rate-aware document embedding for indexing.
+
+BatchedEmbeddings splits embed_documents into batches of EMBEDDING_BATCH_SIZE texts and sends
+up to EMBEDDING_MAX_CONCURRENCY of them at once. The limit is adaptive: a rate-limit response
+(HTTP 429) halves it and the batch is retried after Retry-After or an exponential backoff;
+each run of successful batches raises it by one again, up to the configured maximum. So a
+full rebuild runs as fast as the account's rate limit allows instead of one request at a time.
+
+It wraps the embedding cache (not the other way around), so every finished batch is cached
+right away and an interrupted rebuild resumes where it stopped. Queries are passed through.
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.embeddings import Embeddings
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_RETRIES = 6
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+
+RAG_INDEX_STAGE_ITEMS_TOTAL = Counter(
+    "rag_index_stage_items_total",
+    "Items processed per indexing stage (chunk: files, embed: chunks)",
+    ["stage"],
+)
+RAG_INDEX_STAGE_SECONDS_TOTAL = Counter(
+    "rag_index_stage_seconds_total",
+    "Wall time spent per indexing stage; items / seconds is the stage's throughput",
+    ["stage"],
+)
+EMBEDDING_RATE_LIMITED_TOTAL = Counter(
+    "embedding_rate_limited_total", "Embedding batches rejected with a rate limit and retried"
+)
+EMBEDDING_CONCURRENCY = Gauge(
+    "embedding_concurrency_limit", "Current adaptive limit on concurrent embedding batches"
+)
+
+
+def record_stage(stage: str, items: int, seconds: float) -> None:
+    """Add one run of an indexing stage to the throughput counters."""
+    RAG_INDEX_STAGE_ITEMS_TOTAL.labels(stage=stage).inc(items)
+    RAG_INDEX_STAGE_SECONDS_TOTAL.labels(stage=stage).inc(seconds)
+
+
+def _is_rate_limit(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429
+
+
+def _retry_after(exc: Exception) -> float | None:
+    """Seconds from the Retry-After header of a rate-limit response, if present."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimit:
+    """
+    Additive-increase/multiplicative-decrease limit on in-flight requests: halved on a rate
+    limit, raised by one after `limit` consecutive successes, never above max_limit.
+    """
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self._in_flight = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+        EMBEDDING_CONCURRENCY.set(self.limit)
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, rate_limited: bool = False) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if rate_limited:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._successes = 0
+            EMBEDDING_CONCURRENCY.set(self.limit)
+            self._cond.notify_all()
+
+
+class BatchedEmbeddings(Embeddings):
+    """Embeddings wrapper that embeds documents in concurrent, rate-limit-aware batches."""
+
+    def __init__(self, underlying: Embeddings, batch_size: int = 128, max_concurrency: int = 8):
+        self.underlying = underlying
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self._limit = AdaptiveLimit(self.max_concurrency)
+
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        delay = BACKOFF_SECONDS
+        retries = 0
+        while True:
+            self._limit.acquire()
+            try:
+                vectors = self.underlying.embed_documents(texts)
+            except Exception as e:
+                rate_limited = _is_rate_limit(e)
+                self._limit.release(rate_limited=rate_limited)
+                if not rate_limited or retries >= RATE_LIMIT_RETRIES:
+                    raise
+                retries += 1
+                EMBEDDING_RATE_LIMITED_TOTAL.inc()
+                wait = _retry_after(e)
+                if wait is None:
+                    wait = delay * (1 + random.random() / 2)
+                    delay = min(delay * 2, MAX_BACKOFF_SECONDS)
+                logger.warning(
+                    "embeddings: rate limited, retrying %d texts in %.1fs (concurrency %d)",
+                    len(texts),
+                    wait,
+                    self._limit.limit,
+                )
+                time.sleep(wait)
+                continue
+            self._limit.release()
+            return vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        t0 = time.perf_counter()
+        batches = [texts[i : i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1:
+            results = [self._embed_batch(batches[0])]
+        else:
+            workers = min(self.max_concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed-worker") as pool:
+                results = list(pool.map(self._embed_batch, batches))
+        record_stage("embed", len(texts), time.perf_counter() - t0)
+        return [vector for batch in results for vector in batch]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.underlying.embed_query(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self.underlying.aembed_query(text)
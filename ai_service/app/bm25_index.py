@@ -0,0 +1,102 @@
+"""
+Persisted BM25 index: corpus statistics and tokenized chunks saved next to the manifest,
+versioned by index_version, so hybrid search is available on every boot without
+re-chunking the docs directory.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from app.config import get_settings
+
+if TYPE_CHECKING:
+    from langchain_community.retrievers import BM25Retriever
+    from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+BM25_FILENAME = "bm25_index.json"
+BM25_FORMAT = 1
+
+
+def _bm25_path() -> Path:
+    return Path(get_settings().chroma_persist_dir) / BM25_FILENAME
+
+
+def build_bm25_retriever(documents: list[Document]) -> BM25Retriever | None:
+    """Build a BM25 retriever over documents; None when there is nothing to index."""
+    if not documents:
+        return None
+    try:
+        from langchain_community.retrievers import BM25Retriever
+
+        return BM25Retriever.from_documents(documents)
+    except Exception:
+        return None
+
+
+def save_bm25_index(retriever: BM25Retriever, index_version: str, path: Path | None = None) -> None:
+    """Serialize the retriever's documents, per-chunk term frequencies and idf table."""
+    vectorizer = retriever.vectorizer
+    state: dict[str, Any] = {
+        "format": BM25_FORMAT,
+        "index_version": index_version,
+        "params": {"k1": vectorizer.k1, "b": vectorizer.b, "epsilon": vectorizer.epsilon},
+        "corpus_size": vectorizer.corpus_size,
+        "avgdl": vectorizer.avgdl,
+        "average_idf": vectorizer.average_idf,
+        "idf": vectorizer.idf,
+        "doc_len": vectorizer.doc_len,
+        "doc_freqs": vectorizer.doc_freqs,
+        "docs": [
+            {"id": d.id, "page_content": d.page_content, "metadata": d.metadata}
+            for d in retriever.docs
+        ],
+    }
+    path = path or _bm25_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def load_bm25_retriever(index_version: str, path: Path | None = None) -> BM25Retriever | None:
+    """
+    Load a persisted BM25 retriever without recomputing corpus statistics.
+    Returns None if the file is missing, unreadable or built for another index_version.
+    """
+    path = path or _bm25_path()
+    if not path.exists():
+        return None
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+        if state.get("format") != BM25_FORMAT or state.get("index_version") != index_version:
+            return None
+        from langchain_community.retrievers import BM25Retriever
+        from langchain_core.documents import Document
+        from rank_bm25 import BM25Okapi
+
+        vectorizer = BM25Okapi.__new__(BM25Okapi)
+        vectorizer.k1 = state["params"]["k1"]
+        vectorizer.b = state["params"]["b"]
+        vectorizer.epsilon = state["params"]["epsilon"]
+        vectorizer.tokenizer = None
+        vectorizer.corpus_size = state["corpus_size"]
+        vectorizer.avgdl = state["avgdl"]
+        vectorizer.average_idf = state["average_idf"]
+        vectorizer.idf = state["idf"]
+        vectorizer.doc_len = state["doc_len"]
+        vectorizer.doc_freqs = state["doc_freqs"]
+        docs = [
+            Document(id=d.get("id"), page_content=d["page_content"], metadata=d["metadata"])
+            for d in state["docs"]
+        ]
+        return BM25Retriever(vectorizer=vectorizer, docs=docs)
+    except Exception as e:
+        logger.warning("bm25_index: could not load %s: %s", path, e)
+        return None
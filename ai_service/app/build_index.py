@@ -0,0 +1,155 @@
+"""
+Offline index build: chunk and embed DOCS_DIR once and write a portable index artifact.
+
+    python -m app.build_index --docs-dir ../docs --out prebuilt_index
+
+The artifact has the layout of CHROMA_PERSIST_DIR with VECTOR_BACKEND=numpy:
+
+    index_manifest.json                           doc hashes, index_version, collection, model
+    bm25_index.json                               BM25 corpus statistics and tokenized chunks
+    numpy_index/<collection>/vectors-<token>.f32  normalized float32 chunk vectors
+    numpy_index/<collection>/meta.json            chunk ids, texts, metadata, vectors file
+
+The output path is a symlink to a versioned build directory next to it (.<name>-<token>);
+a rebuild writes a new one and repoints the link with a single os.replace.
+
+With RAG_PREBUILT_INDEX_DIR pointing at it, the service memory-maps the vectors read-only
+at boot instead of chunking and embedding the docs, and never rebuilds or refreshes them.
+Chunk embeddings go through the embedding cache, so rebuilding after a docs edit only
+embeds the chunks whose text changed.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from app.bm25_index import BM25_FILENAME, build_bm25_retriever, save_bm25_index
+from app.config import get_settings
+from app.index_manager import (
+    MANIFEST_FILENAME,
+    build_manifest,
+    load_manifest,
+    sync_collection,
+    write_manifest,
+)
+
+logger = logging.getLogger(__name__)
+
+PREBUILT_FORMAT = 1
+
+
+def build_index(docs_dir: Path, out_dir: Path) -> dict[str, Any]:
+    """
+    Build the artifact in a staging directory next to out_dir, then point the out_dir
+    symlink at it, so out_dir always resolves to a complete artifact. Returns the
+    artifact's manifest.
+    Raises ValueError when docs_dir has no Markdown docs.
+    """
+    from app.numpy_store import NumpyVectorStore
+    from app.retrieval import (
+        COLLECTION_NAME,
+        NUMPY_INDEX_DIRNAME,
+        _iter_docs_from_dir,
+        get_embedding_model,
+    )
+
+    out_dir = out_dir.parent.resolve() / out_dir.name
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{out_dir.name}-", dir=out_dir.parent))
+    try:
+        store = NumpyVectorStore(
+            collection_name=COLLECTION_NAME,
+            embedding_function=get_embedding_model(),
+            persist_directory=staging / NUMPY_INDEX_DIRNAME,
+        )
+        result = sync_collection(store, docs_dir, _iter_docs_from_dir, incremental=False)
+        if not result.documents:
+            raise ValueError(f"no Markdown docs to index in {docs_dir}")
+        manifest = build_manifest(
+            result.doc_hashes,
+            len(result.documents),
+            last_sync=result.last_sync,
+            collection=COLLECTION_NAME,
+        )
+        manifest["format"] = PREBUILT_FORMAT
+        manifest["embedding_model"] = get_settings().openai_embedding_model
+        manifest["built_at"] = int(time.time())
+        bm25 = build_bm25_retriever(result.documents)
+        if bm25 is not None:
+            save_bm25_index(bm25, manifest["index_version"], staging / BM25_FILENAME)
+        write_manifest(manifest, staging / MANIFEST_FILENAME)
+        _swap_in(staging, out_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _swap_in(staging: Path, out_dir: Path) -> None:
+    """
+    Atomically repoint the out_dir symlink at staging, then remove the build it replaced.
+    A plain directory left by an older build_index is moved aside first; only that one-time
+    migration has a moment without an artifact.
+    """
+    retired = None
+    if out_dir.is_symlink():
+        retired = out_dir.resolve()
+    elif out_dir.exists():
+        retired = out_dir.with_name(f"{staging.name}.old")
+        out_dir.rename(retired)
+    link = out_dir.with_name(f"{staging.name}.link")
+    link.symlink_to(staging.name, target_is_directory=True)
+    os.replace(link, out_dir)
+    if retired is not None:
+        shutil.rmtree(retired, ignore_errors=True)
+
+
+def prebuilt_manifest(path: Path | None = None) -> dict[str, Any]:
+    """
+    Manifest of the artifact in path (default RAG_PREBUILT_INDEX_DIR), checked against this
+    service. Raises ValueError if it is missing, of another format or built with another
+    embedding model (its vectors would not be comparable with query embeddings).
+    """
+    settings = get_settings()
+    manifest = load_manifest(path / MANIFEST_FILENAME if path is not None else None)
+    if manifest is None or manifest.get("format") != PREBUILT_FORMAT:
+        raise ValueError(f"no prebuilt index in {settings.rag_prebuilt_index_dir}")
+    if manifest.get("embedding_model") != settings.openai_embedding_model:
+        raise ValueError(
+            f"prebuilt index was embedded with {manifest.get('embedding_model')!r}, "
+            f"but OPENAI_EMBEDDING_MODEL is {settings.openai_embedding_model!r}"
+        )
+    return manifest
+
+
+def main(argv: list[str] | None = None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument(
+        "--docs-dir", type=Path, default=Path(settings.docs_dir), help="default: DOCS_DIR"
+    )
+    parser.add_argument("--out", type=Path, required=True, help="artifact directory to write")
+    args = parser.parse_args(argv)
+    if not settings.openai_api_key_stripped:
+        parser.error("OPENAI_API_KEY is not set")
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    try:
+        manifest = build_index(args.docs_dir, args.out)
+    except ValueError as e:
+        parser.error(str(e))
+    print(
+        f"Wrote {args.out}: {manifest['doc_count']} chunks from {len(manifest['doc_hashes'])} "
+        f"docs, index_version {manifest['index_version']}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
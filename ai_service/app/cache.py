@@ -3,10 +3,17 @@ Response and RAG cache backends: in-memory (TTLCache) or Redis when REDIS_URL is
 """
 
 import asyncio
+import base64
 import json
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
 from typing import Any
 
-from app.config import get_settings
+from app.config import get_settings, settings_version
 
 
 class AsyncResponseCacheBackend:
@@ -18,6 +25,27 @@ class AsyncResponseCacheBackend:
     async def set(self, key: str, value: str, ttl_seconds: int) -> None:
         raise NotImplementedError
 
+    async def acquire_lock(self, key: str, ttl_seconds: int) -> str | None:
+        """
+        Take a cross-process lock for computing key; returns a token, or None if another
+        process holds it. Single-process backends always grant it (in-process single-flight
+        already coalesces there).
+        """
+        return "local"
+
+    async def release_lock(self, key: str, token: str) -> None:
+        return None
+
+    async def wait_for(self, key: str, timeout: float, interval: float = 0.1) -> str | None:
+        """Poll for key until it is set or timeout elapses (used while another process computes)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            value = await self.get(key)
+            if value is not None:
+                return value
+            await asyncio.sleep(interval)
+        return None
+
 
 class MemoryResponseCacheBackend(AsyncResponseCacheBackend):
     """In-memory TTL cache; keys are stringified for consistency (e.g. json.dumps of tuple)."""
@@ -44,14 +72,19 @@ class RedisResponseCacheBackend(AsyncResponseCacheBackend):
         self._url = url
         self._default_ttl = default_ttl
         self._client: Any = None
+        self._loop: asyncio.AbstractEventLoop | None = None
 
     async def _get_client(self):
         if self._client is None:
             from redis.asyncio import from_url
 
             self._client = from_url(self._url, decode_responses=True)
+            self._loop = asyncio.get_running_loop()
         return self._client
 
+    def close(self) -> None:
+        _close_redis(None, self._client, self._loop)
+
     async def get(self, key: str) -> str | None:
         try:
             client = await self._get_client()
@@ -66,6 +99,104 @@ class RedisResponseCacheBackend(AsyncResponseCacheBackend):
         except Exception:
             pass
 
+    async def acquire_lock(self, key: str, ttl_seconds: int) -> str | None:
+        """SET lock:{key} NX EX ttl; fails open (grants the lock) when Redis is unavailable."""
+        token = uuid.uuid4().hex
+        try:
+            client = await self._get_client()
+            acquired = await client.set(f"lock:{key}", token, nx=True, ex=max(1, ttl_seconds))
+        except Exception:
+            return token
+        return token if acquired else None
+
+    async def release_lock(self, key: str, token: str) -> None:
+        """Delete the lock only if this process still owns it."""
+        try:
+            client = await self._get_client()
+            await client.eval(_RELEASE_LOCK_SCRIPT, 1, f"lock:{key}", token)
+        except Exception:
+            pass
+
+
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _close_redis(client: Any, async_client: Any, loop: asyncio.AbstractEventLoop | None) -> None:
+    """
+    Close a replaced backend's Redis clients. The async client is closed on the event loop
+    it was created on; calls still in flight on either fail open like any Redis error.
+    """
+    if client is not None:
+        try:
+            client.close()
+        except Exception:
+            pass
+    if async_client is not None and loop is not None and not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(async_client.aclose(), loop)
+
+
+def _backend_configs(settings: Any) -> dict[str, tuple[Any, ...]]:
+    """The settings each backend is built from; a backend is rebuilt only when its own change."""
+    redis_url = settings.redis_url_stripped
+    return {
+        "response": (redis_url, settings.cache_ttl_seconds),
+        "summary": (redis_url, settings.summary_cache_ttl_seconds),
+        "rag": (
+            redis_url,
+            settings.rag_cache_ttl_seconds,
+            settings.rag_cache_maxsize,
+            settings.rag_cache_eviction_policy,
+        ),
+        "query_vector": (
+            redis_url,
+            settings.query_embedding_cache_size,
+            settings.query_embedding_cache_ttl_seconds,
+        ),
+    }
+
+
+_settings_seen = settings_version()
+_configs_seen: dict[str, tuple[Any, ...]] | None = None
+
+
+def _drop_stale_backends() -> None:
+    """
+    After a settings reload, forget (and close the Redis clients of) the backends whose
+    settings changed; the getters rebuild them on next use. The others keep their entries.
+    """
+    global _settings_seen, _configs_seen
+    global _response_backend, _summary_backend, _rag_backend, _query_vector_cache
+    version = settings_version()
+    if version == _settings_seen and _configs_seen is not None:
+        return
+    configs = _backend_configs(get_settings())
+    replaced: list[Any] = []
+    if version != _settings_seen:
+        stale = {n for n, c in configs.items() if _configs_seen is None or _configs_seen[n] != c}
+        if "response" in stale:
+            replaced.append(_response_backend)
+            _response_backend = None
+        if "summary" in stale:
+            replaced.append(_summary_backend)
+            _summary_backend = None
+        if "rag" in stale:
+            replaced.append(_rag_backend)
+            _rag_backend = None
+        if "query_vector" in stale:
+            replaced.append(_query_vector_cache)
+            _query_vector_cache = None
+    _settings_seen = version
+    _configs_seen = configs
+    for backend in replaced:
+        close = getattr(backend, "close", None)
+        if close is not None:
+            close()
+
 
 _response_backend: AsyncResponseCacheBackend | None = None
 _response_backend_lock = asyncio.Lock()
@@ -74,6 +205,7 @@ _response_backend_lock = asyncio.Lock()
 async def get_response_cache_backend() -> AsyncResponseCacheBackend | None:
     """Return the response cache backend if caching is enabled, else None."""
     global _response_backend
+    _drop_stale_backends()
     settings = get_settings()
     if settings.cache_ttl_seconds <= 0:
         return None
@@ -90,44 +222,150 @@ async def get_response_cache_backend() -> AsyncResponseCacheBackend | None:
         return _response_backend
 
 
-def response_cache_key_ask(question: str, context_hash: str) -> str:
-    """Stable string key for /ask cache."""
-    return f"ask:{question}:{context_hash}"
-
+_summary_backend: AsyncResponseCacheBackend | None = None
+_summary_backend_lock = asyncio.Lock()
 
-def response_cache_key_ask_docs(question: str) -> str:
-    """Stable string key for /ask_docs cache."""
-    return f"ask_docs:{question}"
 
-
-def serialize_ask_response(data: dict[str, Any]) -> str:
-    """Serialize AskResponse-like dict to JSON for cache storage."""
-    return json.dumps(data)
+async def get_summary_cache_backend() -> AsyncResponseCacheBackend | None:
+    """Return the context-summary cache backend if SUMMARY_CACHE_TTL_SECONDS > 0, else None."""
+    global _summary_backend
+    _drop_stale_backends()
+    settings = get_settings()
+    if settings.summary_cache_ttl_seconds <= 0:
+        return None
+    async with _summary_backend_lock:
+        if _summary_backend is None:
+            if settings.redis_url_stripped:
+                _summary_backend = RedisResponseCacheBackend(
+                    settings.redis_url_stripped, default_ttl=settings.summary_cache_ttl_seconds
+                )
+            else:
+                _summary_backend = MemoryResponseCacheBackend(
+                    maxsize=1000, ttl_seconds=settings.summary_cache_ttl_seconds
+                )
+        return _summary_backend
+
+
+def summary_cache_key(context_hash: str, model: str) -> str:
+    """
+    Key for a context summary: only the context hash and summarization model. Unlike the
+    response keys it is independent of the question and of the RAG index version.
+    """
+    return f"summary:{model}:{context_hash}"
+
+
+def response_cache_key_ask(question: str, context_hash: str, index_version: str) -> str:
+    """
+    Stable string key for /ask cache, scoped to the index_version of the generation that
+    served the request (retrieval.index_version_for), not whatever is active by now.
+    """
+    return f"ask:{index_version}:{question}:{context_hash}"
+
+
+def response_cache_key_ask_docs(question: str, index_version: str) -> str:
+    """Stable string key for /ask_docs cache, scoped like response_cache_key_ask."""
+    return f"ask_docs:{index_version}:{question}"
+
+
+def serialize_ask_response(
+    data: dict[str, Any], soft_ttl_seconds: int = 0, compute_seconds: float = 0.0
+) -> str:
+    """
+    Serialize AskResponse-like dict to JSON for cache storage. The envelope records when the
+    entry goes soft-stale (soft_ttl_seconds > 0) and how long it took to compute, for
+    stale-while-revalidate; the hard TTL is the backend's expiry.
+    """
+    return json.dumps(
+        {
+            "response": data,
+            "soft_expires_at": time.time() + soft_ttl_seconds if soft_ttl_seconds > 0 else None,
+            "delta": compute_seconds,
+        }
+    )
+
+
+@dataclass
+class CachedResponse:
+    data: dict[str, Any]
+    soft_expires_at: float | None = None
+    delta: float = 0.0
+
+    def should_refresh(self, beta: float = 1.0, now: float | None = None) -> bool:
+        """
+        True once the entry is soft-stale, or probabilistically a little earlier (XFetch:
+        now - delta * beta * ln(rand) >= soft expiry), so refreshes of a popular key spread
+        out instead of all starting at the same instant. Entries without a soft TTL never
+        refresh early; they just expire.
+        """
+        if self.soft_expires_at is None:
+            return False
+        now = time.time() if now is None else now
+        early = -self.delta * beta * math.log(max(random.random(), 1e-12))
+        return now + early >= self.soft_expires_at
+
+
+def load_cached_response(raw: str) -> CachedResponse:
+    """Parse a cached entry (envelope, or a bare response dict written before envelopes)."""
+    parsed = json.loads(raw)
+    if isinstance(parsed, dict) and "response" in parsed and "delta" in parsed:
+        return CachedResponse(parsed["response"], parsed.get("soft_expires_at"), parsed["delta"])
+    return CachedResponse(parsed)
 
 
 def deserialize_ask_response(raw: str) -> dict[str, Any]:
     """Deserialize cached JSON to dict for AskResponse.model_validate."""
-    return json.loads(raw)
+    return load_cached_response(raw).data
 
 
 # --- RAG cache (question -> formatted context string) ---
 
-def _rag_cache_key(question: str, k: int) -> str:
-    return f"rag:{question.strip()}:{k}"
+RAG_EVICTION_POLICIES = ("lru", "lfu", "fifo")
+
+
+def _rag_cache_key(question: str, k: int, index_version: str) -> str:
+    return f"rag:{index_version}:{question.strip()}:{k}"
+
+
+_rag_backend: "RagCacheBackend | None" = None
+_rag_backend_lock = threading.Lock()
 
 
 def get_rag_cache_backend() -> "RagCacheBackend | None":
-    """Return RAG cache backend if RAG_CACHE_TTL_SECONDS > 0, else None."""
+    """
+    Return the process-wide RAG cache backend if RAG_CACHE_TTL_SECONDS > 0, else None.
+    The backend (and its Redis connection pool) is created once and reused by every request.
+    """
+    global _rag_backend
+    _drop_stale_backends()
     settings = get_settings()
     if settings.rag_cache_ttl_seconds <= 0:
         return None
-    if settings.redis_url_stripped:
-        return RedisRagCacheBackend(settings.redis_url_stripped, settings.rag_cache_ttl_seconds)
-    return MemoryRagCacheBackend(settings.rag_cache_ttl_seconds)
+    if _rag_backend is not None:
+        return _rag_backend
+    with _rag_backend_lock:
+        if _rag_backend is None:
+            if settings.redis_url_stripped:
+                _rag_backend = RedisRagCacheBackend(
+                    settings.redis_url_stripped, settings.rag_cache_ttl_seconds
+                )
+            else:
+                _rag_backend = MemoryRagCacheBackend(
+                    settings.rag_cache_ttl_seconds,
+                    maxsize=settings.rag_cache_maxsize,
+                    eviction_policy=settings.rag_cache_eviction_policy,
+                )
+        return _rag_backend
 
 
 class RagCacheBackend:
-    """Sync interface for RAG context cache: get(key) -> str | None, set(key, context_str)."""
+    """
+    RAG context cache: get(key) -> str | None, set(key, context_str), plus aget/aset for
+    the async retrieval path.
+    """
+
+    def __init__(self) -> None:
+        self._hits = 0
+        self._misses = 0
 
     def get(self, key: str) -> str | None:
         raise NotImplementedError
@@ -135,48 +373,144 @@ class RagCacheBackend:
     def set(self, key: str, value: str, ttl_seconds: int) -> None:
         raise NotImplementedError
 
+    async def aget(self, key: str) -> str | None:
+        """Async get for the event loop; in-memory backends never block, so they reuse get."""
+        return self.get(key)
 
-class MemoryRagCacheBackend(RagCacheBackend):
-    """In-memory TTL cache for RAG context string."""
+    async def aset(self, key: str, value: str, ttl_seconds: int) -> None:
+        self.set(key, value, ttl_seconds)
 
-    def __init__(self, ttl_seconds: int):
-        from cachetools import TTLCache
+    def _record(self, value: str | None) -> str | None:
+        if value is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return value
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters for this process; subclasses add size and evictions."""
+        lookups = self._hits + self._misses
+        return {
+            "backend": "none",
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _make_policy_cache(policy: str, maxsize: int, on_evict: Any) -> Any:
+    """Build a cachetools cache for the eviction policy that reports capacity evictions."""
+    from cachetools import FIFOCache, LFUCache, LRUCache
+
+    base = {"lru": LRUCache, "lfu": LFUCache, "fifo": FIFOCache}[policy]
+
+    class _CountingCache(base):
+        def popitem(self):
+            item = super().popitem()
+            on_evict()
+            return item
+
+    return _CountingCache(maxsize=maxsize)
 
-        self._cache: TTLCache = TTLCache(maxsize=1000, ttl=ttl_seconds)
+
+class MemoryRagCacheBackend(RagCacheBackend):
+    """
+    In-memory TTL cache for RAG context string. Entries carry their own expiry so any
+    eviction policy (lru, lfu, fifo) can be combined with the TTL. Thread-safe: retrieval
+    runs in worker threads.
+    """
+
+    def __init__(self, ttl_seconds: int, maxsize: int = 1000, eviction_policy: str = "lru"):
+        super().__init__()
+        policy = (eviction_policy or "lru").strip().lower()
+        if policy not in RAG_EVICTION_POLICIES:
+            raise ValueError(
+                f"Unknown RAG cache eviction policy {eviction_policy!r}; "
+                f"expected one of {', '.join(RAG_EVICTION_POLICIES)}"
+            )
+        self._ttl = ttl_seconds
+        self._policy = policy
+        self._evictions = 0
+        self._expirations = 0
+        self._cache = _make_policy_cache(policy, maxsize, self._count_eviction)
+        self._lock = threading.Lock()
+
+    def _count_eviction(self) -> None:
+        self._evictions += 1
 
     def get(self, key: str) -> str | None:
-        return self._cache.get(key)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._cache[key]
+                self._expirations += 1
+                entry = None
+            return self._record(entry[1] if entry is not None else None)
 
     def set(self, key: str, value: str, ttl_seconds: int) -> None:
-        self._cache[key] = value
+        with self._lock:
+            self._cache[key] = (time.monotonic() + (ttl_seconds or self._ttl), value)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **super().stats(),
+                "backend": "memory",
+                "eviction_policy": self._policy,
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
 
 
 class RedisRagCacheBackend(RagCacheBackend):
-    """Redis-backed RAG cache. Sync for use from thread. Stores formatted context string."""
+    """
+    Redis-backed RAG cache storing the formatted context string. get/set use a blocking
+    client (for worker threads), aget/aset a redis.asyncio client; each keeps one connection
+    pool shared by every request in the process.
+    """
 
     def __init__(self, url: str, default_ttl: int):
+        super().__init__()
         self._url = url
         self._default_ttl = default_ttl
         self._client: Any = None
+        self._client_lock = threading.Lock()
+        self._async_client: Any = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_async_client(self):
+        if self._async_client is None:
+            from redis.asyncio import from_url
+
+            self._async_client = from_url(self._url, decode_responses=True)
+            self._loop = asyncio.get_running_loop()
+        return self._async_client
+
+    def close(self) -> None:
+        _close_redis(self._client, self._async_client, self._loop)
 
     def _get_client(self):
         if self._client is None:
-            import redis
-
-            self._client = redis.from_url(self._url, decode_responses=True)
+            with self._client_lock:
+                if self._client is None:
+                    import redis
+
+                    self._client = redis.Redis(
+                        connection_pool=redis.ConnectionPool.from_url(
+                            self._url, decode_responses=True
+                        )
+                    )
         return self._client
 
     def get(self, key: str) -> str | None:
         try:
             client = self._get_client()
             raw = client.get(key)
-            if raw is None:
-                return None
-            if isinstance(raw, str):
-                return raw
-            return json.loads(raw) if isinstance(raw, str) else None
         except Exception:
-            return None
+            raw = None
+        return self._record(raw if isinstance(raw, str) else None)
 
     def set(self, key: str, value: str, ttl_seconds: int) -> None:
         try:
@@ -184,3 +518,152 @@ class RedisRagCacheBackend(RagCacheBackend):
             client.set(key, value, ex=ttl_seconds or self._default_ttl)
         except Exception:
             pass
+
+    async def aget(self, key: str) -> str | None:
+        try:
+            raw = await self._get_async_client().get(key)
+        except Exception:
+            raw = None
+        return self._record(raw if isinstance(raw, str) else None)
+
+    async def aset(self, key: str, value: str, ttl_seconds: int) -> None:
+        try:
+            await self._get_async_client().set(key, value, ex=ttl_seconds or self._default_ttl)
+        except Exception:
+            pass
+
+    def stats(self) -> dict[str, Any]:
+        # Size and evictions are governed by the Redis server (maxmemory-policy).
+        return {**super().stats(), "backend": "redis", "size": None, "evictions": None}
+
+
+# --- Query embedding cache (normalized question -> query vector) ---
+
+
+class QueryVectorCache:
+    """
+    Process-wide LRU of query vectors, optionally backed by Redis so replicas share
+    popular questions. Vectors are stored in Redis as base64 float32. Thread-safe, with
+    aget/aset for the event loop; Redis errors fail open (treated as a miss).
+    """
+
+    def __init__(self, maxsize: int, redis_url: str = "", ttl_seconds: int = 0):
+        from cachetools import LRUCache
+
+        self._local: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._redis_url = redis_url if ttl_seconds > 0 else ""
+        self._ttl = ttl_seconds
+        self._client: Any = None
+        self._client_lock = threading.Lock()
+        self._async_client: Any = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import redis
+
+                    self._client = redis.Redis(
+                        connection_pool=redis.ConnectionPool.from_url(
+                            self._redis_url, decode_responses=True
+                        )
+                    )
+        return self._client
+
+    def _get_async_client(self):
+        if self._async_client is None:
+            from redis.asyncio import from_url
+
+            self._async_client = from_url(self._redis_url, decode_responses=True)
+            self._loop = asyncio.get_running_loop()
+        return self._async_client
+
+    def close(self) -> None:
+        _close_redis(self._client, self._async_client, self._loop)
+
+    def _remember(self, key: str, raw: str | None) -> list[float] | None:
+        """Decode a vector read from Redis and keep it in the local LRU."""
+        if raw is None:
+            return None
+        import numpy as np
+
+        vector = np.frombuffer(base64.b64decode(raw), dtype=np.float32).tolist()
+        with self._lock:
+            self._local[key] = vector
+        return vector
+
+    @staticmethod
+    def _encode(vector: list[float]) -> str:
+        import numpy as np
+
+        return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode()
+
+    def _get_local(self, key: str) -> list[float] | None:
+        with self._lock:
+            return self._local.get(key)
+
+    def _set_local(self, key: str, vector: list[float]) -> None:
+        with self._lock:
+            self._local[key] = vector
+
+    def get(self, key: str) -> list[float] | None:
+        vector = self._get_local(key)
+        if vector is not None or not self._redis_url:
+            return vector
+        try:
+            raw = self._get_client().get(f"qvec:{key}")
+        except Exception:
+            return None
+        return self._remember(key, raw)
+
+    def set(self, key: str, vector: list[float]) -> None:
+        self._set_local(key, vector)
+        if not self._redis_url:
+            return
+        try:
+            self._get_client().set(f"qvec:{key}", self._encode(vector), ex=self._ttl)
+        except Exception:
+            pass
+
+    async def aget(self, key: str) -> list[float] | None:
+        """Like get, reading Redis with the async client (for the event loop)."""
+        vector = self._get_local(key)
+        if vector is not None or not self._redis_url:
+            return vector
+        try:
+            raw = await self._get_async_client().get(f"qvec:{key}")
+        except Exception:
+            return None
+        return self._remember(key, raw)
+
+    async def aset(self, key: str, vector: list[float]) -> None:
+        self._set_local(key, vector)
+        if not self._redis_url:
+            return
+        try:
+            await self._get_async_client().set(f"qvec:{key}", self._encode(vector), ex=self._ttl)
+        except Exception:
+            pass
+
+
+_query_vector_cache: QueryVectorCache | None = None
+_query_vector_cache_lock = threading.Lock()
+
+
+def get_query_vector_cache() -> QueryVectorCache | None:
+    """Return the process-wide query-embedding cache, or None if QUERY_EMBEDDING_CACHE_SIZE <= 0."""
+    global _query_vector_cache
+    _drop_stale_backends()
+    settings = get_settings()
+    if settings.query_embedding_cache_size <= 0:
+        return None
+    with _query_vector_cache_lock:
+        if _query_vector_cache is None:
+            _query_vector_cache = QueryVectorCache(
+                settings.query_embedding_cache_size,
+                redis_url=settings.redis_url_stripped,
+                ttl_seconds=settings.query_embedding_cache_ttl_seconds,
+            )
+        return _query_vector_cache
@@ -0,0 +1,182 @@
+"""
+Client registry: long-lived, connection-pooled LLM, embedding and rerank clients.
+
+One httpx client (sync and async) per timeout is shared by every OpenAI/Cohere client, with
+keep-alive and HTTP/2 when the `h2` package is installed, so per-step latency no longer
+includes TCP/TLS setup. LangChain/PydanticAI clients are cached per (model, timeout).
+Pool usage is exported as the llm_http_pool_connections gauge.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import threading
+from typing import TYPE_CHECKING, Any
+
+from prometheus_client import Gauge
+
+from app.config import get_settings, settings_version
+
+if TYPE_CHECKING:
+    import httpx
+
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY_SECONDS = 60.0
+RERANK_MODEL = "rerank-multilingual-v3.0"
+
+HTTP_POOL_CONNECTIONS = Gauge(
+    "llm_http_pool_connections",
+    "Connections in the shared LLM HTTP pools by state (active = serving a request)",
+    ["pool", "state"],
+)
+
+_lock = threading.RLock()
+_http_clients: dict[tuple[str, float], httpx.Client | httpx.AsyncClient] = {}
+_models: dict[tuple[Any, ...], Any] = {}
+_models_settings_version = settings_version()
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def _pool_counts(client: httpx.Client | httpx.AsyncClient) -> tuple[int, int]:
+    """(active, idle) connections of an httpx client's pool; (0, 0) if not introspectable."""
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", None) or [])
+    idle = sum(1 for c in connections if c.is_idle())
+    return len(connections) - idle, idle
+
+
+def _register_pool_metrics(name: str, client: httpx.Client | httpx.AsyncClient) -> None:
+    HTTP_POOL_CONNECTIONS.labels(pool=name, state="active").set_function(
+        lambda: _pool_counts(client)[0]
+    )
+    HTTP_POOL_CONNECTIONS.labels(pool=name, state="idle").set_function(
+        lambda: _pool_counts(client)[1]
+    )
+
+
+def _limits() -> httpx.Limits:
+    import httpx
+
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def get_http_client(timeout: float) -> httpx.Client:
+    """Shared blocking httpx client for timeout (keep-alive pool, HTTP/2 when available)."""
+    key = ("sync", float(timeout))
+    with _lock:
+        client = _http_clients.get(key)
+        if client is None:
+            import httpx
+
+            client = httpx.Client(timeout=timeout, limits=_limits(), http2=http2_available())
+            _http_clients[key] = client
+            _register_pool_metrics(f"sync:{timeout:g}", client)
+        return client
+
+
+def get_async_http_client(timeout: float) -> httpx.AsyncClient:
+    """Shared async httpx client for timeout (keep-alive pool, HTTP/2 when available)."""
+    key = ("async", float(timeout))
+    with _lock:
+        client = _http_clients.get(key)
+        if client is None:
+            import httpx
+
+            client = httpx.AsyncClient(timeout=timeout, limits=_limits(), http2=http2_available())
+            _http_clients[key] = client
+            _register_pool_metrics(f"async:{timeout:g}", client)
+        return client
+
+
+def _cached(key: tuple[Any, ...], build) -> Any:
+    """Model client for key; all are rebuilt after a settings reload (keys, base URLs)."""
+    global _models_settings_version
+    with _lock:
+        if _models_settings_version != settings_version():
+            _models.clear()
+            _models_settings_version = settings_version()
+        if key not in _models:
+            _models[key] = build()
+        return _models[key]
+
+
+def get_chat_model(model: str, timeout: float) -> Any:
+    """ChatOpenAI (temperature 0) for model, sharing the pooled HTTP clients."""
+    from langchain_openai import ChatOpenAI
+
+    return _cached(
+        ("chat", model, float(timeout)),
+        lambda: ChatOpenAI(
+            model=model,
+            temperature=0,
+            timeout=timeout,
+            http_client=get_http_client(timeout),
+            http_async_client=get_async_http_client(timeout),
+        ),
+    )
+
+
+def get_openai_embeddings(model: str, timeout: float) -> Any:
+    """OpenAIEmbeddings for model, sharing the pooled HTTP clients."""
+    from langchain_openai import OpenAIEmbeddings
+
+    api_key = get_settings().openai_api_key_stripped or None
+    return _cached(
+        ("embeddings", model, float(timeout), api_key),
+        lambda: OpenAIEmbeddings(
+            model=model,
+            openai_api_key=api_key,
+            request_timeout=timeout,
+            http_client=get_http_client(timeout),
+            http_async_client=get_async_http_client(timeout),
+        ),
+    )
+
+
+def get_reranker(top_n: int, timeout: float) -> Any:
+    """CohereRerank returning top_n documents, on a pooled Cohere client."""
+    from langchain_cohere import CohereRerank
+
+    api_key = get_settings().cohere_api_key_stripped or None
+
+    def build() -> Any:
+        import cohere
+
+        client = cohere.ClientV2(api_key, timeout=timeout, httpx_client=get_http_client(timeout))
+        return CohereRerank(client=client, cohere_api_key=api_key, top_n=top_n, model=RERANK_MODEL)
+
+    return _cached(("rerank", top_n, float(timeout), api_key), build)
+
+
+def get_qa_model(model: str, timeout: float) -> Any:
+    """PydanticAI OpenAI chat model for the QA agent, on the pooled async HTTP client."""
+    from pydantic_ai.models.openai import OpenAIChatModel
+    from pydantic_ai.providers.openai import OpenAIProvider
+
+    return _cached(
+        ("qa", model, float(timeout)),
+        lambda: OpenAIChatModel(
+            model, provider=OpenAIProvider(http_client=get_async_http_client(timeout))
+        ),
+    )
+
+
+async def aclose_clients() -> None:
+    """Close pooled HTTP clients and forget cached models (application shutdown)."""
+    with _lock:
+        clients = list(_http_clients.values())
+        _http_clients.clear()
+        _models.clear()
+    for client in clients:
+        if hasattr(client, "aclose"):
+            await client.aclose()
+        else:
+            client.close()
@@ -1,10 +1,37 @@
-"""Centralized configuration from environment."""
+"""
+Centralized configuration from environment.
 
-from dotenv import load_dotenv
+get_settings() returns one memoized Settings snapshot. reload_settings() (POST
+/admin/reload-settings, or SIGHUP) re-reads .env and the environment, swaps the snapshot
+and bumps settings_version(); process-wide objects built from settings (cache backends,
+client registry, executors) compare the version they were built under and rebuild on
+their next use.
+"""
+
+import os
+import threading
+
+from dotenv import dotenv_values
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-load_dotenv()
+_dotenv_keys: set[str] = set()
+
+
+def _load_dotenv() -> None:
+    """
+    Copy .env into os.environ without overriding variables set by the real environment.
+    Keys that came from .env are refreshed on reload, so editing .env takes effect.
+    """
+    for key, value in dotenv_values().items():
+        if value is None:
+            continue
+        if key not in os.environ or key in _dotenv_keys:
+            os.environ[key] = value
+            _dotenv_keys.add(key)
+
+
+_load_dotenv()
 
 
 class Settings(BaseSettings):
@@ -31,17 +58,61 @@ class Settings(BaseSettings):
     cohere_api_key: str = Field(default="", alias="COHERE_API_KEY")
     rag_chunk_size: int = Field(default=512, alias="RAG_CHUNK_SIZE")
     rag_chunk_overlap: int = Field(default=150, alias="RAG_CHUNK_OVERLAP")
+    vector_backend: str = Field(default="chroma", alias="VECTOR_BACKEND")
     chroma_persist_dir: str = Field(default="./data/chroma", alias="CHROMA_PERSIST_DIR")
+    rag_prebuilt_index_dir: str = Field(default="", alias="RAG_PREBUILT_INDEX_DIR")
     rag_auto_refresh_interval_seconds: int = Field(
         default=300, alias="RAG_AUTO_REFRESH_INTERVAL_SECONDS"
     )
+    rag_watch_docs: bool = Field(default=True, alias="RAG_WATCH_DOCS")
+    rag_watch_debounce_ms: int = Field(default=1000, alias="RAG_WATCH_DEBOUNCE_MS")
     openai_embedding_model: str = Field(
         default="text-embedding-3-small", alias="OPENAI_EMBEDDING_MODEL"
     )
+    embedding_cache_enabled: bool = Field(default=True, alias="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_dir: str = Field(default="", alias="EMBEDDING_CACHE_DIR")
+    embedding_cache_max_rows: int = Field(default=200_000, alias="EMBEDDING_CACHE_MAX_ROWS")
+    embedding_batch_size: int = Field(default=128, alias="EMBEDDING_BATCH_SIZE")
+    embedding_max_concurrency: int = Field(default=8, alias="EMBEDDING_MAX_CONCURRENCY")
+    rag_chunk_workers: int = Field(default=4, alias="RAG_CHUNK_WORKERS")
     cache_ttl_seconds: int = Field(default=0, alias="CACHE_TTL_SECONDS")
+    cache_soft_ttl_seconds: int = Field(default=0, alias="CACHE_SOFT_TTL_SECONDS")
+    cache_early_refresh_beta: float = Field(default=1.0, alias="CACHE_EARLY_REFRESH_BETA")
+    semantic_cache_threshold: float = Field(default=0.0, alias="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_max_per_scope: int = Field(default=256, alias="SEMANTIC_CACHE_MAX_PER_SCOPE")
+    summary_cache_ttl_seconds: int = Field(default=3600, alias="SUMMARY_CACHE_TTL_SECONDS")
+    summary_block_size: int = Field(default=50, alias="SUMMARY_BLOCK_SIZE")
+    summary_shard_max_tokens: int = Field(default=2000, alias="SUMMARY_SHARD_MAX_TOKENS")
+    summary_map_reduce_min_tokens: int = Field(
+        default=8000, alias="SUMMARY_MAP_REDUCE_MIN_TOKENS"
+    )
+    summary_max_concurrency: int = Field(default=4, alias="SUMMARY_MAX_CONCURRENCY")
+    aggregate_fast_path: bool = Field(default=True, alias="AGGREGATE_FAST_PATH")
+    context_slicing: bool = Field(default=True, alias="CONTEXT_SLICING")
+    context_slice_min_rows: int = Field(default=50, alias="CONTEXT_SLICE_MIN_ROWS")
+    context_slice_max_rows: int = Field(default=100, alias="CONTEXT_SLICE_MAX_ROWS")
+    ask_singleflight: bool = Field(default=True, alias="ASK_SINGLEFLIGHT")
+    ask_redis_lock: bool = Field(default=False, alias="ASK_REDIS_LOCK")
+    ask_redis_lock_ttl_seconds: int = Field(default=60, alias="ASK_REDIS_LOCK_TTL_SECONDS")
+    wedding_context_store_maxsize: int = Field(
+        default=500, alias="WEDDING_CONTEXT_STORE_MAXSIZE"
+    )
     redis_url: str = Field(default="", alias="REDIS_URL")
     rag_cache_ttl_seconds: int = Field(default=0, alias="RAG_CACHE_TTL_SECONDS")
+    rag_cache_maxsize: int = Field(default=1000, alias="RAG_CACHE_MAXSIZE")
+    rag_cache_eviction_policy: str = Field(default="lru", alias="RAG_CACHE_EVICTION_POLICY")
+    query_embedding_cache_size: int = Field(default=2048, alias="QUERY_EMBEDDING_CACHE_SIZE")
+    query_embedding_cache_ttl_seconds: int = Field(
+        default=0, alias="QUERY_EMBEDDING_CACHE_TTL_SECONDS"
+    )
     rag_max_context_chars: int = Field(default=8000, alias="RAG_MAX_CONTEXT_CHARS")
+    retrieval_executor_workers: int = Field(default=16, alias="RETRIEVAL_EXECUTOR_WORKERS")
+    index_executor_workers: int = Field(default=2, alias="INDEX_EXECUTOR_WORKERS")
+    admin_token: str = Field(default="", alias="ADMIN_TOKEN")
+    warmup_imports: bool = Field(default=True, alias="WARMUP_IMPORTS")
+    warmup_prefill_questions: list[str] = Field(
+        default_factory=list, alias="WARMUP_PREFILL_QUESTIONS"
+    )
 
     @property
     def redis_url_stripped(self) -> str:
@@ -56,6 +127,37 @@ class Settings(BaseSettings):
         return (self.cohere_api_key or "").strip()
 
 
+_settings: Settings | None = None
+_settings_version = 0
+_settings_lock = threading.Lock()
+
+
 def get_settings() -> Settings:
-    """Return application settings (cached per process)."""
-    return Settings()
+    """Return application settings (cached per process; see reload_settings)."""
+    global _settings
+    settings = _settings
+    if settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = Settings()
+            settings = _settings
+    return settings
+
+
+def settings_version() -> int:
+    """Incremented by every reload_settings(); dependent caches rebuild when it changes."""
+    return _settings_version
+
+
+def reload_settings() -> Settings:
+    """
+    Re-read .env and the environment and replace the memoized settings. Raises
+    pydantic.ValidationError (keeping the current settings) if the new values are invalid.
+    """
+    global _settings, _settings_version
+    with _settings_lock:
+        _load_dotenv()
+        settings = Settings()
+        _settings = settings
+        _settings_version += 1
+    return settings
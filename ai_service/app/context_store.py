@@ -0,0 +1,246 @@
+"""
+Server-side wedding context store keyed by wedding.id.
+
+The backend PUTs a wedding's full context once, then PATCHes individual guests, tasks and
+guestbook entries as they change; /ask/wedding then only needs the wedding id and the
+version the caller last saw. Rendered markdown and its hash, the slicing index and the
+aggregates are memoized per version, so questions about an unchanged wedding skip
+validation, rendering, hashing, indexing and counting.
+
+A version is a hash of the stored content (wedding, guests, tasks, entries including ids),
+so it is the same on every replica holding the same context. The store is per process (in
+memory, LRU-bounded). A replica that does not know a wedding, or holds other content,
+answers 404/409 and the caller re-PUTs the full context.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from prometheus_client import Gauge
+
+from app.config import get_settings, settings_version
+from app.schemas import (
+    AskRequest,
+    GuestbookEntryContext,
+    GuestContext,
+    TaskContext,
+    WeddingContext,
+    WeddingContextPatch,
+    WeddingContextUpsert,
+)
+from app.services.aggregates import WeddingAggregates, compute_aggregates
+from app.services.context import build_context_markdown
+from app.services.slicing import WeddingIndex
+
+WEDDING_CONTEXTS_STORED = Gauge(
+    "wedding_context_store_size", "Wedding contexts held in the server-side context store"
+)
+
+
+class WeddingNotFound(KeyError):
+    """No context stored for this wedding id (PUT it first)."""
+
+
+class VersionConflict(ValueError):
+    """The caller's version does not match the stored one."""
+
+    def __init__(self, wedding_id: int, expected: str, current: str):
+        super().__init__(
+            f"wedding {wedding_id} is at version {current}, request expected {expected}"
+        )
+        self.current = current
+
+
+def _upsert_by_id(items: list, updates: list, delete_ids: list[int]) -> list:
+    """
+    Replace items whose id matches an update, append new ones, then drop deleted ids.
+    Every update must carry an id, otherwise repeating the same PATCH would duplicate it.
+    """
+    if any(update.id is None for update in updates):
+        raise ValueError("upserted rows need an id")
+    position = {item.id: i for i, item in enumerate(items) if item.id is not None}
+    merged = list(items)
+    for update in updates:
+        i = position.get(update.id)
+        if i is None:
+            position[update.id] = len(merged)
+            merged.append(update)
+        else:
+            merged[i] = update
+    if delete_ids:
+        dropped = set(delete_ids)
+        merged = [item for item in merged if item.id is None or item.id not in dropped]
+    return merged
+
+
+def content_version(
+    wedding: WeddingContext,
+    guests: list[GuestContext],
+    tasks: list[TaskContext],
+    guestbook_entries: list[GuestbookEntryContext],
+) -> str:
+    """Version of a wedding context: a hash of its content, comparable across processes."""
+    content = {
+        "wedding": wedding.model_dump(mode="json"),
+        "guests": [g.model_dump(mode="json") for g in guests],
+        "tasks": [t.model_dump(mode="json") for t in tasks],
+        "guestbook_entries": [e.model_dump(mode="json") for e in guestbook_entries],
+    }
+    data = json.dumps(content, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode()).hexdigest()[:16]
+
+
+@dataclass
+class StoredWedding:
+    """One wedding's context at a given version. Treated as immutable once stored."""
+
+    wedding: WeddingContext
+    guests: list[GuestContext]
+    tasks: list[TaskContext]
+    guestbook_entries: list[GuestbookEntryContext]
+    version: str = field(init=False)
+    _markdown: str | None = field(default=None, repr=False)
+    _hash: str | None = field(default=None, repr=False)
+    _index: WeddingIndex | None = field(default=None, repr=False)
+    _aggregates: WeddingAggregates | None = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        self.version = content_version(
+            self.wedding, self.guests, self.tasks, self.guestbook_entries
+        )
+
+    def as_request(self, question: str) -> AskRequest:
+        """AskRequest over the stored lists; items were validated when stored."""
+        return AskRequest.model_construct(
+            question=question,
+            wedding=self.wedding,
+            guests=self.guests,
+            tasks=self.tasks,
+            guestbook_entries=self.guestbook_entries,
+        )
+
+    def context_markdown(self) -> str:
+        if self._markdown is None:
+            self._markdown = build_context_markdown(self.as_request(""))
+        return self._markdown
+
+    def context_hash(self) -> str:
+        if self._hash is None:
+            self._hash = hashlib.sha256(self.context_markdown().encode()).hexdigest()[:32]
+        return self._hash
+
+    def wedding_index(self) -> WeddingIndex:
+        if self._index is None:
+            self._index = WeddingIndex(self.as_request(""))
+        return self._index
+
+    def aggregates(self) -> WeddingAggregates:
+        if self._aggregates is None:
+            self._aggregates = compute_aggregates(self.as_request(""))
+        return self._aggregates
+
+
+class WeddingContextStore:
+    """Thread-safe LRU map wedding_id -> StoredWedding with optimistic versioning."""
+
+    def __init__(self, maxsize: int = 500):
+        self._maxsize = max(1, maxsize)
+        self._weddings: OrderedDict[int, StoredWedding] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._weddings)
+
+    def _evict(self) -> None:
+        while len(self._weddings) > self._maxsize:
+            self._weddings.popitem(last=False)
+        WEDDING_CONTEXTS_STORED.set(len(self._weddings))
+
+    def _store(self, wedding_id: int, stored: StoredWedding) -> StoredWedding:
+        self._weddings[wedding_id] = stored
+        self._weddings.move_to_end(wedding_id)
+        self._evict()
+        return stored
+
+    def resize(self, maxsize: int) -> None:
+        """Change the capacity, evicting least recently used weddings if it shrank."""
+        with self._lock:
+            self._maxsize = max(1, maxsize)
+            self._evict()
+
+    def get(self, wedding_id: int) -> StoredWedding:
+        with self._lock:
+            stored = self._weddings.get(wedding_id)
+            if stored is None:
+                raise WeddingNotFound(wedding_id)
+            self._weddings.move_to_end(wedding_id)
+            return stored
+
+    def put(self, body: WeddingContextUpsert) -> StoredWedding:
+        """Replace the wedding's full context."""
+        with self._lock:
+            return self._store(
+                body.wedding.id,
+                StoredWedding(
+                    wedding=body.wedding,
+                    guests=list(body.guests),
+                    tasks=list(body.tasks),
+                    guestbook_entries=list(body.guestbook_entries),
+                ),
+            )
+
+    def patch(self, wedding_id: int, delta: WeddingContextPatch) -> StoredWedding:
+        """
+        Upsert/delete individual guests, tasks and entries by id. Raises WeddingNotFound, or
+        VersionConflict when delta.expected_version is set and does not match.
+        """
+        with self._lock:
+            current = self._weddings.get(wedding_id)
+            if current is None:
+                raise WeddingNotFound(wedding_id)
+            if delta.expected_version is not None and delta.expected_version != current.version:
+                raise VersionConflict(wedding_id, delta.expected_version, current.version)
+            return self._store(
+                wedding_id,
+                StoredWedding(
+                    wedding=delta.wedding or current.wedding,
+                    guests=_upsert_by_id(
+                        current.guests, delta.upsert_guests, delta.delete_guest_ids
+                    ),
+                    tasks=_upsert_by_id(current.tasks, delta.upsert_tasks, delta.delete_task_ids),
+                    guestbook_entries=_upsert_by_id(
+                        current.guestbook_entries,
+                        delta.upsert_guestbook_entries,
+                        delta.delete_guestbook_entry_ids,
+                    ),
+                ),
+            )
+
+    def delete(self, wedding_id: int) -> bool:
+        with self._lock:
+            removed = self._weddings.pop(wedding_id, None) is not None
+            WEDDING_CONTEXTS_STORED.set(len(self._weddings))
+            return removed
+
+
+_context_store: WeddingContextStore | None = None
+_context_store_lock = threading.Lock()
+_context_store_settings_version = settings_version()
+
+
+def get_context_store() -> WeddingContextStore:
+    """
+    Return the process-wide wedding context store (WEDDING_CONTEXT_STORE_MAXSIZE entries).
+    A settings reload resizes it in place; stored weddings are kept.
+    """
+    global _context_store, _context_store_settings_version
+    with _context_store_lock:
+        if _context_store is None:
+            _context_store = WeddingContextStore(get_settings().wedding_context_store_maxsize)
+        elif _context_store_settings_version != settings_version():
+            _context_store.resize(get_settings().wedding_context_store_maxsize)
+        _context_store_settings_version = settings_version()
+        return _context_store
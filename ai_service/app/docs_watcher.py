@@ -0,0 +1,60 @@
+"""
+Docs watcher: trigger an index refresh shortly after a Markdown file in DOCS_DIR changes.
+
+Uses filesystem notifications (watchfiles, installed with uvicorn[standard]) with
+debouncing. When notifications are unavailable the caller falls back to interval polling,
+where needs_rebuild's mtime/size pre-check keeps idle checks to a few stat calls.
+"""
+
+import logging
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class DocsWatchUnavailable(RuntimeError):
+    """Filesystem notifications cannot be used for this docs directory."""
+
+
+def _load_awatch() -> Any:
+    try:
+        from watchfiles import awatch
+    except ImportError as e:
+        raise DocsWatchUnavailable("watchfiles is not installed") from e
+    return awatch
+
+
+def _is_markdown(_change: Any, path: str) -> bool:
+    return path.endswith(".md")
+
+
+async def watch_docs(
+    docs_dir: Path,
+    on_change: Callable[[], Awaitable[Any]],
+    debounce_ms: int = 1000,
+) -> None:
+    """
+    Await on_change() once per debounced batch of *.md changes in docs_dir (top level only,
+    like the indexer). Runs until cancelled. Raises DocsWatchUnavailable if notifications
+    cannot be set up, so the caller can fall back to polling.
+    """
+    if not docs_dir.is_dir():
+        raise DocsWatchUnavailable(f"docs directory {docs_dir} does not exist")
+    awatch = _load_awatch()
+    try:
+        watcher = awatch(docs_dir, watch_filter=_is_markdown, debounce=debounce_ms, recursive=False)
+        async for changes in watcher:
+            logger.info(
+                "docs_watcher: %d change(s) in %s",
+                len(changes),
+                docs_dir,
+                extra={"changed": sorted(Path(p).name for _c, p in changes)},
+            )
+            try:
+                await on_change()
+            except Exception as e:
+                logger.warning("docs_watcher: refresh after change failed: %s", e)
+    except (OSError, RuntimeError) as e:
+        raise DocsWatchUnavailable(str(e)) from e
@@ -0,0 +1,241 @@
+"""
+Persistent, content-addressed embedding cache for document chunks.
+
+Each embedding model gets a directory with two append-only files:
+- vectors.f32: a float32 matrix (one row per cached chunk), memory-mapped for reads
+- keys.bin: the 32-byte SHA-256 of (model, chunk text) for each row, in row order
+Row i of keys.bin is the offset index into vectors.f32 (byte offset = i * dim * 4).
+
+With EMBEDDING_CACHE_MAX_ROWS set, an append that takes the cache past the limit compacts it
+to the newest rows, so the files stop growing with every edited doc.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from prometheus_client import Counter
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+KEY_BYTES = 32
+VECTORS_FILENAME = "vectors.f32"
+KEYS_FILENAME = "keys.bin"
+META_FILENAME = "meta.json"
+
+EMBEDDING_CACHE_HITS_TOTAL = Counter(
+    "embedding_cache_hits_total", "Chunk embeddings served from the embedding cache"
+)
+EMBEDDING_CACHE_MISSES_TOTAL = Counter(
+    "embedding_cache_misses_total", "Chunk embeddings computed by the embedding model"
+)
+
+
+def _model_slug(model: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in model) or "default"
+
+
+class EmbeddingStore:
+    """
+    Append-only float32 matrix of embeddings keyed by SHA-256(model + text).
+    Safe to share between threads; appends and compactions take an exclusive flock so
+    replicas sharing a volume do not interleave rows, and loads take it shared so they
+    never see a compaction half-done. max_rows > 0 bounds the number of rows kept.
+    """
+
+    def __init__(self, directory: Path, model: str, max_rows: int = 0):
+        self.model = model
+        self.max_rows = max_rows
+        self._dir = Path(directory) / _model_slug(model)
+        self._vectors_path = self._dir / VECTORS_FILENAME
+        self._keys_path = self._dir / KEYS_FILENAME
+        self._meta_path = self._dir / META_FILENAME
+        self._lock = threading.Lock()
+        self._dim: int | None = None
+        self._rows: dict[bytes, int] = {}
+        self._matrix: np.ndarray | None = None
+        with self._lock, self._flock(exclusive=False):
+            self._load()
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model}\n{text}".encode()).digest()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @contextlib.contextmanager
+    def _flock(self, exclusive: bool):
+        """Hold the cross-process .lock (exclusive to write, shared to read a snapshot)."""
+        if exclusive:
+            self._dir.mkdir(parents=True, exist_ok=True)
+        elif not self._dir.exists():
+            yield
+            return
+        with open(self._dir / ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _load(self, trim: bool = False) -> None:
+        """
+        (Re)read the offset index, ignoring rows a crashed writer left half-written.
+        With trim=True (only under the exclusive flock) those rows are cut off the files.
+        The vectors are mapped here, together with the index: a later compaction replaces
+        the files, and this snapshot keeps reading the ones it mapped.
+        """
+        self._matrix = None
+        self._rows = {}
+        if not self._meta_path.exists():
+            return
+        try:
+            self._dim = int(json.loads(self._meta_path.read_text(encoding="utf-8"))["dim"])
+            keys = self._keys_path.read_bytes() if self._keys_path.exists() else b""
+        except Exception as e:
+            logger.warning("embedding_cache: unreadable cache at %s: %s", self._dir, e)
+            return
+        row_bytes = self._dim * 4
+        vec_size = self._vectors_path.stat().st_size if self._vectors_path.exists() else 0
+        rows = min(len(keys) // KEY_BYTES, vec_size // row_bytes)
+        if trim and len(keys) != rows * KEY_BYTES:
+            with open(self._keys_path, "r+b") as f:
+                f.truncate(rows * KEY_BYTES)
+        if trim and vec_size != rows * row_bytes:
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(rows * row_bytes)
+        self._rows = {keys[i * KEY_BYTES : (i + 1) * KEY_BYTES]: i for i in range(rows)}
+        if rows:
+            self._matrix = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dim)
+            )
+
+    def _compact(self, keep: int) -> None:
+        """
+        Keep only the newest keep rows (caller holds the exclusive flock). keys.bin is removed
+        before the new vectors.f32 replaces the old one, so a crash part-way leaves an empty
+        cache rather than keys pointing at the wrong rows.
+        """
+        rows = len(self._rows)
+        row_bytes = (self._dim or 0) * 4
+        with open(self._vectors_path, "rb") as f:
+            f.seek((rows - keep) * row_bytes)
+            vectors = f.read(keep * row_bytes)
+        with open(self._keys_path, "rb") as f:
+            f.seek((rows - keep) * KEY_BYTES)
+            keys = f.read(keep * KEY_BYTES)
+        for path, data in ((self._vectors_path, vectors), (self._keys_path, keys)):
+            path.with_suffix(".tmp").write_bytes(data)
+        self._keys_path.unlink()
+        os.replace(self._vectors_path.with_suffix(".tmp"), self._vectors_path)
+        os.replace(self._keys_path.with_suffix(".tmp"), self._keys_path)
+        logger.info("embedding_cache: compacted %s from %d to %d rows", self._dir, rows, keep)
+
+    def get_many(self, keys: list[bytes]) -> list[list[float] | None]:
+        """Return the cached vector for each key, or None where it is not cached."""
+        with self._lock:
+            if self._matrix is None:
+                return [None] * len(keys)
+            matrix = self._matrix
+            return [matrix[self._rows[k]].tolist() if k in self._rows else None for k in keys]
+
+    def put_many(self, keys: list[bytes], vectors: list[list[float]]) -> None:
+        """
+        Append vectors for keys not cached yet. Past max_rows the cache is compacted to the
+        newest three quarters of max_rows, so it is not rewritten on every append.
+        """
+        if not keys:
+            return
+        data = np.asarray(vectors, dtype=np.float32)
+        with self._lock, self._flock(exclusive=True):
+            self._load(trim=True)  # pick up rows appended by other processes
+            if self._dim is None:
+                self._dim = int(data.shape[1])
+                self._meta_path.write_text(
+                    json.dumps({"model": self.model, "dim": self._dim}), encoding="utf-8"
+                )
+            elif data.shape[1] != self._dim:
+                logger.warning(
+                    "embedding_cache: dimension %d does not match cache dimension %d",
+                    data.shape[1],
+                    self._dim,
+                )
+                return
+            new_rows = [i for i, k in enumerate(keys) if k not in self._rows]
+            new_rows = list({keys[i]: i for i in new_rows}.values())
+            if not new_rows:
+                return
+            # Vectors first, then keys: a crash in between leaves only trimmable rows.
+            with open(self._vectors_path, "ab") as f:
+                f.write(data[new_rows].tobytes())
+            with open(self._keys_path, "ab") as f:
+                f.write(b"".join(keys[i] for i in new_rows))
+            self._load()
+            if 0 < self.max_rows < len(self._rows):
+                self._compact(max(1, self.max_rows * 3 // 4))
+                self._load()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves document chunks from an EmbeddingStore and only sends
+    uncached texts to the underlying model. Queries are passed through unchanged.
+    """
+
+    def __init__(self, underlying: Embeddings, store: EmbeddingStore):
+        self.underlying = underlying
+        self.store = store
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [self.store.key(t) for t in texts]
+        vectors = self.store.get_many(keys)
+        missing: dict[bytes, str] = {}
+        for key, text, vector in zip(keys, texts, vectors, strict=True):
+            if vector is None:
+                missing.setdefault(key, text)
+        EMBEDDING_CACHE_HITS_TOTAL.inc(len(texts) - sum(v is None for v in vectors))
+        if missing:
+            EMBEDDING_CACHE_MISSES_TOTAL.inc(len(missing))
+            computed = self.underlying.embed_documents(list(missing.values()))
+            by_key = dict(zip(missing.keys(), computed, strict=True))
+            self.store.put_many(list(by_key.keys()), list(by_key.values()))
+            vectors = [
+                v if v is not None else by_key[k] for k, v in zip(keys, vectors, strict=True)
+            ]
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.underlying.embed_query(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self.underlying.aembed_query(text)
+
+
+_stores: dict[tuple[str, str], EmbeddingStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_embedding_store(directory: Path, model: str, max_rows: int = 0) -> EmbeddingStore:
+    """Return the process-wide EmbeddingStore for (directory, model), bounded to max_rows."""
+    key = (str(directory), model)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = EmbeddingStore(directory, model, max_rows)
+        _stores[key].max_rows = max_rows
+        return _stores[key]
+
+
+def embedding_cache_dir(chroma_persist_dir: str, override: str = "") -> Path:
+    """Directory for the embedding cache: EMBEDDING_CACHE_DIR or a sibling of CHROMA_PERSIST_DIR."""
+    if override.strip():
+        return Path(override.strip())
+    return Path(chroma_persist_dir).parent / "embedding_cache"
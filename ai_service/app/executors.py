@@ -0,0 +1,95 @@
+"""
+Dedicated thread pools for work that has to stay blocking.
+
+LLM calls, query embeddings and the Redis caches are async on the event loop. What is left
+blocking runs in separately sized pools instead of the shared default executor: vector store
+and BM25 search plus Cohere rerank in "retrieval" (RETRIEVAL_EXECUTOR_WORKERS), index builds
+and refreshes in "index" (INDEX_EXECUTOR_WORKERS). A long index build then cannot starve
+request-path searches, and requests never queue behind unrelated to_thread work.
+"""
+
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from prometheus_client import Gauge, Histogram
+
+from app.config import get_settings, settings_version
+
+T = TypeVar("T")
+
+RETRIEVAL_POOL = "retrieval"
+INDEX_POOL = "index"
+
+EXECUTOR_TASKS = Gauge(
+    "executor_tasks", "Tasks submitted to a dedicated executor and not finished yet", ["pool"]
+)
+EXECUTOR_QUEUE_WAIT = Histogram(
+    "executor_queue_wait_seconds",
+    "Time a task waited for a free worker in a dedicated executor",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+_lock = threading.Lock()
+_executors: dict[str, ThreadPoolExecutor] = {}
+_executors_settings_version = settings_version()
+
+
+def _pool_size(pool: str) -> int:
+    settings = get_settings()
+    if pool == RETRIEVAL_POOL:
+        return max(1, settings.retrieval_executor_workers)
+    if pool == INDEX_POOL:
+        return max(1, settings.index_executor_workers)
+    raise ValueError(f"Unknown executor pool {pool!r}")
+
+
+def get_executor(pool: str) -> ThreadPoolExecutor:
+    """
+    Process-wide executor for pool, created on first use. After a settings reload the pools
+    are replaced with newly sized ones; tasks already running on the old pools finish there.
+    """
+    global _executors_settings_version
+    with _lock:
+        if _executors_settings_version != settings_version():
+            for old in _executors.values():
+                old.shutdown(wait=False)
+            _executors.clear()
+            _executors_settings_version = settings_version()
+        executor = _executors.get(pool)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=_pool_size(pool), thread_name_prefix=f"{pool}-worker"
+            )
+            _executors[pool] = executor
+        return executor
+
+
+async def run_blocking(pool: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run fn(*args, **kwargs) in the dedicated executor for pool and await its result."""
+    submitted = time.perf_counter()
+    gauge = EXECUTOR_TASKS.labels(pool=pool)
+
+    def call() -> T:
+        EXECUTOR_QUEUE_WAIT.labels(pool=pool).observe(time.perf_counter() - submitted)
+        return fn(*args, **kwargs)
+
+    gauge.inc()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(pool), call)
+    finally:
+        gauge.dec()
+
+
+def shutdown_executors(wait: bool = False) -> None:
+    """Shut the dedicated executors down (application shutdown); they are recreated on use."""
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait, cancel_futures=True)
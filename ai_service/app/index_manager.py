@@ -5,14 +5,33 @@ Index manager: doc change detection, manifest (hashes + version), and rebuild.
 import hashlib
 import json
 import logging
+import os
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
+from prometheus_client import Counter
+
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+RAG_EMBEDDINGS_SAVED_TOTAL = Counter(
+    "rag_index_embeddings_saved_total",
+    "Chunk embeddings skipped by incremental re-indexing",
+)
+
 MANIFEST_FILENAME = "index_manifest.json"
+NO_INDEX_VERSION = "none"
+
+# Active index_version, read from the manifest once and bumped by save_manifest.
+_index_version: str | None = None
+_index_version_lock = threading.Lock()
+
+# (index_version, doc stats) whose doc hashes needs_rebuild found unchanged. Kept in memory so
+# that only commit_sync writes the manifest.
+_verified_stats: tuple[str, dict[str, list[int]]] | None = None
 
 
 def _compute_file_hash(path: Path, content: str) -> str:
@@ -35,13 +54,30 @@ def _current_doc_hashes(docs_dir: Path) -> dict[str, str]:
     return hashes
 
 
+def _current_doc_stats(docs_dir: Path) -> dict[str, list[int]]:
+    """Cheap [mtime_ns, size] per *.md file in docs_dir (stat only, no reads)."""
+    stats: dict[str, list[int]] = {}
+    if not docs_dir.is_dir():
+        return stats
+    for path in sorted(docs_dir.glob("*.md")):
+        try:
+            st = path.stat()
+            stats[path.name] = [st.st_mtime_ns, st.st_size]
+        except OSError:
+            continue
+    return stats
+
+
 def _manifest_path() -> Path:
-    return Path(get_settings().chroma_persist_dir) / MANIFEST_FILENAME
+    """The prebuilt artifact's manifest when RAG_PREBUILT_INDEX_DIR is set, else the live one."""
+    settings = get_settings()
+    prebuilt = settings.rag_prebuilt_index_dir.strip()
+    return Path(prebuilt or settings.chroma_persist_dir) / MANIFEST_FILENAME
 
 
-def load_manifest() -> dict[str, Any] | None:
-    """Load manifest from CHROMA_PERSIST_DIR if it exists."""
-    path = _manifest_path()
+def load_manifest(path: Path | None = None) -> dict[str, Any] | None:
+    """Load manifest from CHROMA_PERSIST_DIR (or path) if it exists."""
+    path = path or _manifest_path()
     if not path.exists():
         return None
     try:
@@ -50,32 +86,96 @@ def load_manifest() -> dict[str, Any] | None:
         return None
 
 
-def save_manifest(doc_hashes: dict[str, str], doc_count: int) -> str:
+def build_manifest(
+    doc_hashes: dict[str, str],
+    doc_count: int,
+    last_sync: dict[str, int] | None = None,
+    collection: str | None = None,
+    doc_stats: dict[str, list[int]] | None = None,
+) -> dict[str, Any]:
     """
-    Save manifest with doc_hashes and index_version (content-derived).
-    Returns the index_version string.
+    Manifest with doc_hashes and index_version (content-derived).
+    last_sync optionally records chunk counts of the sync that produced this index;
+    collection names the vector store collection that holds it; doc_stats (taken before
+    the docs were read) let needs_rebuild skip hashing when nothing was touched.
     """
     content_hash = hashlib.sha256(json.dumps(doc_hashes, sort_keys=True).encode()).hexdigest()[:16]
-    manifest = {
+    manifest: dict[str, Any] = {
         "doc_hashes": doc_hashes,
         "doc_count": doc_count,
         "index_version": content_hash,
     }
-    path = _manifest_path()
+    if last_sync is not None:
+        manifest["last_sync"] = last_sync
+    if collection is not None:
+        manifest["collection"] = collection
+    if doc_stats is not None:
+        manifest["doc_stats"] = doc_stats
+    return manifest
+
+
+def save_manifest(
+    doc_hashes: dict[str, str],
+    doc_count: int,
+    last_sync: dict[str, int] | None = None,
+    collection: str | None = None,
+    doc_stats: dict[str, list[int]] | None = None,
+) -> str:
+    """Save the manifest (see build_manifest) and activate its index_version. Returns it."""
+    manifest = build_manifest(doc_hashes, doc_count, last_sync, collection, doc_stats)
+    write_manifest(manifest)
+    _set_index_version(manifest["index_version"])
+    return manifest["index_version"]
+
+
+def write_manifest(manifest: dict[str, Any], path: Path | None = None) -> None:
+    """Atomically write manifest to path (default: the live manifest in CHROMA_PERSIST_DIR)."""
+    path = path or _manifest_path()
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
-    return content_hash
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _set_index_version(version: str) -> None:
+    global _index_version
+    with _index_version_lock:
+        _index_version = version
+
+
+def current_index_version() -> str:
+    """
+    Return the index_version of the active index (NO_INDEX_VERSION before the first build).
+    Cache keys embed it, so a rebuild makes every older cache entry unreachable at once.
+    """
+    global _index_version
+    if _index_version is None:
+        with _index_version_lock:
+            if _index_version is None:
+                manifest = load_manifest() or {}
+                _index_version = manifest.get("index_version") or NO_INDEX_VERSION
+    return _index_version
 
 
 def needs_rebuild(docs_dir: Path) -> bool:
     """
     Return True if docs have changed since last index (or no manifest exists).
-    Compares current doc hashes to manifest.
+    First compares file mtime/size to the manifest's doc_stats (stat only); only when
+    those differ are the files read and their hashes compared to the manifest. Read-only:
+    stats of touched but unchanged files are remembered in memory, not in the manifest.
     """
+    global _verified_stats
+    manifest = load_manifest()
+    stats = _current_doc_stats(docs_dir)
+    if manifest is not None and stats:
+        if manifest.get("doc_stats") == stats:
+            return False
+        if _verified_stats == (manifest.get("index_version"), stats):
+            return False
     current = _current_doc_hashes(docs_dir)
     if not current:
-        return False  # No docs to index
-    manifest = load_manifest()
+        # No docs: only the chunks of an index built from since-deleted docs need removing.
+        return bool(manifest and manifest.get("doc_hashes"))
     if manifest is None:
         return True  # First run or manifest missing
     stored = manifest.get("doc_hashes") or {}
@@ -84,26 +184,189 @@ def needs_rebuild(docs_dir: Path) -> bool:
     for name, h in current.items():
         if stored.get(name) != h:
             return True
+    if stats:
+        # Touched but unchanged: remember the new stats so the next check is stat-only.
+        _verified_stats = (manifest.get("index_version"), stats)
     return False
 
 
-def rebuild(store: Any, docs_dir: Path, load_docs_fn: Any) -> tuple[int, list[Any]]:
+def chunk_id(doc: Any) -> str:
     """
-    Clear the store's collection and re-index from docs_dir using load_docs_fn().
-    load_docs_fn must be a callable that takes (docs_dir: Path) and returns list[Document].
-    Saves manifest after indexing. Returns (number of documents added, documents list).
+    Stable, content-addressed id for a chunk: source plus a hash of heading, section
+    index and text. Unchanged chunks keep their id across rebuilds.
     """
+    meta = doc.metadata or {}
+    source = meta.get("source") or "docs"
+    data = f"{source}\n{meta.get('heading') or ''}\n{meta.get('page', '')}\n{doc.page_content}"
+    return f"{source}:{hashlib.sha256(data.encode()).hexdigest()[:16]}"
+
+
+def _changed_sources(doc_hashes: dict[str, str], stored: dict[str, str]) -> set[str]:
+    """Filenames that were added, modified or removed since the stored hashes."""
+    changed = {name for name, h in doc_hashes.items() if stored.get(name) != h}
+    return changed | (set(stored) - set(doc_hashes))
+
+
+def _existing_ids(store: Any, sources: set[str] | None) -> set[str]:
+    """Ids currently in the collection, either all of them or only those of `sources`."""
+    if sources is None:
+        return set(store._collection.get(include=[])["ids"])
+    ids: set[str] = set()
+    for source in sources:
+        ids.update(store._collection.get(where={"source": source}, include=[])["ids"])
+    return ids
+
+
+@dataclass
+class SyncResult:
+    """Outcome of sync_collection: the full chunk list plus what changed in the store."""
+
+    documents: list[Any]
+    doc_hashes: dict[str, str]
+    last_sync: dict[str, int] = field(default_factory=dict)
+    doc_stats: dict[str, list[int]] = field(default_factory=dict)
+
+
+# New chunks are handed to the store (and so to the embedding batches) in groups of at least
+# this many while later files are still being chunked.
+EMBED_FLUSH_CHUNKS = 512
+
+
+def _embed_flush_size(store: Any) -> int:
+    """Chunks per add_documents call: enough to keep every concurrent embedding batch busy."""
+    embeddings = getattr(store, "embeddings", None)
+    batch_size = getattr(embeddings, "batch_size", None)
+    concurrency = getattr(embeddings, "max_concurrency", None)
+    if isinstance(batch_size, int) and isinstance(concurrency, int):
+        return max(EMBED_FLUSH_CHUNKS, batch_size * concurrency)
+    return EMBED_FLUSH_CHUNKS
+
+
+def sync_collection(
+    store: Any, docs_dir: Path, load_docs_fn: Any, *, incremental: bool = True
+) -> SyncResult:
+    """
+    Sync the store's collection with docs_dir using load_docs_fn(), without touching the
+    manifest. load_docs_fn must be a callable that takes (docs_dir: Path) and returns an
+    iterable of Documents; when it is a generator, new chunks are embedded in groups that fill
+    the embedder's concurrent batches while the remaining files are still being chunked.
+
+    Chunks get stable ids (chunk_id). When incremental and a manifest exists, only files
+    whose hash differs from the manifest's doc_hashes are diffed against the collection;
+    otherwise the whole collection is reconciled. Either way only new chunks are embedded
+    and only vanished chunks are deleted (once every file has been read).
+    """
+    doc_stats = _current_doc_stats(docs_dir)  # before reading, so later edits are noticed
+    doc_hashes = _current_doc_hashes(docs_dir)
+    manifest = load_manifest() if incremental else None
+    sources = None
+    if manifest is not None:
+        sources = _changed_sources(doc_hashes, manifest.get("doc_hashes") or {})
     try:
-        ids = store._collection.get(include=[])["ids"]
-        if ids:
-            store._collection.delete(ids=ids)
+        existing = _existing_ids(store, sources)
     except Exception as e:
-        logger.warning("index_manager: could not clear collection: %s", e)
-    documents = load_docs_fn(docs_dir)
-    if not documents:
-        return 0, []
-    store.add_documents(documents)
-    doc_hashes = _current_doc_hashes(docs_dir)
-    version = save_manifest(doc_hashes, len(documents))
-    logger.info("index_manager: rebuilt index with %d chunks, version=%s", len(documents), version)
-    return len(documents), documents
+        logger.warning("index_manager: could not list collection ids: %s", e)
+        existing = set()
+
+    flush_size = _embed_flush_size(store)
+    documents: dict[str, Any] = {}
+    desired: set[str] = set()
+    pending: list[Any] = []
+    added = 0
+    for doc in load_docs_fn(docs_dir):
+        doc.id = chunk_id(doc)
+        if doc.id in documents:
+            continue  # exact duplicate chunk
+        documents[doc.id] = doc
+        if sources is not None and (doc.metadata or {}).get("source") not in sources:
+            continue
+        desired.add(doc.id)
+        if doc.id not in existing:
+            pending.append(doc)
+        if len(pending) >= flush_size:
+            store.add_documents(pending, ids=[d.id for d in pending])
+            added += len(pending)
+            pending = []
+    if pending:
+        store.add_documents(pending, ids=[d.id for d in pending])
+        added += len(pending)
+
+    stale = sorted(existing - desired)
+    if stale:
+        try:
+            store._collection.delete(ids=stale)
+        except Exception as e:
+            logger.warning("index_manager: could not delete stale chunks: %s", e)
+
+    saved = max(len(documents) - added, 0)
+    RAG_EMBEDDINGS_SAVED_TOTAL.inc(saved)
+    return SyncResult(
+        documents=list(documents.values()),
+        doc_hashes=doc_hashes,
+        last_sync={
+            "chunks_added": added,
+            "chunks_deleted": len(stale),
+            "embeddings_saved": saved,
+        },
+        doc_stats=doc_stats,
+    )
+
+
+def collection_name(store: Any) -> str | None:
+    """Name of the store's collection (Chroma and numpy stores), if it has one."""
+    name = getattr(getattr(store, "_collection", None), "name", None)
+    return name if isinstance(name, str) else None
+
+
+def commit_sync(result: SyncResult, collection: str | None = None) -> str:
+    """Save the manifest for a completed sync (bumps index_version). Returns the version."""
+    version = save_manifest(
+        result.doc_hashes,
+        len(result.documents),
+        last_sync=result.last_sync,
+        collection=collection,
+        doc_stats=result.doc_stats,
+    )
+    logger.info(
+        "index_manager: synced index with %d chunks (%d added, %d deleted, %d embeddings saved), version=%s",
+        len(result.documents),
+        result.last_sync["chunks_added"],
+        result.last_sync["chunks_deleted"],
+        result.last_sync["embeddings_saved"],
+        version,
+    )
+    return version
+
+
+CLONE_BATCH_SIZE = 1000
+
+
+def clone_collection(src: Any, dst: Any) -> int:
+    """
+    Copy every chunk (id, vector, text, metadata) from src's collection into dst's,
+    without re-embedding. Returns the number of chunks copied.
+    """
+    got = src._collection.get(include=["embeddings", "documents", "metadatas"])
+    ids = list(got["ids"])
+    for start in range(0, len(ids), CLONE_BATCH_SIZE):
+        end = start + CLONE_BATCH_SIZE
+        dst._collection.upsert(
+            ids=ids[start:end],
+            embeddings=got["embeddings"][start:end],
+            documents=got["documents"][start:end],
+            metadatas=got["metadatas"][start:end],
+        )
+    return len(ids)
+
+
+def rebuild(
+    store: Any, docs_dir: Path, load_docs_fn: Any, *, incremental: bool = True
+) -> tuple[int, list[Any]]:
+    """
+    Sync the store's collection in place (see sync_collection) and save the manifest.
+    With no docs the manifest records an empty index, so needs_rebuild settles.
+    Returns (number of documents in the index, documents list).
+    """
+    result = sync_collection(store, docs_dir, load_docs_fn, incremental=incremental)
+    commit_sync(result, collection=collection_name(store))
+    return len(result.documents), result.documents
@@ -2,30 +2,67 @@
 
 import asyncio
 import hashlib
+import hmac
 import json
 import logging
+import signal
 import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from typing import Annotated
 
-from fastapi import Depends, FastAPI, HTTPException, Response
-from fastapi.responses import StreamingResponse
-from prometheus_client import CONTENT_TYPE_LATEST, Histogram, generate_latest
+from fastapi import Depends, FastAPI, Header, HTTPException, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from pydantic import ValidationError
 
 from app.cache import (
+    AsyncResponseCacheBackend,
     deserialize_ask_response,
+    get_rag_cache_backend,
     get_response_cache_backend,
+    load_cached_response,
     response_cache_key_ask,
     response_cache_key_ask_docs,
     serialize_ask_response,
 )
-from app.config import get_settings
+from app.clients import aclose_clients
+from app.config import get_settings, reload_settings, settings_version
+from app.context_store import StoredWedding, VersionConflict, WeddingNotFound, get_context_store
+from app.docs_watcher import DocsWatchUnavailable, watch_docs
+from app.executors import INDEX_POOL, run_blocking, shutdown_executors
 from app.index_manager import load_manifest as get_rag_manifest
-from app.retrieval import get_or_build_store, get_retrieved_context_cached
-from app.schemas import AskDocsRequest, AskRequest, AskResponse
-from app.services.context import build_context_markdown
+from app.retrieval import (
+    active_store,
+    aembed_query_cached,
+    aget_retrieved_context_cached,
+    get_or_build_store,
+    index_version_for,
+    refresh_index,
+)
+from app.schemas import (
+    AskDocsRequest,
+    AskRequest,
+    AskResponse,
+    AskWeddingRequest,
+    WeddingContextPatch,
+    WeddingContextUpsert,
+    WeddingContextVersion,
+)
+from app.semantic_cache import get_semantic_cache
+from app.services.aggregates import (
+    compute_aggregates,
+    format_fact_table,
+    is_aggregate_question,
+    is_count_question,
+)
+from app.services.context import build_context_blocks, build_context_markdown
 from app.services.qa import generate_answer, stream_answer
-from app.services.summarization import summarize_context
+from app.services.slicing import ContextSlice, slice_context
+from app.services.summarization import SummaryResult, summarize_blocks_cached
+from app.singleflight import SingleFlight
+from app.warmup import WarmupState, run_warmup
 
 logger = logging.getLogger(__name__)
 
@@ -37,8 +74,13 @@ REQUEST_DURATION = Histogram(
     buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
 )
 
-# RAG store singleton; preloaded at startup when possible, else on first /ask
-_rag_store = None
+RESPONSE_CACHE_REVALIDATIONS_TOTAL = Counter(
+    "response_cache_revalidations_total",
+    "Background refreshes of soft-stale /ask cache entries",
+)
+
+_ask_flight = SingleFlight("ask")
+_warmup = WarmupState()
 
 
 def _context_hash(context_markdown: str) -> str:
@@ -46,9 +88,76 @@ def _context_hash(context_markdown: str) -> str:
     return hashlib.sha256(context_markdown.encode()).hexdigest()[:32]
 
 
-def _server_timing_header(entries: dict[str, float]) -> str:
-    """Build a Server-Timing header value from name -> duration_ms entries."""
-    return "; ".join(f"{name}, dur={round(ms, 2)}" for name, ms in entries.items())
+def _server_timing_header(
+    entries: dict[str, float], descriptions: dict[str, str] | None = None
+) -> str:
+    """Build a Server-Timing header value from name -> duration_ms entries (optional desc)."""
+    descriptions = descriptions or {}
+    return "; ".join(
+        f"{name}, dur={round(ms, 2)}"
+        + (f', desc="{descriptions[name]}"' if name in descriptions else "")
+        for name, ms in entries.items()
+    )
+
+
+def _summary_timing_desc(result: SummaryResult) -> str:
+    """Shard count and map/reduce phase timings for the summarize_rag Server-Timing entry."""
+    if result.aggregates:
+        return "aggregates"
+    return f"shards={result.shards} map={round(result.map_ms, 1)}ms reduce={round(result.reduce_ms, 1)}ms"
+
+
+def _slice_context(payload: AskRequest, stored: StoredWedding | None = None) -> ContextSlice:
+    """
+    Rows relevant to the question (plus totals) when CONTEXT_SLICING is on. For a stored
+    context, its per-version slicing index and aggregates are reused.
+    """
+    settings = get_settings()
+    aggregates = stored.aggregates() if stored is not None else None
+    if not settings.context_slicing:
+        return ContextSlice(payload, aggregates=aggregates)
+    return slice_context(
+        payload,
+        payload.question,
+        min_rows=settings.context_slice_min_rows,
+        max_rows=settings.context_slice_max_rows,
+        index=stored.wedding_index() if stored is not None else None,
+        aggregates=aggregates,
+    )
+
+
+async def _summarize(
+    payload: AskRequest, context: ContextSlice, context_hash: str, model: str
+) -> SummaryResult:
+    """
+    Summarize the (sliced) request context in cached blocks; map-reduce above the size
+    threshold. Counts of roster rows get a deterministic fact table over the full payload
+    instead (no LLM call); other count questions get the table in front of the summary.
+    """
+    settings = get_settings()
+    fact_table = ""
+    if settings.aggregate_fast_path and is_count_question(payload.question):
+        aggregates = context.aggregates or compute_aggregates(payload)
+        fact_table = format_fact_table(payload, aggregates)
+        if is_aggregate_question(payload.question):
+            return SummaryResult(summary=fact_table, aggregates=True)
+    blocks = build_context_blocks(
+        context.payload,
+        settings.summary_block_size,
+        settings.summary_shard_max_tokens,
+        note=context.note,
+    )
+    result = await summarize_blocks_cached(
+        blocks,
+        context_hash,
+        model,
+        settings.ai_http_timeout,
+        reduce_above_tokens=settings.summary_map_reduce_min_tokens,
+        max_concurrency=settings.summary_max_concurrency,
+    )
+    if fact_table:
+        result = replace(result, summary=f"{fact_table}\n\n{result.summary}")
+    return result
 
 
 def _log_timing(route: str, **ms_entries: float) -> None:
@@ -66,11 +175,11 @@ def _record_metrics(route: str, **ms_entries: float) -> None:
 
 
 def _get_rag_store():
-    global _rag_store
-    if _rag_store is None:
-        settings = get_settings()
-        _rag_store = get_or_build_store(Path(settings.docs_dir))
-    return _rag_store
+    """Return the active RAG store; built by the warmup at startup, else on first /ask."""
+    store = active_store()
+    if store is None:
+        store = get_or_build_store(Path(get_settings().docs_dir))
+    return store
 
 
 def get_rag_store_dep():
@@ -78,54 +187,90 @@ def get_rag_store_dep():
     return _get_rag_store()
 
 
-async def _lifespan(app: FastAPI):
-    """Start RAG store build in background; optionally run periodic index refresh."""
+def _reload_settings_logged() -> int:
+    """Reload settings and return the new version; invalid values keep the current ones."""
+    reload_settings()
+    version = settings_version()
+    logger.info("settings reloaded (version %d)", version)
+    return version
+
 
-    def build_store():
-        global _rag_store
+def _install_sighup_reload() -> bool:
+    """Reload settings on SIGHUP (per worker process); False where signals are unavailable."""
+
+    def on_sighup() -> None:
         try:
-            settings = get_settings()
-            _rag_store = get_or_build_store(Path(settings.docs_dir))
-        except Exception:
-            pass
+            _reload_settings_logged()
+        except ValidationError as e:
+            logger.error("settings reload failed, keeping current settings: %s", e)
 
-    asyncio.create_task(asyncio.to_thread(build_store))
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, on_sighup)
+    except (AttributeError, NotImplementedError, RuntimeError):
+        return False
+    return True
 
-    async def refresh_index_if_needed():
-        from pathlib import Path
 
-        from app.index_manager import needs_rebuild, rebuild
-        from app.retrieval import _load_docs_from_dir, set_bm25_docs
+async def _lifespan(app: FastAPI):
+    """
+    Run the warmup stages in background (/ready reports them), then keep the index fresh:
+    refresh (blue/green) within seconds of a docs edit via filesystem notifications, and poll
+    every RAG_AUTO_REFRESH_INTERVAL_SECONDS (the only check when notifications are off).
+    """
+
+    warmup_task = asyncio.create_task(run_warmup(_warmup))
 
-        interval = get_settings().rag_auto_refresh_interval_seconds
-        if interval <= 0:
+    async def refresh_once():
+        if active_store() is None:
             return
+        # Blue/green: builds the next generation aside, then swaps store + BM25.
+        await run_blocking(INDEX_POOL, refresh_index, Path(get_settings().docs_dir))
+
+    async def poll(interval: int):
         while True:
             await asyncio.sleep(interval)
             try:
-                store = _get_rag_store()
-                if store is None:
-                    continue
-                docs_dir = Path(get_settings().docs_dir)
-                if needs_rebuild(docs_dir):
-                    _n, docs = await asyncio.to_thread(
-                        rebuild, store, docs_dir, _load_docs_from_dir
-                    )
-                    set_bm25_docs(docs)
-            except asyncio.CancelledError:
-                break
-            except Exception:
-                pass
+                await refresh_once()
+            except Exception as e:
+                logger.warning("docs refresh failed: %s", e)
+
+    async def refresh_index_if_needed():
+        settings = get_settings()
+        if settings.rag_prebuilt_index_dir.strip():
+            return  # read-only prebuilt index: nothing to watch
+        interval = settings.rag_auto_refresh_interval_seconds
+        if not settings.rag_watch_docs:
+            if interval > 0:
+                await poll(interval)
+            return
+        # Polling also runs alongside notifications, to catch edits that arrived before the
+        # first build or whose refresh failed; idle polls are a few stat calls.
+        poller = asyncio.create_task(poll(interval)) if interval > 0 else None
+        try:
+            await watch_docs(Path(settings.docs_dir), refresh_once, settings.rag_watch_debounce_ms)
+        except DocsWatchUnavailable as e:
+            logger.info("docs watching unavailable (%s); polling instead", e)
+            if poller is not None:
+                await poller
+        finally:
+            if poller is not None:
+                poller.cancel()
 
     refresh_task = asyncio.create_task(refresh_index_if_needed())
+    sighup = _install_sighup_reload()
     try:
         yield
     finally:
-        refresh_task.cancel()
-        try:
-            await refresh_task
-        except asyncio.CancelledError:
-            pass
+        if sighup:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+        for task in (refresh_task, warmup_task):
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await aclose_clients()
+        shutdown_executors()
 
 
 def require_api_key() -> None:
@@ -153,18 +298,57 @@ def health() -> dict[str, str]:
     return {"status": "ok", "model": get_settings().openai_model}
 
 
+@app.get("/ready")
+def ready() -> JSONResponse:
+    """
+    Readiness for load balancers: 200 once warmup has opened the index and pooled the
+    clients, 503 before that. The body lists every warmup stage with its status and timing.
+    """
+    return JSONResponse(_warmup.as_dict(), status_code=200 if _warmup.ready else 503)
+
+
 @app.get("/rag/status")
 def rag_status() -> dict[str, str | int | None]:
-    """Return RAG index version and doc count for debugging."""
+    """Return RAG index version, doc count and last sync savings for debugging."""
     manifest = get_rag_manifest()
     if manifest is None:
-        return {"index_version": None, "doc_count": None}
+        return {"index_version": None, "doc_count": None, "embeddings_saved": None}
     return {
         "index_version": manifest.get("index_version"),
         "doc_count": manifest.get("doc_count"),
+        "embeddings_saved": (manifest.get("last_sync") or {}).get("embeddings_saved"),
     }
 
 
+@app.get("/rag/cache")
+def rag_cache_stats() -> dict[str, object]:
+    """Return RAG cache statistics (size, hit rate, evictions) for this process."""
+    backend = get_rag_cache_backend()
+    if backend is None:
+        return {"enabled": False}
+    return {"enabled": True, **backend.stats()}
+
+
+@app.post("/admin/reload-settings")
+def admin_reload_settings(
+    x_admin_token: Annotated[str | None, Header()] = None,
+) -> dict[str, int]:
+    """
+    Re-read .env and the environment without a restart. Requires ADMIN_TOKEN in the
+    X-Admin-Token header; disabled (403) while ADMIN_TOKEN is empty. Only the worker serving
+    the request reloads; with several workers, send each of them SIGHUP instead.
+    """
+    token = get_settings().admin_token
+    if not token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled.")
+    if not hmac.compare_digest((x_admin_token or "").encode(), token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+    try:
+        return {"settings_version": _reload_settings_logged()}
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=f"Invalid settings: {exc}") from exc
+
+
 @app.get("/metrics")
 def metrics() -> Response:
     """Prometheus scrape endpoint for request duration and step histograms."""
@@ -178,75 +362,264 @@ async def ask(
     store: Annotated[object, Depends(get_rag_store_dep)],
 ) -> AskResponse:
     require_api_key()
+    return await _answer("ask", response, payload, store)
+
+
+async def _answer(
+    route: str,
+    response: Response,
+    payload: AskRequest,
+    store: object,
+    stored: StoredWedding | None = None,
+) -> AskResponse:
+    """
+    Shared /ask pipeline: context (sliced), response cache, summary + RAG, then QA.
+    stored is the server-side context the payload came from, whose rendered markdown and
+    hash are reused when the question does not slice it.
+    """
     question = payload.question.strip()
     if not question:
         raise HTTPException(status_code=422, detail="Question cannot be blank.")
 
     t0 = time.perf_counter()
     settings = get_settings()
-    context_markdown = build_context_markdown(payload)
+    context = _slice_context(payload, stored)
+    if stored is not None and not context.sliced:
+        context_markdown, context_hash = stored.context_markdown(), stored.context_hash()
+    else:
+        context_markdown = build_context_markdown(context.payload, context.note)
+        context_hash = _context_hash(context_markdown)
     context_ms = (time.perf_counter() - t0) * 1000
 
+    index_version = index_version_for(store)
+    key = response_cache_key_ask(question, context_hash, index_version)
     cache_backend = await get_response_cache_backend()
+
+    async def compute() -> _AskOutcome:
+        return await _compute_answer(
+            question, payload, context, context_hash, store, cache_backend, key
+        )
+
     if cache_backend is not None:
-        key = response_cache_key_ask(question, _context_hash(context_markdown))
         raw = await cache_backend.get(key)
         if raw is not None:
+            cached, descriptions = _from_cache(raw, key, compute)
             total_ms = (time.perf_counter() - t0) * 1000
             response.headers["Server-Timing"] = _server_timing_header(
-                {"context": context_ms, "cache_hit": 0, "total": total_ms}
+                {"context": context_ms, "cache_hit": 0, "total": total_ms}, descriptions
             )
-            _log_timing("ask", context=context_ms, cache_hit=0, total=total_ms)
-            _record_metrics("ask", context=context_ms, cache_hit=0, total=total_ms)
-            return AskResponse.model_validate(deserialize_ask_response(raw))
+            _log_timing(route, context=context_ms, cache_hit=0, total=total_ms)
+            _record_metrics(route, context=context_ms, cache_hit=0, total=total_ms)
+            return cached
 
-    try:
-        t_fetch = time.perf_counter()
-        summarization_model = settings.openai_summarization_model or settings.openai_model
-        qa_model = settings.openai_qa_model or settings.openai_model
-        context_summary, retrieved_context = await asyncio.gather(
-            asyncio.to_thread(
-                summarize_context,
-                context_markdown,
-                summarization_model,
-                settings.ai_http_timeout,
-            ),
-            asyncio.to_thread(get_retrieved_context_cached, payload.question, store),
+    semantic_scope = f"{index_version}:{context_hash}"
+    semantic_hit, question_vector = await _semantic_lookup(
+        route, semantic_scope, question, store, cache_backend
+    )
+    if semantic_hit is not None:
+        total_ms = (time.perf_counter() - t0) * 1000
+        response.headers["Server-Timing"] = _server_timing_header(
+            {"context": context_ms, "cache_hit": 0, "total": total_ms}, {"cache_hit": "semantic"}
         )
-        fetch_ms = (time.perf_counter() - t_fetch) * 1000
+        _log_timing(route, context=context_ms, cache_hit=0, total=total_ms)
+        _record_metrics(route, context=context_ms, cache_hit=0, total=total_ms)
+        return semantic_hit
 
-        t_qa = time.perf_counter()
-        answer = await generate_answer(
-            question,
-            context_summary,
-            retrieved_context,
-            model=qa_model,
-        )
-        qa_ms = (time.perf_counter() - t_qa) * 1000
-    except Exception as exc:
-        raise HTTPException(status_code=502, detail=f"AI request failed: {exc}") from exc
+    if settings.ask_singleflight:
+        coalesced = _ask_flight.busy(key)
+        outcome = await _ask_flight.do(key, compute)
+    else:
+        coalesced = False
+        outcome = await compute()
 
-    if not answer:
-        raise HTTPException(status_code=502, detail="AI returned an empty answer.")
+    if question_vector is not None and not coalesced:
+        get_semantic_cache().add(semantic_scope, question_vector, key)
 
     total_ms = (time.perf_counter() - t0) * 1000
+    if coalesced or outcome.shared:
+        # Another request (here or on another replica) computed this answer.
+        response.headers["Server-Timing"] = _server_timing_header(
+            {"context": context_ms, "coalesced": 0, "total": total_ms}
+        )
+        _log_timing(route, context=context_ms, coalesced=0, total=total_ms)
+        _record_metrics(route, context=context_ms, coalesced=0, total=total_ms)
+        return outcome.result
+
+    summary_result = outcome.summary
     response.headers["Server-Timing"] = _server_timing_header(
-        {"context": context_ms, "summarize_rag": fetch_ms, "qa": qa_ms, "total": total_ms}
+        {
+            "context": context_ms,
+            "summarize_rag": outcome.fetch_ms,
+            "qa": outcome.qa_ms,
+            "total": total_ms,
+        },
+        descriptions={"summarize_rag": _summary_timing_desc(summary_result)},
     )
-    _log_timing("ask", context=context_ms, summarize_rag=fetch_ms, qa=qa_ms, total=total_ms)
-    _record_metrics("ask", context=context_ms, summarize_rag=fetch_ms, qa=qa_ms, total=total_ms)
-
-    result = AskResponse(
-        answer=answer,
-        model=qa_model,
-        context_summary=context_summary or None,
+    _log_timing(
+        route,
+        context=context_ms,
+        summarize_rag=outcome.fetch_ms,
+        summarize_map=summary_result.map_ms,
+        summarize_reduce=summary_result.reduce_ms,
+        qa=outcome.qa_ms,
+        total=total_ms,
     )
-    if cache_backend is not None:
-        key = response_cache_key_ask(question, _context_hash(context_markdown))
-        await cache_backend.set(
-            key, serialize_ask_response(result.model_dump()), settings.cache_ttl_seconds
+    _record_metrics(
+        route,
+        context=context_ms,
+        summarize_rag=outcome.fetch_ms,
+        qa=outcome.qa_ms,
+        total=total_ms,
+    )
+    return outcome.result
+
+
+async def _semantic_lookup(
+    route: str,
+    scope: str,
+    question: str,
+    store: object,
+    cache_backend: AsyncResponseCacheBackend | None,
+) -> tuple[AskResponse | None, list[float] | None]:
+    """
+    Look for a cached answer to a paraphrase of question within scope. Returns the answer
+    (or None) and the question vector, to index the fresh answer under on a miss.
+    """
+    embeddings = getattr(store, "embeddings", None)
+    if cache_backend is None or embeddings is None or get_settings().semantic_cache_threshold <= 0:
+        return None, None
+    try:
+        vector = await aembed_query_cached(question, embeddings)
+    except Exception as exc:
+        logger.warning("semantic cache: could not embed question: %s", exc)
+        return None, None
+    key, _similarity = get_semantic_cache().lookup(
+        scope, vector, get_settings().semantic_cache_threshold, route
+    )
+    if key is None:
+        return None, vector
+    raw = await cache_backend.get(key)
+    if raw is None:
+        return None, vector
+    return AskResponse.model_validate(load_cached_response(raw).data), vector
+
+
+def _from_cache(
+    raw: str, key: str, compute: Callable[[], Awaitable["_AskOutcome"]]
+) -> tuple[AskResponse, dict[str, str]]:
+    """
+    A cached answer and its Server-Timing descriptions. Stale-while-revalidate: a soft-stale
+    entry is still served, and compute() runs once in the background to replace it.
+    """
+    entry = load_cached_response(raw)
+    descriptions = {}
+    if entry.should_refresh(get_settings().cache_early_refresh_beta):
+        descriptions["cache_hit"] = "stale"
+        if not _ask_flight.busy(key):
+            _revalidate_in_background(key, compute)
+    return AskResponse.model_validate(entry.data), descriptions
+
+
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _revalidate_in_background(key: str, compute: Callable[[], Awaitable["_AskOutcome"]]) -> None:
+    """
+    Recompute a soft-stale cached answer without blocking the request that noticed it. Runs
+    through the ask single-flight so a burst of stale hits starts one refresh; the task is
+    kept referenced until done so it is not garbage-collected mid-flight.
+    """
+    RESPONSE_CACHE_REVALIDATIONS_TOTAL.inc()
+
+    async def run() -> None:
+        try:
+            await _ask_flight.do(key, compute)
+        except Exception as exc:
+            logger.warning("response cache revalidation failed for %s: %s", key, exc)
+
+    task = asyncio.create_task(run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+@dataclass
+class _AskOutcome:
+    """Result of one /ask computation, shared by every request coalesced onto it."""
+
+    result: AskResponse
+    summary: SummaryResult = field(default_factory=lambda: SummaryResult(summary=""))
+    fetch_ms: float = 0.0
+    qa_ms: float = 0.0
+    shared: bool = False  # taken from the cache after waiting on another replica's lock
+
+
+async def _compute_answer(
+    question: str,
+    payload: AskRequest,
+    context: ContextSlice,
+    context_hash: str,
+    store: object,
+    cache_backend: AsyncResponseCacheBackend | None,
+    key: str,
+) -> _AskOutcome:
+    """
+    Summary + RAG, then QA, then store the response. With ASK_REDIS_LOCK and a Redis cache,
+    only the replica holding the lock for key computes; the others wait for its cached answer.
+    """
+    settings = get_settings()
+    lock_token = None
+    if cache_backend is not None and settings.ask_redis_lock:
+        lock_ttl = settings.ask_redis_lock_ttl_seconds
+        lock_token = await cache_backend.acquire_lock(key, lock_ttl)
+        if lock_token is None:
+            raw = await cache_backend.wait_for(key, timeout=lock_ttl)
+            if raw is not None:
+                cached = AskResponse.model_validate(deserialize_ask_response(raw))
+                return _AskOutcome(result=cached, shared=True)
+    try:
+        try:
+            t_fetch = time.perf_counter()
+            summarization_model = settings.openai_summarization_model or settings.openai_model
+            qa_model = settings.openai_qa_model or settings.openai_model
+            summary_result, retrieved_context = await asyncio.gather(
+                _summarize(payload, context, context_hash, summarization_model),
+                aget_retrieved_context_cached(payload.question, store),
+            )
+            fetch_ms = (time.perf_counter() - t_fetch) * 1000
+            context_summary = summary_result.summary
+
+            t_qa = time.perf_counter()
+            answer = await generate_answer(
+                question,
+                context_summary,
+                retrieved_context,
+                model=qa_model,
+            )
+            qa_ms = (time.perf_counter() - t_qa) * 1000
+        except Exception as exc:
+            raise HTTPException(status_code=502, detail=f"AI request failed: {exc}") from exc
+
+        if not answer:
+            raise HTTPException(status_code=502, detail="AI returned an empty answer.")
+
+        result = AskResponse(
+            answer=answer,
+            model=qa_model,
+            context_summary=context_summary or None,
         )
-    return result
+        if cache_backend is not None:
+            compute_seconds = time.perf_counter() - t_fetch
+            await cache_backend.set(
+                key,
+                serialize_ask_response(
+                    result.model_dump(), settings.cache_soft_ttl_seconds, compute_seconds
+                ),
+                settings.cache_ttl_seconds,
+            )
+        return _AskOutcome(result, summary_result, fetch_ms, qa_ms)
+    finally:
+        if lock_token is not None:
+            await cache_backend.release_lock(key, lock_token)
 
 
 @app.post("/ask/stream")
@@ -261,22 +634,20 @@ async def ask_stream(
         raise HTTPException(status_code=422, detail="Question cannot be blank.")
 
     settings = get_settings()
-    context_markdown = build_context_markdown(payload)
+    context = _slice_context(payload)
+    context_markdown = build_context_markdown(context.payload, context.note)
+    context_hash = _context_hash(context_markdown)
     summarization_model = settings.openai_summarization_model or settings.openai_model
     qa_model = settings.openai_qa_model or settings.openai_model
 
     try:
-        context_summary, retrieved_context = await asyncio.gather(
-            asyncio.to_thread(
-                summarize_context,
-                context_markdown,
-                summarization_model,
-                settings.ai_http_timeout,
-            ),
-            asyncio.to_thread(get_retrieved_context_cached, question, store),
+        summary_result, retrieved_context = await asyncio.gather(
+            _summarize(payload, context, context_hash, summarization_model),
+            aget_retrieved_context_cached(question, store),
         )
     except Exception as exc:
         raise HTTPException(status_code=502, detail=f"AI request failed: {exc}") from exc
+    context_summary = summary_result.summary
 
     async def event_stream():
         async for chunk in stream_answer(
@@ -297,32 +668,74 @@ async def ask_docs(
     payload: AskDocsRequest,
     store: Annotated[object, Depends(get_rag_store_dep)],
 ) -> AskResponse:
-    """Answer using only the RAG documentation (no wedding/guests/tasks/guestbook context)."""
+    """
+    Answer using only the RAG documentation (no wedding/guests/tasks/guestbook context).
+    Cached like /ask, including soft TTL and stale-while-revalidate.
+    """
     require_api_key()
     question = payload.question.strip()
     if not question:
         raise HTTPException(status_code=422, detail="Question cannot be blank.")
 
     t0 = time.perf_counter()
-    settings = get_settings()
+    index_version = index_version_for(store)
+    key = response_cache_key_ask_docs(question, index_version)
     cache_backend = await get_response_cache_backend()
+
+    async def compute() -> _AskOutcome:
+        return await _compute_docs_answer(question, store, cache_backend, key)
+
     if cache_backend is not None:
-        key = response_cache_key_ask_docs(question)
         raw = await cache_backend.get(key)
         if raw is not None:
+            cached, descriptions = _from_cache(raw, key, compute)
             total_ms = (time.perf_counter() - t0) * 1000
             response.headers["Server-Timing"] = _server_timing_header(
-                {"cache_hit": 0, "total": total_ms}
+                {"cache_hit": 0, "total": total_ms}, descriptions
             )
             _log_timing("ask_docs", cache_hit=0, total=total_ms)
             _record_metrics("ask_docs", cache_hit=0, total=total_ms)
-            return AskResponse.model_validate(deserialize_ask_response(raw))
+            return cached
+
+    docs_scope = f"docs:{index_version}"
+    semantic_hit, question_vector = await _semantic_lookup(
+        "ask_docs", docs_scope, question, store, cache_backend
+    )
+    if semantic_hit is not None:
+        total_ms = (time.perf_counter() - t0) * 1000
+        response.headers["Server-Timing"] = _server_timing_header(
+            {"cache_hit": 0, "total": total_ms}, {"cache_hit": "semantic"}
+        )
+        _log_timing("ask_docs", cache_hit=0, total=total_ms)
+        _record_metrics("ask_docs", cache_hit=0, total=total_ms)
+        return semantic_hit
+
+    outcome = await compute()
+    if question_vector is not None:
+        get_semantic_cache().add(docs_scope, question_vector, key)
 
+    total_ms = (time.perf_counter() - t0) * 1000
+    response.headers["Server-Timing"] = _server_timing_header(
+        {"rag": outcome.fetch_ms, "qa": outcome.qa_ms, "total": total_ms}
+    )
+    _log_timing("ask_docs", rag=outcome.fetch_ms, qa=outcome.qa_ms, total=total_ms)
+    _record_metrics("ask_docs", rag=outcome.fetch_ms, qa=outcome.qa_ms, total=total_ms)
+    return outcome.result
+
+
+async def _compute_docs_answer(
+    question: str,
+    store: object,
+    cache_backend: AsyncResponseCacheBackend | None,
+    key: str,
+) -> _AskOutcome:
+    """RAG, then QA, then store the response under key with the /ask soft and hard TTLs."""
+    settings = get_settings()
     context_summary = "No live wedding data provided; answer from documentation only."
     qa_model = settings.openai_qa_model or settings.openai_model
     try:
         t_rag = time.perf_counter()
-        retrieved_context = await asyncio.to_thread(get_retrieved_context_cached, question, store)
+        retrieved_context = await aget_retrieved_context_cached(question, store)
         rag_ms = (time.perf_counter() - t_rag) * 1000
 
         t_qa = time.perf_counter()
@@ -339,21 +752,95 @@ async def ask_docs(
     if not answer:
         raise HTTPException(status_code=502, detail="AI returned an empty answer.")
 
-    total_ms = (time.perf_counter() - t0) * 1000
-    response.headers["Server-Timing"] = _server_timing_header(
-        {"rag": rag_ms, "qa": qa_ms, "total": total_ms}
-    )
-    _log_timing("ask_docs", rag=rag_ms, qa=qa_ms, total=total_ms)
-    _record_metrics("ask_docs", rag=rag_ms, qa=qa_ms, total=total_ms)
-
     result = AskResponse(
         answer=answer,
         model=qa_model,
         context_summary=context_summary,
     )
     if cache_backend is not None:
-        key = response_cache_key_ask_docs(question)
+        compute_seconds = time.perf_counter() - t_rag
         await cache_backend.set(
-            key, serialize_ask_response(result.model_dump()), settings.cache_ttl_seconds
+            key,
+            serialize_ask_response(
+                result.model_dump(), settings.cache_soft_ttl_seconds, compute_seconds
+            ),
+            settings.cache_ttl_seconds,
         )
-    return result
+    return _AskOutcome(result, fetch_ms=rag_ms, qa_ms=qa_ms)
+
+
+def _context_version(stored: StoredWedding) -> WeddingContextVersion:
+    return WeddingContextVersion(
+        wedding_id=stored.wedding.id,
+        version=stored.version,
+        guests=len(stored.guests),
+        tasks=len(stored.tasks),
+        guestbook_entries=len(stored.guestbook_entries),
+    )
+
+
+@app.put("/weddings/{wedding_id}/context", response_model=WeddingContextVersion)
+def put_wedding_context(wedding_id: int, body: WeddingContextUpsert) -> WeddingContextVersion:
+    """Store (replace) a wedding's full context server-side; returns the new version."""
+    if body.wedding.id != wedding_id:
+        raise HTTPException(status_code=422, detail="wedding.id does not match the URL.")
+    return _context_version(get_context_store().put(body))
+
+
+@app.patch("/weddings/{wedding_id}/context", response_model=WeddingContextVersion)
+def patch_wedding_context(wedding_id: int, delta: WeddingContextPatch) -> WeddingContextVersion:
+    """Upsert or delete individual guests, tasks and guestbook entries (matched by id)."""
+    if delta.wedding is not None and delta.wedding.id != wedding_id:
+        raise HTTPException(status_code=422, detail="wedding.id does not match the URL.")
+    upserts = (delta.upsert_guests, delta.upsert_tasks, delta.upsert_guestbook_entries)
+    if any(row.id is None for rows in upserts for row in rows):
+        raise HTTPException(
+            status_code=422,
+            detail="Upserted rows need an id; PUT the full context to add rows without one.",
+        )
+    try:
+        return _context_version(get_context_store().patch(wedding_id, delta))
+    except WeddingNotFound as exc:
+        raise HTTPException(status_code=404, detail="No stored context for this wedding.") from exc
+    except VersionConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
+@app.get("/weddings/{wedding_id}/context", response_model=WeddingContextVersion)
+def get_wedding_context(wedding_id: int) -> WeddingContextVersion:
+    try:
+        return _context_version(get_context_store().get(wedding_id))
+    except WeddingNotFound as exc:
+        raise HTTPException(status_code=404, detail="No stored context for this wedding.") from exc
+
+
+@app.delete("/weddings/{wedding_id}/context", status_code=204)
+def delete_wedding_context(wedding_id: int) -> Response:
+    get_context_store().delete(wedding_id)
+    return Response(status_code=204)
+
+
+@app.post("/ask/wedding", response_model=AskResponse)
+async def ask_wedding(
+    response: Response,
+    payload: AskWeddingRequest,
+    store: Annotated[object, Depends(get_rag_store_dep)],
+) -> AskResponse:
+    """
+    Same as POST /ask, for a context stored with PUT/PATCH /weddings/{id}/context.
+    404 if this process has no context for the wedding, 409 if it holds another version;
+    either way the caller re-PUTs the full context and retries.
+    """
+    require_api_key()
+    try:
+        stored = get_context_store().get(payload.wedding_id)
+    except WeddingNotFound as exc:
+        raise HTTPException(status_code=404, detail="No stored context for this wedding.") from exc
+    if stored.version != payload.version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Stored context is at version {stored.version}, request has {payload.version}.",
+        )
+    return await _answer(
+        "ask_wedding", response, stored.as_request(payload.question), store, stored=stored
+    )
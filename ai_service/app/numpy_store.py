@@ -0,0 +1,347 @@
+"""
+In-process NumPy vector index: an alternative to Chroma for small corpora.
+
+Vectors are L2-normalized and kept in one contiguous float32 matrix that is memory-mapped
+from disk; top-k is a single matrix-vector product plus argpartition. Metadata filters
+use boolean row masks, precomputed per `source`. The store exposes the same surface the
+rest of the service uses on Chroma: LangChain's VectorStore API for search/add, and a
+Chroma-like `_collection` (count/get/delete/upsert) for index_manager.
+
+Each write puts the vectors in a new vectors-<token>.f32 file and then atomically replaces
+meta.json, which names that file; so a crash at any point leaves meta.json and the vectors
+it refers to consistent. Superseded vectors files are removed after the swap.
+"""
+
+import json
+import os
+import shutil
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+VECTORS_FILENAME = "vectors.f32"  # written before meta.json named its vectors file
+META_FILENAME = "meta.json"
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+@dataclass(frozen=True)
+class _IndexState:
+    """Immutable snapshot of the index; writers swap in a new one, readers never lock."""
+
+    ids: list[str]
+    texts: list[str]
+    metadatas: list[dict[str, Any]]
+    matrix: np.ndarray
+    source_masks: dict[str, np.ndarray] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, ids, texts, metadatas, matrix) -> "_IndexState":
+        sources = np.array([(m or {}).get("source") or "" for m in metadatas], dtype=object)
+        masks = {src: sources == src for src in set(sources.tolist())}
+        return cls(list(ids), list(texts), list(metadatas), matrix, masks)
+
+    def mask(self, where: dict[str, Any] | None) -> np.ndarray | None:
+        """Boolean row mask for an equality filter (keys ANDed); None means all rows."""
+        if not where:
+            return None
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, value in where.items():
+            if key == "source":
+                mask &= self.source_masks.get(value, np.zeros(len(self.ids), dtype=bool))
+            else:
+                mask &= np.array([(m or {}).get(key) == value for m in self.metadatas], dtype=bool)
+        return mask
+
+
+class NumpyVectorStore(VectorStore):
+    """Vector store backed by a memory-mapped, normalized float32 matrix (cosine similarity)."""
+
+    def __init__(
+        self,
+        collection_name: str,
+        embedding_function: Embeddings | None = None,
+        persist_directory: str | Path | None = None,
+        read_only: bool = False,
+    ):
+        self.collection_name = collection_name
+        self._embedding_function = embedding_function
+        self._dir = Path(persist_directory) / collection_name if persist_directory else None
+        self._read_only = read_only
+        self._write_lock = threading.Lock()
+        self._state = self._load()
+        self._collection = NumpyCollection(self)
+
+    @property
+    def embeddings(self) -> Embeddings | None:
+        return self._embedding_function
+
+    # --- persistence ---
+
+    def _load(self) -> _IndexState:
+        empty = _IndexState.build([], [], [], np.zeros((0, 0), dtype=np.float32))
+        if self._dir is None:
+            return empty
+        for attempt in range(2):
+            if not (self._dir / META_FILENAME).exists():
+                return empty
+            meta = json.loads((self._dir / META_FILENAME).read_text(encoding="utf-8"))
+            if not meta["ids"]:
+                return empty
+            try:
+                matrix = np.memmap(
+                    self._dir / meta.get("vectors", VECTORS_FILENAME),
+                    dtype=np.float32,
+                    mode="r",
+                    shape=(len(meta["ids"]), meta["dim"]),
+                )
+            except FileNotFoundError:
+                if attempt:
+                    raise
+                continue  # another process swapped in a new version meanwhile; re-read meta
+            return _IndexState.build(meta["ids"], meta["texts"], meta["metadatas"], matrix)
+        return empty
+
+    def _persist(self, state: _IndexState) -> _IndexState:
+        if self._dir is None:
+            return state
+        self._dir.mkdir(parents=True, exist_ok=True)
+        vectors_name = f"vectors-{os.urandom(8).hex()}.f32"
+        meta_tmp = self._dir / (META_FILENAME + ".tmp")
+        np.ascontiguousarray(state.matrix, dtype=np.float32).tofile(self._dir / vectors_name)
+        meta = {
+            "ids": state.ids,
+            "texts": state.texts,
+            "metadatas": state.metadatas,
+            "dim": int(state.matrix.shape[1]) if state.matrix.size else 0,
+            "vectors": vectors_name,
+        }
+        meta_tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(meta_tmp, self._dir / META_FILENAME)
+        for path in self._dir.glob("vectors*.f32"):
+            if path.name != vectors_name:
+                path.unlink(missing_ok=True)  # open memory maps stay valid
+        return self._load()
+
+    def _check_writable(self) -> None:
+        if self._read_only:
+            raise PermissionError(f"NumpyVectorStore {self.collection_name!r} is read-only")
+
+    # --- mutation ---
+
+    def _upsert(
+        self,
+        ids: list[str],
+        vectors: Any,
+        texts: list[str],
+        metadatas: list[dict[str, Any]],
+    ) -> None:
+        self._check_writable()
+        new = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1))
+        with self._write_lock:
+            state = self._state
+            replaced = set(ids)
+            keep = [i for i, doc_id in enumerate(state.ids) if doc_id not in replaced]
+            if state.matrix.size and new.size and state.matrix.shape[1] != new.shape[1]:
+                raise ValueError("embedding dimension does not match the index")
+            kept = (
+                np.asarray(state.matrix[keep]) if keep else np.zeros((0, new.shape[1]), np.float32)
+            )
+            self._state = self._persist(
+                _IndexState.build(
+                    [state.ids[i] for i in keep] + list(ids),
+                    [state.texts[i] for i in keep] + list(texts),
+                    [state.metadatas[i] for i in keep] + [dict(m or {}) for m in metadatas],
+                    np.vstack([kept, new]),
+                )
+            )
+
+    def _delete_rows(self, ids: Iterable[str] | None = None, where: dict | None = None) -> None:
+        self._check_writable()
+        with self._write_lock:
+            state = self._state
+            drop = np.zeros(len(state.ids), dtype=bool)
+            if ids is not None:
+                wanted = set(ids)
+                drop |= np.array([doc_id in wanted for doc_id in state.ids], dtype=bool)
+            mask = state.mask(where)
+            if mask is not None:
+                drop |= mask
+            if not drop.any():
+                return
+            keep = np.flatnonzero(~drop)
+            self._state = self._persist(
+                _IndexState.build(
+                    [state.ids[i] for i in keep],
+                    [state.texts[i] for i in keep],
+                    [state.metadatas[i] for i in keep],
+                    np.asarray(state.matrix[keep]),
+                )
+            )
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: list[dict] | None = None,
+        *,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        if self._embedding_function is None:
+            raise ValueError("NumpyVectorStore needs an embedding_function to add texts")
+        ids = list(ids) if ids else [os.urandom(16).hex() for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        self._upsert(ids, self._embedding_function.embed_documents(texts), texts, metadatas)
+        return ids
+
+    def delete(self, ids: list[str] | None = None, **kwargs: Any) -> bool | None:
+        self._delete_rows(ids=ids or [])
+        return True
+
+    def delete_collection(self) -> None:
+        """Drop every row and remove the on-disk files (used to garbage-collect generations)."""
+        self._check_writable()
+        with self._write_lock:
+            self._state = _IndexState.build([], [], [], np.zeros((0, 0), dtype=np.float32))
+            if self._dir is not None and self._dir.exists():
+                shutil.rmtree(self._dir, ignore_errors=True)
+
+    # --- search ---
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: list[float], k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        state = self._state
+        if not state.ids or k <= 0:
+            return []
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        scores = state.matrix @ query
+        mask = state.mask(filter)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        k = min(k, len(state.ids) if mask is None else int(mask.sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (
+                Document(id=state.ids[i], page_content=state.texts[i], metadata=state.metadatas[i]),
+                float(scores[i]),
+            )
+            for i in top
+        ]
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[Document]:
+        return [
+            doc for doc, _score in self.similarity_search_by_vector_with_score(embedding, k, filter)
+        ]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[Document]:
+        if self._embedding_function is None:
+            raise ValueError("NumpyVectorStore needs an embedding_function to search by text")
+        return self.similarity_search_by_vector(
+            self._embedding_function.embed_query(query), k=k, filter=filter
+        )
+
+    def _similarity_search_with_relevance_scores(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        if self._embedding_function is None:
+            raise ValueError("NumpyVectorStore needs an embedding_function to search by text")
+        return self.similarity_search_by_vector_with_score(
+            self._embedding_function.embed_query(query), k=k, filter=kwargs.get("filter")
+        )
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        *,
+        ids: list[str] | None = None,
+        collection_name: str = "numpy_index",
+        persist_directory: str | None = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(collection_name, embedding, persist_directory)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+
+class NumpyCollection:
+    """Chroma-collection-shaped view of a NumpyVectorStore (what index_manager uses)."""
+
+    def __init__(self, store: NumpyVectorStore):
+        self._store = store
+
+    @property
+    def name(self) -> str:
+        return self._store.collection_name
+
+    def count(self) -> int:
+        return len(self._store._state.ids)
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        where: dict | None = None,
+        include: list[str] | tuple[str, ...] = ("metadatas", "documents"),
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        state = self._store._state
+        mask = state.mask(where)
+        rows = range(len(state.ids)) if mask is None else np.flatnonzero(mask).tolist()
+        if ids is not None:
+            wanted = set(ids)
+            rows = [i for i in rows if state.ids[i] in wanted]
+        rows = list(rows)
+        result: dict[str, Any] = {"ids": [state.ids[i] for i in rows]}
+        if "documents" in include:
+            result["documents"] = [state.texts[i] for i in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [state.metadatas[i] for i in rows]
+        if "embeddings" in include:
+            result["embeddings"] = np.asarray(state.matrix[rows]) if rows else []
+        return result
+
+    def delete(
+        self, ids: list[str] | None = None, where: dict | None = None, **kwargs: Any
+    ) -> None:
+        self._store._delete_rows(ids=ids, where=where)
+
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings: Any,
+        metadatas: list[dict] | None = None,
+        documents: list[str] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        if not ids:
+            return
+        self._store._upsert(
+            list(ids),
+            embeddings,
+            list(documents or [""] * len(ids)),
+            list(metadatas or [{}] * len(ids)),
+        )
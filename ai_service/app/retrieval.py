@@ -1,53 +1,101 @@
 """
-RAG retrieval for Wedding AI: embed docs from docs/ and query with Chroma.
+RAG retrieval for Wedding AI: embed docs from docs/ and query with Chroma (or the
+in-process numpy index, see VECTOR_BACKEND).
 Supports hybrid search (Chroma + BM25), optional Cohere rerank, metadata filters, adaptive k.
+The a* variants are the request path: query embeddings and the RAG cache are awaited on the
+event loop, and only the blocking search/rerank runs in the dedicated retrieval executor.
 """
 
+from __future__ import annotations
+
+import functools
 import logging
+import shutil
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from langchain_chroma import Chroma
 from prometheus_client import Counter
-from langchain_community.retrievers import BM25Retriever
-from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from app.bm25_index import BM25_FILENAME, build_bm25_retriever, load_bm25_retriever, save_bm25_index
+from app.clients import get_openai_embeddings, get_reranker
 from app.config import get_settings
+from app.executors import RETRIEVAL_POOL, run_blocking
+from app.index_manager import NO_INDEX_VERSION
+
+if TYPE_CHECKING:
+    # LangChain, Chroma and the splitters load on first use (see app.warmup), not on import.
+    from langchain_community.retrievers import BM25Retriever
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import Embeddings
+    from langchain_core.vectorstores import VectorStore
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 logger = logging.getLogger(__name__)
 
 # Collection and persistence
 COLLECTION_NAME = "wedding_ai_docs"
+NUMPY_INDEX_DIRNAME = "numpy_index"
+# Generations left behind by other processes are only dropped once this old: a replica
+# sharing the persist dir may still be serving a newer one.
+ORPHAN_GRACE_SECONDS = 24 * 3600
 
 # RAG observability
 RAG_RETRIEVAL_TOTAL = Counter("rag_retrieval_total", "Total RAG retrievals")
 RAG_CACHE_HITS_TOTAL = Counter("rag_cache_hits_total", "RAG cache hits")
 RAG_CACHE_MISSES_TOTAL = Counter("rag_cache_misses_total", "RAG cache misses")
+QUERY_EMBEDDING_CACHE_HITS_TOTAL = Counter(
+    "query_embedding_cache_hits_total", "Query embeddings served from cache"
+)
+QUERY_EMBEDDING_CACHE_MISSES_TOTAL = Counter(
+    "query_embedding_cache_misses_total", "Query embeddings computed remotely"
+)
 
-# BM25 in-memory retriever (set when index is built/rebuilt)
-_bm25_retriever: BM25Retriever | None = None
 _RRF_K = 60
 
 
 def _get_index_manager():
-    from app.index_manager import (
-        _current_doc_hashes,
-        load_manifest,
-        needs_rebuild,
-        rebuild,
-        save_manifest,
-    )
-    return load_manifest, needs_rebuild, rebuild, save_manifest, _current_doc_hashes
+    from app.index_manager import needs_rebuild, rebuild
 
+    return needs_rebuild, rebuild
+
+
+def get_embedding_model() -> Embeddings:
+    """
+    Return OpenAI embeddings using settings (OPENAI_API_KEY, timeout, model).
+    When EMBEDDING_CACHE_ENABLED, document chunks are served from the persistent
+    content-addressed embedding cache and only unseen chunk texts are embedded remotely.
+    Documents are embedded in batches of EMBEDDING_BATCH_SIZE, up to
+    EMBEDDING_MAX_CONCURRENCY at once, backing off on rate limits (see batched_embeddings).
+    """
+    from app.batched_embeddings import BatchedEmbeddings
 
-def get_embedding_model() -> OpenAIEmbeddings:
-    """Return OpenAI embeddings using settings (OPENAI_API_KEY, timeout, model)."""
     s = get_settings()
-    return OpenAIEmbeddings(
-        model=s.openai_embedding_model,
-        openai_api_key=s.openai_api_key_stripped or None,
-        request_timeout=s.ai_http_timeout,
+    embeddings = get_openai_embeddings(s.openai_embedding_model, s.ai_http_timeout)
+    if s.embedding_cache_enabled:
+        from app.embedding_cache import CachedEmbeddings, embedding_cache_dir, get_embedding_store
+
+        cache_dir = embedding_cache_dir(s.chroma_persist_dir, s.embedding_cache_dir)
+        store = get_embedding_store(cache_dir, s.openai_embedding_model, s.embedding_cache_max_rows)
+        embeddings = CachedEmbeddings(embeddings, store)
+    return BatchedEmbeddings(embeddings, s.embedding_batch_size, s.embedding_max_concurrency)
+
+
+@functools.lru_cache(maxsize=8)
+def _splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Shared splitter per (chunk size, overlap); split_text keeps no state between calls."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", " ", ""],
     )
 
 
@@ -56,13 +104,10 @@ def _chunk_markdown_with_splitter(content: str, source: str) -> list[Document]:
     Split markdown by ## headers, then split each section with RecursiveCharacterTextSplitter.
     Each chunk gets metadata: source, heading, page (section index).
     """
+    from langchain_core.documents import Document
+
     settings = get_settings()
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=settings.rag_chunk_size,
-        chunk_overlap=settings.rag_chunk_overlap,
-        length_function=len,
-        separators=["\n\n", "\n", " ", ""],
-    )
+    splitter = _splitter(settings.rag_chunk_size, settings.rag_chunk_overlap)
     sections = content.split("\n## ")
     docs: list[Document] = []
     for i, section in enumerate(sections):
@@ -85,75 +130,335 @@ def _chunk_markdown_with_splitter(content: str, source: str) -> list[Document]:
     return docs
 
 
-def _load_docs_from_dir(docs_dir: Path) -> list[Document]:
-    """Scan docs_dir for *.md, chunk with RecursiveCharacterTextSplitter, return list of Documents."""
-    all_docs: list[Document] = []
+def _chunk_file(path: Path) -> list[Document]:
+    try:
+        content = path.read_text(encoding="utf-8")
+    except Exception:
+        return []
+    return _chunk_markdown_with_splitter(content, path.name)
+
+
+def _iter_docs_from_dir(docs_dir: Path) -> Iterator[Document]:
+    """
+    Scan docs_dir for *.md and chunk them, RAG_CHUNK_WORKERS files at a time, yielding the
+    Documents in file order as each file is chunked. The workers keep chunking ahead while
+    the caller consumes (e.g. embeds) the chunks already yielded.
+    """
     if not docs_dir.is_dir():
-        return all_docs
-    for path in sorted(docs_dir.glob("*.md")):
-        try:
-            content = path.read_text(encoding="utf-8")
-        except Exception:
-            continue
-        source = path.name
-        all_docs.extend(_chunk_markdown_with_splitter(content, source))
-    return all_docs
+        return
+    paths = sorted(docs_dir.glob("*.md"))
+    if not paths:
+        return
+    from app.batched_embeddings import record_stage
+
+    t0 = time.perf_counter()
+    workers = min(max(1, get_settings().rag_chunk_workers), len(paths))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chunk-worker") as pool:
+        chunked = pool.map(_chunk_file, paths) if workers > 1 else map(_chunk_file, paths)
+        for i, docs in enumerate(chunked, start=1):
+            if i == len(paths):
+                record_stage("chunk", len(paths), time.perf_counter() - t0)
+            yield from docs
+
+
+def _load_docs_from_dir(docs_dir: Path) -> list[Document]:
+    """All chunks of docs_dir's *.md files, in file order (see _iter_docs_from_dir)."""
+    return list(_iter_docs_from_dir(docs_dir))
+
+
+def open_store(
+    persist_path: Path, embed: Embeddings, collection_name: str = COLLECTION_NAME
+) -> VectorStore:
+    """Open the vector store selected by VECTOR_BACKEND (chroma, or the in-process numpy index)."""
+    if get_settings().vector_backend.strip().lower() == "numpy":
+        from app.numpy_store import NumpyVectorStore
+
+        return NumpyVectorStore(
+            collection_name=collection_name,
+            embedding_function=embed,
+            persist_directory=persist_path / NUMPY_INDEX_DIRNAME,
+        )
+    from langchain_chroma import Chroma
+
+    return Chroma(
+        collection_name=collection_name,
+        embedding_function=embed,
+        persist_directory=str(persist_path),
+    )
+
+
+@dataclass(frozen=True)
+class IndexGeneration:
+    """
+    A vector store collection, the BM25 index built from the same chunks, and the
+    index_version they were committed under (cache keys are scoped to it).
+    """
+
+    store: VectorStore
+    bm25: BM25Retriever | None
+    collection: str
+    index_version: str = NO_INDEX_VERSION
 
 
-def get_or_build_store(docs_dir: Path | None = None) -> Chroma | None:
+# Active generation (store + BM25 are swapped together) and the generation it replaced,
+# kept until the next swap so requests already holding it finish with normal recall.
+_active: IndexGeneration | None = None
+_retired: IndexGeneration | None = None
+_index_lock = threading.RLock()
+
+
+def active_store() -> VectorStore | None:
+    """Return the store of the active index generation, or None before the first build."""
+    generation = _active
+    return generation.store if generation is not None else None
+
+
+def _bm25_for(store: VectorStore | None) -> BM25Retriever | None:
+    """BM25 index of the generation that owns store (so a query never mixes generations)."""
+    for generation in (_active, _retired):
+        if generation is not None and generation.store is store:
+            return generation.bm25
+    return None
+
+
+def index_version_for(store: VectorStore | None) -> str:
+    """
+    index_version of the generation that owns store. Requests build every cache key from
+    this, so a request that took the previous generation just before a swap never caches
+    its results under the new version. Stores that are no generation's fall back to the
+    active version; no store at all is NO_INDEX_VERSION.
     """
-    Return a Chroma vector store for wedding_ai_docs. If the collection is empty
+    from app.index_manager import current_index_version
+
+    if store is None:
+        return NO_INDEX_VERSION
+    for generation in (_active, _retired):
+        if generation is not None and generation.store is store:
+            return generation.index_version
+    return current_index_version()
+
+
+def _persist_bm25(bm25: BM25Retriever | None, index_version: str) -> None:
+    if bm25 is None:
+        return
+    try:
+        save_bm25_index(bm25, index_version)
+    except Exception as e:
+        logger.warning("retrieval: could not persist BM25 index: %s", e)
+
+
+def _load_or_build_bm25(docs_dir: Path) -> BM25Retriever | None:
+    """Load the persisted BM25 index for the current index_version, re-chunking only if absent."""
+    from app.index_manager import current_index_version
+
+    version = current_index_version()
+    bm25 = load_bm25_retriever(version)
+    if bm25 is None:
+        bm25 = build_bm25_retriever(_load_docs_from_dir(docs_dir))
+        _persist_bm25(bm25, version)
+    return bm25
+
+
+def get_or_build_store(docs_dir: Path | None = None) -> VectorStore | None:
+    """
+    Return the active vector store for wedding_ai_docs (Chroma or numpy, per VECTOR_BACKEND),
+    opening the collection named in the manifest on first call. If the collection is empty
     and docs_dir has Markdown files, index them. Uses OPENAI_API_KEY for embeddings.
     Returns None if OPENAI_API_KEY is missing or docs_dir is missing/empty when store is empty.
     """
+    global _active
     s = get_settings()
     if not s.openai_api_key_stripped:
         return None
 
-    persist_path = Path(s.chroma_persist_dir)
-    persist_path.mkdir(parents=True, exist_ok=True)
-    embed = get_embedding_model()
+    with _index_lock:
+        if _active is not None:
+            return _active.store
+        if s.rag_prebuilt_index_dir.strip():
+            _active = _open_prebuilt(Path(s.rag_prebuilt_index_dir), get_embedding_model())
+            return _active.store
+        from app.index_manager import current_index_version, load_manifest
+
+        persist_path = Path(s.chroma_persist_dir)
+        persist_path.mkdir(parents=True, exist_ok=True)
+        embed = get_embedding_model()
+        collection = (load_manifest() or {}).get("collection") or COLLECTION_NAME
+        store = open_store(persist_path, embed, collection)
+
+        dir_path = docs_dir or Path(s.docs_dir)
+        needs_rebuild, rebuild = _get_index_manager()
 
-    store = Chroma(
-        collection_name=COLLECTION_NAME,
+        try:
+            count = store._collection.count()
+        except Exception:
+            count = 0
+
+        if count == 0:
+            _n, docs = rebuild(store, dir_path, _iter_docs_from_dir, incremental=False)
+            bm25 = _build_and_persist_bm25(docs)
+        elif needs_rebuild(dir_path):
+            _n, docs = rebuild(store, dir_path, _iter_docs_from_dir)
+            bm25 = _build_and_persist_bm25(docs)
+        else:
+            bm25 = _load_or_build_bm25(dir_path)
+
+        _active = IndexGeneration(
+            store=store, bm25=bm25, collection=collection, index_version=current_index_version()
+        )
+        _drop_orphan_generations(store, persist_path, keep=collection)
+        return store
+
+
+def _open_prebuilt(path: Path, embed: Embeddings, attempts: int = 3) -> IndexGeneration:
+    """
+    Open the artifact written by app.build_index: vectors memory-mapped read-only and the
+    BM25 index it was built with. Raises ValueError if the artifact is missing or unusable.
+    path is resolved once, so every file comes from the same build even if a rebuild
+    repoints the symlink meanwhile; if that rebuild removes the build being opened, the
+    open is retried on the new one.
+    """
+    for _ in range(attempts - 1):
+        build = path.resolve()
+        try:
+            return _open_prebuilt_build(build, embed)
+        except (OSError, ValueError):
+            if path.resolve() == build:
+                raise
+            logger.info("retrieval: prebuilt index %s was replaced while opening, retrying", path)
+    return _open_prebuilt_build(path.resolve(), embed)
+
+
+def _open_prebuilt_build(path: Path, embed: Embeddings) -> IndexGeneration:
+    from app.build_index import prebuilt_manifest
+    from app.numpy_store import NumpyVectorStore
+
+    manifest = prebuilt_manifest(path)
+    collection = manifest.get("collection") or COLLECTION_NAME
+    store = NumpyVectorStore(
+        collection_name=collection,
         embedding_function=embed,
-        persist_directory=str(persist_path),
+        persist_directory=path / NUMPY_INDEX_DIRNAME,
+        read_only=True,
+    )
+    if store._collection.count() == 0:
+        raise ValueError(f"prebuilt index in {path} has no vectors")
+    bm25 = load_bm25_retriever(manifest["index_version"], path / BM25_FILENAME)
+    logger.info("retrieval: opened prebuilt index %s (version=%s)", path, manifest["index_version"])
+    return IndexGeneration(
+        store=store, bm25=bm25, collection=collection, index_version=manifest["index_version"]
     )
 
-    dir_path = docs_dir or Path(s.docs_dir)
-    load_manifest, needs_rebuild, rebuild, save_manifest, current_doc_hashes = _get_index_manager()
 
+def _build_and_persist_bm25(documents: list[Document]) -> BM25Retriever | None:
+    from app.index_manager import current_index_version
+
+    bm25 = build_bm25_retriever(documents)
+    _persist_bm25(bm25, current_index_version())
+    return bm25
+
+
+def set_bm25_docs(documents: list[Document]) -> None:
+    """
+    Rebuild the active generation's BM25 index from documents (e.g. after an in-place
+    rebuild) and persist it next to the manifest for the current index_version.
+    """
+    global _active
+    from app.index_manager import current_index_version
+
+    bm25 = _build_and_persist_bm25(documents)
+    with _index_lock:
+        if _active is not None:
+            _active = replace(_active, bm25=bm25, index_version=current_index_version())
+
+
+def refresh_index(docs_dir: Path) -> bool:
+    """
+    Blue/green refresh. If docs changed, build the next generation off to the side: a new
+    collection cloned from the active one (no re-embedding), synced incrementally with
+    docs_dir, plus a fresh BM25 index. Then swap store and BM25 in one step, save the
+    manifest (bumping index_version) and garbage-collect the generation retired by the
+    previous swap. Queries keep hitting a complete index throughout.
+    Returns True when a new generation was activated.
+    """
+    global _active, _retired
+    from app.index_manager import clone_collection, commit_sync, needs_rebuild, sync_collection
+
+    if get_settings().rag_prebuilt_index_dir.strip():
+        return False  # the prebuilt index is read-only; rebuild the artifact instead
+    with _index_lock:
+        current = _active
+        if current is None or not needs_rebuild(docs_dir):
+            return False
+        name = _generation_name()
+        store = open_store(
+            Path(get_settings().chroma_persist_dir), current.store.embeddings, name
+        )
+        try:
+            clone_collection(current.store, store)
+            result = sync_collection(store, docs_dir, _iter_docs_from_dir)
+        except Exception:
+            _drop_generation(IndexGeneration(store=store, bm25=None, collection=name))
+            raise
+        bm25 = build_bm25_retriever(result.documents)  # None once every doc is deleted
+
+        version = commit_sync(result, collection=name)
+        stale, _retired = _retired, current
+        _active = IndexGeneration(store, bm25, name, version)
+        _persist_bm25(bm25, version)
+        if stale is not None:
+            _drop_generation(stale)
+        logger.info("retrieval: activated index generation %s (version=%s)", name, version)
+        return True
+
+
+def _drop_generation(generation: IndexGeneration) -> None:
+    """Delete a generation's collection (Chroma collection or numpy index directory)."""
     try:
-        count = store._collection.count()
-    except Exception:
-        count = 0
+        generation.store.delete_collection()
+    except Exception as e:
+        logger.warning("retrieval: could not drop collection %s: %s", generation.collection, e)
 
-    if count == 0:
-        documents = _load_docs_from_dir(dir_path)
-        if not documents:
-            return store
-        store.add_documents(documents)
-        set_bm25_docs(documents)
-        doc_hashes = current_doc_hashes(dir_path)
-        if doc_hashes:
-            save_manifest(doc_hashes, len(documents))
-    elif needs_rebuild(dir_path):
-        _n, docs = rebuild(store, dir_path, _load_docs_from_dir)
-        set_bm25_docs(docs)
 
-    return store
+def _generation_name() -> str:
+    """Collection name for a new generation; embeds its creation time (unix seconds)."""
+    return f"{COLLECTION_NAME}_{int(time.time())}_{uuid.uuid4().hex[:8]}"
 
 
-def set_bm25_docs(documents: list[Document]) -> None:
-    """Set the in-memory docs used for BM25 hybrid search (called after index build/rebuild)."""
-    global _bm25_retriever
-    if not documents:
-        _bm25_retriever = None
-        return
+def _is_orphan_generation(name: str, keep: str) -> bool:
+    """
+    True for a generation other than keep created over ORPHAN_GRACE_SECONDS ago. Names
+    without a creation time (the base collection, older generations) are never dropped.
+    """
+    if name == keep or not name.startswith(f"{COLLECTION_NAME}_"):
+        return False
     try:
-        _bm25_retriever = BM25Retriever.from_documents(documents)
-    except Exception:
-        _bm25_retriever = None
+        created = int(name.split("_")[-2])
+    except ValueError:
+        return False
+    return time.time() - created > ORPHAN_GRACE_SECONDS
+
+
+def _drop_orphan_generations(store: VectorStore, persist_path: Path, keep: str) -> None:
+    """
+    At startup, drop collections of generations left behind by crashed or replaced
+    processes. Recent ones are kept, as another replica may still be serving them.
+    """
+    try:
+        if get_settings().vector_backend.strip().lower() == "numpy":
+            root = persist_path / NUMPY_INDEX_DIRNAME
+            for path in root.iterdir() if root.is_dir() else []:
+                if path.is_dir() and _is_orphan_generation(path.name, keep):
+                    shutil.rmtree(path, ignore_errors=True)
+                    logger.info("retrieval: dropped orphaned index generation %s", path.name)
+        else:
+            client = store._client
+            for collection in client.list_collections():
+                name = getattr(collection, "name", collection)
+                if _is_orphan_generation(name, keep):
+                    client.delete_collection(name)
+                    logger.info("retrieval: dropped orphaned index generation %s", name)
+    except Exception as e:
+        logger.warning("retrieval: could not clean up old index generations: %s", e)
 
 
 def _pick_k(question: str) -> int:
@@ -201,43 +506,153 @@ def _rrf_merge(doc_lists: list[list[Document]], k: int = _RRF_K) -> list[Documen
     return [doc_by_content[c] for c in sorted_contents]
 
 
+def _normalize_question(question: str) -> str:
+    """Case- and whitespace-insensitive form of a question, used as the query vector key."""
+    return " ".join((question or "").lower().split())
+
+
+def _query_vector_key(normalized: str) -> str:
+    return f"{get_settings().openai_embedding_model}:{normalized}"
+
+
+def embed_query_cached(question: str, embeddings: Embeddings) -> list[float]:
+    """
+    Return the query vector for question, served from the process-wide (and optionally
+    Redis-backed) query-embedding cache. The cache is keyed by embedding model and
+    normalized question only, so it is shared by /ask, /ask/stream and /ask_docs
+    whatever k or metadata filter they use. The model embeds the question as asked
+    (stripped); only the key is normalized.
+    """
+    from app.cache import get_query_vector_cache
+
+    text = (question or "").strip()
+    cache = get_query_vector_cache()
+    if cache is None:
+        return embeddings.embed_query(text)
+    key = _query_vector_key(_normalize_question(text))
+    vector = cache.get(key)
+    if vector is not None:
+        QUERY_EMBEDDING_CACHE_HITS_TOTAL.inc()
+        return vector
+    QUERY_EMBEDDING_CACHE_MISSES_TOTAL.inc()
+    vector = embeddings.embed_query(text)
+    cache.set(key, vector)
+    return vector
+
+
+async def _aembed_query(embeddings: Embeddings, text: str) -> list[float]:
+    """
+    Embed on the event loop when the model has a native async client (OpenAIEmbeddings);
+    otherwise run embed_query in the retrieval executor, never in the default one that
+    Embeddings.aembed_query would use.
+    """
+    from langchain_core.embeddings import Embeddings
+
+    native = isinstance(embeddings, Embeddings) and (
+        type(embeddings).aembed_query is not Embeddings.aembed_query
+    )
+    if native:
+        return await embeddings.aembed_query(text)
+    return await run_blocking(RETRIEVAL_POOL, embeddings.embed_query, text)
+
+
+async def aembed_query_cached(question: str, embeddings: Embeddings) -> list[float]:
+    """Async embed_query_cached: same cache and keys, no thread held while waiting."""
+    from app.cache import get_query_vector_cache
+
+    text = (question or "").strip()
+    cache = get_query_vector_cache()
+    if cache is None:
+        return await _aembed_query(embeddings, text)
+    key = _query_vector_key(_normalize_question(text))
+    vector = await cache.aget(key)
+    if vector is not None:
+        QUERY_EMBEDDING_CACHE_HITS_TOTAL.inc()
+        return vector
+    QUERY_EMBEDDING_CACHE_MISSES_TOTAL.inc()
+    vector = await _aembed_query(embeddings, text)
+    await cache.aset(key, vector)
+    return vector
+
+
+def _vector_search(
+    store: VectorStore,
+    question: str,
+    k: int,
+    meta_filter: dict | None,
+    vector: list[float] | None = None,
+) -> list[Document]:
+    """
+    Vector search by the cached query embedding (no remote call for repeated questions).
+    A precomputed vector (async path) skips the embedding lookup.
+    """
+    if vector is None:
+        embeddings = getattr(store, "embeddings", None)
+        if embeddings is None:
+            return store.similarity_search(question.strip(), k=k, filter=meta_filter)
+        vector = embed_query_cached(question, embeddings)
+    return store.similarity_search_by_vector(vector, k=k, filter=meta_filter)
+
+
+def _hybrid_search(
+    store: VectorStore, question: str, top_k: int, vector: list[float] | None = None
+) -> list[Document]:
+    """Vector search merged with BM25 by reciprocal rank fusion when BM25 is available."""
+    fetch_k = min(2 * top_k, 20)
+    meta_filter = _source_filter(question)
+    bm25 = _bm25_for(store)
+    if bm25 is None:
+        return _vector_search(store, question, k=top_k, meta_filter=meta_filter, vector=vector)
+    chroma_docs = _vector_search(store, question, k=fetch_k, meta_filter=meta_filter, vector=vector)
+    bm25_docs = bm25.invoke(question.strip())[:fetch_k]
+    return _rrf_merge([chroma_docs, bm25_docs])[:top_k]
+
+
+def _rerank_enabled() -> bool:
+    s = get_settings()
+    return bool(s.rag_rerank_enabled and (s.cohere_api_key or "").strip())
+
+
+def _rerank(question: str, docs: list[Document], top_k: int) -> list[Document]:
+    """Cohere rerank of docs; on any rerank error the fused order is kept."""
+    try:
+        reranker = get_reranker(top_k, get_settings().ai_http_timeout)
+        return reranker.compress_documents(question.strip(), docs)
+    except Exception:
+        return docs
+
+
 def _retrieve_docs(
-    question: str, store: Chroma | None, k: int | None = None
+    question: str, store: VectorStore | None, k: int | None = None
 ) -> list[Document]:
     """
     Return top-k Document objects (with metadata). Uses hybrid search if BM25 is available.
     """
     if not store or not (question or "").strip():
         return []
-    s = get_settings()
     top_k = k if k is not None else _pick_k(question)
-    fetch_k = min(2 * top_k, 20)
-    meta_filter = _source_filter(question)
-
     try:
-        if _bm25_retriever is not None:
-            chroma_docs = store.similarity_search(
-                question.strip(), k=fetch_k, filter=meta_filter
-            )
-            bm25_docs = _bm25_retriever.invoke(question.strip())[:fetch_k]
-            merged = _rrf_merge([chroma_docs, bm25_docs])[:top_k]
-        else:
-            merged = store.similarity_search(
-                question.strip(), k=top_k, filter=meta_filter
-            )
+        merged = _hybrid_search(store, question, top_k)
+        if _rerank_enabled():
+            merged = _rerank(question, merged, top_k)
+        return merged[:top_k]
+    except Exception:
+        return []
 
-        if s.rag_rerank_enabled and (s.cohere_api_key or "").strip():
-            try:
-                from langchain_cohere import CohereRerank
 
-                reranker = CohereRerank(
-                    cohere_api_key=s.cohere_api_key_stripped or None,
-                    top_n=top_k,
-                    model="rerank-multilingual-v3.0",
-                )
-                merged = reranker.compress_documents(question.strip(), merged)
-            except Exception:
-                pass
+async def _aretrieve_docs(
+    question: str, store: VectorStore | None, k: int | None = None
+) -> list[Document]:
+    """Async _retrieve_docs: embed on the event loop, search/rerank in the retrieval executor."""
+    if not store or not (question or "").strip():
+        return []
+    top_k = k if k is not None else _pick_k(question)
+    try:
+        embeddings = getattr(store, "embeddings", None)
+        vector = await aembed_query_cached(question, embeddings) if embeddings else None
+        merged = await run_blocking(RETRIEVAL_POOL, _hybrid_search, store, question, top_k, vector)
+        if _rerank_enabled():
+            merged = await run_blocking(RETRIEVAL_POOL, _rerank, question, merged, top_k)
         return merged[:top_k]
     except Exception:
         return []
@@ -265,7 +680,7 @@ def _truncate_context(context: str, max_chars: int) -> str:
     return truncated + "\n..."
 
 
-def retrieve(question: str, store: Chroma | None, k: int | None = None) -> list[str]:
+def retrieve(question: str, store: VectorStore | None, k: int | None = None) -> list[str]:
     """
     Return top-k relevant text chunks from the store for the given question.
     Uses hybrid search (Chroma + BM25) when BM25 is available, optional rerank.
@@ -274,9 +689,7 @@ def retrieve(question: str, store: Chroma | None, k: int | None = None) -> list[
     return [d.page_content for d in docs]
 
 
-def get_retrieved_context(question: str, store: Chroma | None, k: int | None = None) -> str:
-    """Return a single string of retrieved chunks with citations for the LLM prompt."""
-    docs = _retrieve_docs(question, store, k=k)
+def _format_retrieved(docs: list[Document]) -> str:
     RAG_RETRIEVAL_TOTAL.inc()
     if not docs:
         return ""
@@ -287,7 +700,26 @@ def get_retrieved_context(question: str, store: Chroma | None, k: int | None = N
     return _truncate_context(context, get_settings().rag_max_context_chars)
 
 
-def get_retrieved_context_cached(question: str, store: Chroma | None, k: int | None = None) -> str:
+def get_retrieved_context(question: str, store: VectorStore | None, k: int | None = None) -> str:
+    """Return a single string of retrieved chunks with citations for the LLM prompt."""
+    return _format_retrieved(_retrieve_docs(question, store, k=k))
+
+
+async def aget_retrieved_context(
+    question: str, store: VectorStore | None, k: int | None = None
+) -> str:
+    """Async get_retrieved_context (see _aretrieve_docs)."""
+    return _format_retrieved(await _aretrieve_docs(question, store, k=k))
+
+
+def _cached_context(cached: str) -> str:
+    RAG_CACHE_HITS_TOTAL.inc()
+    if cached == "":
+        return ""
+    return _truncate_context(cached, get_settings().rag_max_context_chars)
+
+
+def get_retrieved_context_cached(question: str, store: VectorStore | None, k: int | None = None) -> str:
     """
     Like get_retrieved_context but with optional TTL cache (question -> formatted context string).
     When RAG_CACHE_TTL_SECONDS > 0 and REDIS_URL or in-memory cache is used, repeated
@@ -297,19 +729,43 @@ def get_retrieved_context_cached(question: str, store: Chroma | None, k: int | N
 
     settings = get_settings()
     top_k = k if k is not None else _pick_k(question)
-    key = _rag_cache_key(question, top_k)
+    key = _rag_cache_key(question, top_k, index_version_for(store))
 
     backend = get_rag_cache_backend()
     if backend is not None:
         cached = backend.get(key)
         if cached is not None:
-            RAG_CACHE_HITS_TOTAL.inc()
-            if cached == "":
-                return ""
-            return _truncate_context(cached, settings.rag_max_context_chars)
+            return _cached_context(cached)
         RAG_CACHE_MISSES_TOTAL.inc()
 
     context = get_retrieved_context(question, store, k=k)
     if backend is not None:
         backend.set(key, context, settings.rag_cache_ttl_seconds)
     return context
+
+
+async def aget_retrieved_context_cached(
+    question: str, store: VectorStore | None, k: int | None = None
+) -> str:
+    """
+    Async get_retrieved_context_cached, used by the endpoints: the RAG cache (async Redis)
+    and the query embedding are awaited on the event loop; only the vector/BM25 search and
+    rerank take a thread, from the dedicated retrieval executor.
+    """
+    from app.cache import _rag_cache_key, get_rag_cache_backend
+
+    settings = get_settings()
+    top_k = k if k is not None else _pick_k(question)
+    key = _rag_cache_key(question, top_k, index_version_for(store))
+
+    backend = get_rag_cache_backend()
+    if backend is not None:
+        cached = await backend.aget(key)
+        if cached is not None:
+            return _cached_context(cached)
+        RAG_CACHE_MISSES_TOTAL.inc()
+
+    context = await aget_retrieved_context(question, store, k=k)
+    if backend is not None:
+        await backend.aset(key, context, settings.rag_cache_ttl_seconds)
+    return context
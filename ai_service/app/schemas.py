@@ -41,6 +41,44 @@ class AskRequest(BaseModel):
     guestbook_entries: list[GuestbookEntryContext] = Field(default_factory=list)
 
 
+class WeddingContextUpsert(BaseModel):
+    """Full wedding context for PUT /weddings/{wedding_id}/context."""
+
+    wedding: WeddingContext
+    guests: list[GuestContext] = Field(default_factory=list)
+    tasks: list[TaskContext] = Field(default_factory=list)
+    guestbook_entries: list[GuestbookEntryContext] = Field(default_factory=list)
+
+
+class WeddingContextPatch(BaseModel):
+    """Delta for PATCH /weddings/{wedding_id}/context: upserts and deletes matched by id."""
+
+    expected_version: str | None = None
+    wedding: WeddingContext | None = None
+    upsert_guests: list[GuestContext] = Field(default_factory=list)
+    delete_guest_ids: list[int] = Field(default_factory=list)
+    upsert_tasks: list[TaskContext] = Field(default_factory=list)
+    delete_task_ids: list[int] = Field(default_factory=list)
+    upsert_guestbook_entries: list[GuestbookEntryContext] = Field(default_factory=list)
+    delete_guestbook_entry_ids: list[int] = Field(default_factory=list)
+
+
+class WeddingContextVersion(BaseModel):
+    wedding_id: int
+    version: str
+    guests: int
+    tasks: int
+    guestbook_entries: int
+
+
+class AskWeddingRequest(BaseModel):
+    """Ask about a stored wedding context: id plus the version the caller last wrote."""
+
+    question: str = Field(min_length=1, max_length=4000)
+    wedding_id: int
+    version: str
+
+
 class AskResponse(BaseModel):
     answer: str
     model: str
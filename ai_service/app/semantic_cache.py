@@ -0,0 +1,122 @@
+"""
+Semantic response cache: find a cached answer for a paraphrase of an earlier question.
+
+Per scope (the context hash for /ask, the index version for /ask_docs) a small matrix of
+normalized question embeddings maps to the exact response-cache keys they were answered
+under. A lookup is one matrix-vector product; when the best cosine similarity reaches the
+threshold the caller reads that key from the response cache, so TTLs and invalidation stay
+those of the exact cache. Question vectors come from embed_query_cached, which retrieval
+needs anyway, so a lookup costs no extra embedding call.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from prometheus_client import Counter, Histogram
+
+from app.config import get_settings, settings_version
+
+SEMANTIC_CACHE_HITS_TOTAL = Counter(
+    "semantic_cache_hits_total", "Semantic response cache hits", ["route"]
+)
+SEMANTIC_CACHE_NEAR_MISSES_TOTAL = Counter(
+    "semantic_cache_near_misses_total",
+    "Semantic lookups whose best similarity fell just below the threshold",
+    ["route"],
+)
+SEMANTIC_CACHE_SIMILARITY = Histogram(
+    "semantic_cache_best_similarity",
+    "Best cosine similarity per semantic cache lookup (for tuning the threshold)",
+    ["route"],
+    buckets=(0.5, 0.7, 0.8, 0.85, 0.9, 0.925, 0.95, 0.975, 0.99, 1.0),
+)
+
+NEAR_MISS_MARGIN = 0.05
+
+
+@dataclass
+class _Scope:
+    matrix: np.ndarray
+    keys: list[str]
+
+
+class SemanticCache:
+    """LRU over scopes; each scope keeps its newest max_per_scope question vectors."""
+
+    def __init__(self, max_per_scope: int = 256, max_scopes: int = 1000):
+        self._max_per_scope = max(1, max_per_scope)
+        self._max_scopes = max(1, max_scopes)
+        self._scopes: OrderedDict[str, _Scope] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector: list[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else v
+
+    def lookup(
+        self, scope: str, vector: list[float], threshold: float, route: str = "ask"
+    ) -> tuple[str | None, float]:
+        """Return (response cache key, similarity) of the closest question if >= threshold."""
+        with self._lock:
+            entry = self._scopes.get(scope)
+            if entry is not None:
+                self._scopes.move_to_end(scope)
+        if entry is None or not entry.keys:
+            return None, 0.0
+        query = self._normalize(vector)
+        if query.shape[0] != entry.matrix.shape[1]:
+            return None, 0.0
+        scores = entry.matrix @ query
+        best = int(np.argmax(scores))
+        similarity = float(scores[best])
+        SEMANTIC_CACHE_SIMILARITY.labels(route=route).observe(similarity)
+        if similarity >= threshold:
+            SEMANTIC_CACHE_HITS_TOTAL.labels(route=route).inc()
+            return entry.keys[best], similarity
+        if similarity >= threshold - NEAR_MISS_MARGIN:
+            SEMANTIC_CACHE_NEAR_MISSES_TOTAL.labels(route=route).inc()
+        return None, similarity
+
+    def resize(self, max_per_scope: int) -> None:
+        """Change the per-scope capacity; larger scopes are trimmed on their next add."""
+        self._max_per_scope = max(1, max_per_scope)
+
+    def add(self, scope: str, vector: list[float], key: str) -> None:
+        """Remember that the question with this vector was answered under key."""
+        row = self._normalize(vector)[None, :]
+        with self._lock:
+            entry = self._scopes.get(scope)
+            if entry is None or entry.matrix.shape[1] != row.shape[1]:
+                entry = _Scope(row, [key])
+            elif key in entry.keys:
+                return
+            else:
+                entry = _Scope(
+                    np.vstack([entry.matrix, row])[-self._max_per_scope :],
+                    (entry.keys + [key])[-self._max_per_scope :],
+                )
+            self._scopes[scope] = entry
+            self._scopes.move_to_end(scope)
+            while len(self._scopes) > self._max_scopes:
+                self._scopes.popitem(last=False)
+
+
+_semantic_cache: SemanticCache | None = None
+_semantic_cache_lock = threading.Lock()
+_semantic_cache_settings_version = settings_version()
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Process-wide semantic cache (callers check SEMANTIC_CACHE_THRESHOLD > 0 first)."""
+    global _semantic_cache, _semantic_cache_settings_version
+    with _semantic_cache_lock:
+        if _semantic_cache is None:
+            _semantic_cache = SemanticCache(get_settings().semantic_cache_max_per_scope)
+        elif _semantic_cache_settings_version != settings_version():
+            _semantic_cache.resize(get_settings().semantic_cache_max_per_scope)
+        _semantic_cache_settings_version = settings_version()
+        return _semantic_cache
@@ -0,0 +1,117 @@
+"""
+Deterministic aggregates over the request context (guest/task/guestbook counts).
+
+For count questions about the roster ("how many guests", "total plus-ones", "number of pending
+tasks") a compact fact table computed here replaces the LLM summary: exact numbers, no
+summarization call, and far fewer prompt tokens for the Q&A step. Other count-shaped
+questions ("total budget", "how many hours") keep the summary, with the table in front.
+"""
+
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from app.schemas import AskRequest
+
+MAX_NAMES_PER_GROUP = 25
+
+_COUNT_QUESTION = re.compile(
+    r"\b(how many|number of|count|counts|total|totals|headcount|tally)\b",
+    re.IGNORECASE,
+)
+# The fact table only replaces the summary when the count is about something it covers; it
+# lacks guestbook messages, contact details and per-row fields other questions need.
+_ROSTER_ENTITY = re.compile(
+    r"\b(guests?|plus[- ]?ones?|rsvps?|tasks?|entries|entry|guestbook|dietary|headcount)\b",
+    re.IGNORECASE,
+)
+
+
+def is_count_question(question: str) -> bool:
+    """True when the question asks for a count or total of anything."""
+    return bool(_COUNT_QUESTION.search(question))
+
+
+def is_aggregate_question(question: str) -> bool:
+    """True for a count of guests, plus-ones, RSVPs, tasks, entries or dietary groups."""
+    return is_count_question(question) and bool(_ROSTER_ENTITY.search(question))
+
+
+@dataclass
+class WeddingAggregates:
+    guest_count: int = 0
+    plus_one_total: int = 0
+    guests_with_plus_ones: int = 0
+    dietary_groups: dict[str, list[str]] = field(default_factory=dict)
+    task_count: int = 0
+    tasks_by_status: dict[str, list[str]] = field(default_factory=dict)
+    task_priority_counts: Counter = field(default_factory=Counter)
+    guestbook_count: int = 0
+    guestbook_public: int = 0
+
+    @property
+    def headcount(self) -> int:
+        return self.guest_count + self.plus_one_total
+
+
+def compute_aggregates(payload: AskRequest) -> WeddingAggregates:
+    """Compute every aggregate in one pass over each list (no per-question rescans)."""
+    agg = WeddingAggregates()
+
+    dietary: defaultdict[str, list[str]] = defaultdict(list)
+    for guest in payload.guests:
+        agg.guest_count += 1
+        agg.plus_one_total += guest.plus_one_count
+        if guest.plus_one_count > 0:
+            agg.guests_with_plus_ones += 1
+        note = (guest.dietary_notes or "").strip().lower()
+        if note:
+            dietary[note].append(guest.name)
+    agg.dietary_groups = dict(dietary)
+
+    by_status: defaultdict[str, list[str]] = defaultdict(list)
+    for task in payload.tasks:
+        agg.task_count += 1
+        by_status[task.status or "pending"].append(task.title)
+        agg.task_priority_counts[task.priority or "medium"] += 1
+    agg.tasks_by_status = dict(by_status)
+
+    for entry in payload.guestbook_entries:
+        agg.guestbook_count += 1
+        agg.guestbook_public += entry.is_public
+
+    return agg
+
+
+def _names(names: list[str]) -> str:
+    shown = ", ".join(names[:MAX_NAMES_PER_GROUP])
+    if len(names) > MAX_NAMES_PER_GROUP:
+        shown += f", … and {len(names) - MAX_NAMES_PER_GROUP} more"
+    return shown
+
+
+def format_fact_table(payload: AskRequest, agg: WeddingAggregates) -> str:
+    """Render the aggregates as a compact markdown fact table for the Q&A prompt."""
+    wedding = payload.wedding
+    lines = [
+        f"Wedding: {wedding.name} | date={wedding.date or 'unknown'} | venue={wedding.venue_name or 'unknown'}",
+        "Exact counts computed from the full guest, task and guestbook lists:",
+        "",
+        "| Fact | Value |",
+        "| --- | --- |",
+        f"| Guests (invited records) | {agg.guest_count} |",
+        f"| Plus-ones | {agg.plus_one_total} (from {agg.guests_with_plus_ones} guests) |",
+        f"| Total headcount (guests + plus-ones) | {agg.headcount} |",
+    ]
+    for note, names in sorted(agg.dietary_groups.items(), key=lambda kv: (-len(kv[1]), kv[0])):
+        lines.append(f"| Dietary: {note} | {len(names)} ({_names(names)}) |")
+    lines.append(f"| Tasks | {agg.task_count} |")
+    for status, titles in sorted(agg.tasks_by_status.items()):
+        lines.append(f"| Tasks {status} | {len(titles)} ({_names(titles)}) |")
+    for priority, count in sorted(agg.task_priority_counts.items()):
+        lines.append(f"| Tasks with {priority} priority | {count} |")
+    lines.append(
+        f"| Guestbook entries | {agg.guestbook_count} "
+        f"({agg.guestbook_public} public, {agg.guestbook_count - agg.guestbook_public} private) |"
+    )
+    return "\n".join(lines)
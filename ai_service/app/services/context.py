@@ -1,45 +1,184 @@
 """Build markdown context from AskRequest for the AI."""
 
-from app.schemas import AskRequest
+import hashlib
+from dataclasses import dataclass
 
+from app.schemas import AskRequest, GuestbookEntryContext, GuestContext, TaskContext
 
-def build_context_markdown(payload: AskRequest) -> str:
-    """Convert wedding/guests/tasks/guestbook payload into markdown for summarization."""
+CONTEXT_BLOCK_SIZE = 50
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text); no tokenizer needed."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+@dataclass(frozen=True)
+class ContextBlock:
+    """
+    One independently summarized piece of the context: the wedding header, or a run of up to
+    block_size guests/tasks/guestbook entries. summarize=False blocks are used verbatim.
+    """
+
+    markdown: str
+    summarize: bool = True
+
+    @property
+    def hash(self) -> str:
+        return hashlib.sha256(self.markdown.encode()).hexdigest()[:32]
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.markdown)
+
+
+def _guest_line(guest: GuestContext) -> str:
+    return (
+        f"- {guest.name} | email={guest.email or '-'} | phone={guest.phone or '-'} | "
+        f"plus_ones={guest.plus_one_count} | dietary={guest.dietary_notes or '-'}"
+    )
+
+
+def _task_line(task: TaskContext) -> str:
+    return (
+        f"- {task.title} | status={task.status or 'pending'} | priority={task.priority or 'medium'}"
+    )
+
+
+def _guestbook_line(entry: GuestbookEntryContext) -> str:
+    visibility = "public" if entry.is_public else "private"
+    return f"- {entry.guest_name} ({visibility}): {entry.message}"
+
+
+def _header_lines(payload: AskRequest, note: str = "") -> list[str]:
     wedding = payload.wedding
     lines = [
         f"Wedding: {wedding.name}",
         f"Date: {wedding.date or 'unknown'}",
         f"Venue: {wedding.venue_name or 'unknown'}",
-        "",
-        "Guests:",
     ]
+    if note:
+        lines.append(note)
+    return lines
 
-    if payload.guests:
-        for guest in payload.guests:
-            lines.append(
-                f"- {guest.name} | email={guest.email or '-'} | phone={guest.phone or '-'} | "
-                f"plus_ones={guest.plus_one_count} | dietary={guest.dietary_notes or '-'}"
-            )
-    else:
-        lines.append("- No guest records provided.")
-
-    lines.append("")
-    lines.append("Tasks:")
-    if payload.tasks:
-        for task in payload.tasks:
-            lines.append(
-                f"- {task.title} | status={task.status or 'pending'} | priority={task.priority or 'medium'}"
-            )
-    else:
-        lines.append("- No tasks provided.")
-
-    lines.append("")
-    lines.append("Guestbook:")
-    if payload.guestbook_entries:
-        for entry in payload.guestbook_entries:
-            visibility = "public" if entry.is_public else "private"
-            lines.append(f"- {entry.guest_name} ({visibility}): {entry.message}")
+
+def _row_key(item: GuestContext | TaskContext | GuestbookEntryContext) -> str:
+    """Identity of a row that survives edits to its other fields (id when the backend sends one)."""
+    if item.id is not None:
+        return f"{type(item).__name__}:{item.id}"
+    if isinstance(item, GuestContext):
+        return f"guest:{item.name}|{item.email or ''}"
+    if isinstance(item, TaskContext):
+        return f"task:{item.title}"
+    return f"entry:{item.guest_name}|{item.message}"
+
+
+def _sections(
+    payload: AskRequest, sliced: bool = False
+) -> list[tuple[str, list[str], list[str], str]]:
+    """(title, item lines, row keys, placeholder when empty) for each list section, in order."""
+    if sliced:
+        none = "- None relevant to the question (see totals above)."
+        placeholders = (none, none, none)
     else:
-        lines.append("- No guestbook entries provided.")
+        placeholders = (
+            "- No guest records provided.",
+            "- No tasks provided.",
+            "- No guestbook entries provided.",
+        )
+    return [
+        (
+            "Guests",
+            [_guest_line(g) for g in payload.guests],
+            [_row_key(g) for g in payload.guests],
+            placeholders[0],
+        ),
+        (
+            "Tasks",
+            [_task_line(t) for t in payload.tasks],
+            [_row_key(t) for t in payload.tasks],
+            placeholders[1],
+        ),
+        (
+            "Guestbook",
+            [_guestbook_line(e) for e in payload.guestbook_entries],
+            [_row_key(e) for e in payload.guestbook_entries],
+            placeholders[2],
+        ),
+    ]
 
+
+def build_context_markdown(payload: AskRequest, note: str = "") -> str:
+    """
+    Convert wedding/guests/tasks/guestbook payload into markdown for summarization.
+    note (e.g. totals for a sliced payload, see services.slicing) goes under the header.
+    """
+    lines = _header_lines(payload, note)
+    for title, items, _keys, placeholder in _sections(payload, sliced=bool(note)):
+        lines.append("")
+        lines.append(f"{title}:")
+        lines.extend(items or [placeholder])
     return "\n".join(lines)
+
+
+def _ends_block(key: str, period: int) -> bool:
+    """Content-defined boundary: about one row in period may end a block, chosen by its key."""
+    digest = hashlib.sha256(key.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % period == 0
+
+
+def _split_runs(
+    items: list[str], keys: list[str], block_size: int, max_tokens: int
+) -> list[tuple[int, int]]:
+    """
+    (start, end) item ranges. Once a block has block_size // 2 rows, it ends after a row whose
+    key hashes to a boundary (about block_size rows per block on average), so inserting or
+    deleting a row only changes its own block instead of shifting every later one. Blocks
+    are also cut at 2 * block_size rows and at max_tokens estimated tokens (0 = unbounded);
+    those cuts only depend on rows since the previous boundary, so they stay local too.
+    """
+    min_rows = block_size // 2
+    period = max(1, block_size - min_rows)
+    ranges: list[tuple[int, int]] = []
+    start, tokens = 0, 0
+    for i, line in enumerate(items):
+        line_tokens = estimate_tokens(line) + 1
+        too_long = i - start >= 2 * block_size
+        too_big = max_tokens > 0 and tokens + line_tokens > max_tokens
+        if i > start and (too_long or too_big):
+            ranges.append((start, i))
+            start, tokens = i, 0
+        tokens += line_tokens
+        if i + 1 - start >= min_rows and _ends_block(keys[i], period):
+            ranges.append((start, i + 1))
+            start, tokens = i + 1, 0
+    if start < len(items):
+        ranges.append((start, len(items)))
+    return ranges
+
+
+def build_context_blocks(
+    payload: AskRequest,
+    block_size: int = CONTEXT_BLOCK_SIZE,
+    max_tokens: int = 0,
+    note: str = "",
+) -> list[ContextBlock]:
+    """
+    Split the context into blocks that are hashed and summarized independently, so editing,
+    adding or removing one guest only changes the block containing it. The header and empty
+    sections are kept verbatim; each list section is cut into content-defined runs of about
+    block_size items (and at most max_tokens estimated tokens when > 0).
+    """
+    block_size = max(1, block_size)
+    blocks = [ContextBlock("\n".join(_header_lines(payload, note)), summarize=False)]
+    for title, items, keys, placeholder in _sections(payload, sliced=bool(note)):
+        if not items:
+            blocks.append(ContextBlock(f"{title}:\n{placeholder}", summarize=False))
+            continue
+        ranges = _split_runs(items, keys, block_size, max_tokens)
+        # No positions or totals in the label: they would change every block on an insert.
+        label = title if len(ranges) == 1 else f"{title} (part of the list)"
+        for start, end in ranges:
+            blocks.append(ContextBlock("\n".join([f"{label}:", *items[start:end]])))
+    return blocks
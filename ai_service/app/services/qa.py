@@ -1,10 +1,16 @@
-"""Q&A answer generation using PydanticAI agent."""
+"""Q&A answer generation using PydanticAI agent (pydantic_ai is imported on first use)."""
 
-from pydantic_ai import Agent
-from pydantic_ai.messages import PartDeltaEvent, TextPartDelta
+from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
+from app.clients import get_qa_model
+from app.config import get_settings, settings_version
 from app.services.summarization import normalize_llm_content
 
+if TYPE_CHECKING:
+    from pydantic_ai import Agent
+
 SYSTEM_PROMPT = """
 You are an operations copilot for a wedding coordination dashboard.
 Use the provided planning context and relevant documentation to answer clearly and concretely.
@@ -31,23 +37,29 @@ Answer the question using the wedding context and documentation above. Cite sour
 
 
 def create_qa_agent(model: str = "gpt-5-nano") -> Agent:
-    """Create a PydanticAI agent for Q&A. Model can be overridden for tests."""
+    """Create a PydanticAI agent for Q&A on the pooled HTTP client. Model can be overridden for tests."""
+    from pydantic_ai import Agent
+
     return Agent(
-        model=f"openai:{model}",
+        model=get_qa_model(model, get_settings().ai_http_timeout),
         system_prompt=SYSTEM_PROMPT,
     )
 
 
-# Default agent instance (used by route handlers; tests can patch or inject)
-_default_agent: Agent | None = None
+# Agents per model (used by route handlers; tests can patch or inject)
+_agents: dict[str, Agent] = {}
+_agents_settings_version = settings_version()
 
 
 def get_qa_agent(model: str = "gpt-5-nano") -> Agent:
-    """Return the default Q&A agent, creating it if needed."""
-    global _default_agent
-    if _default_agent is None:
-        _default_agent = create_qa_agent(model=model)
-    return _default_agent
+    """Return the Q&A agent for model, creating it if needed (again after a settings reload)."""
+    global _agents_settings_version
+    if _agents_settings_version != settings_version():
+        _agents.clear()
+        _agents_settings_version = settings_version()
+    if model not in _agents:
+        _agents[model] = create_qa_agent(model=model)
+    return _agents[model]
 
 
 def _build_prompt(question: str, context_summary: str, retrieved_context: str) -> str:
@@ -95,6 +107,8 @@ async def stream_answer(
     Async generator that yields text deltas from the Q&A agent.
     Yields dicts {"type": "delta", "content": "..."} for SSE.
     """
+    from pydantic_ai.messages import PartDeltaEvent, TextPartDelta
+
     prompt = _build_prompt(question, context_summary, retrieved_context)
     qa = agent if agent is not None else get_qa_agent(model=model or "gpt-5-nano")
     async for event in qa.run_stream_events(prompt):
@@ -0,0 +1,196 @@
+"""
+Question-relevant slicing of the request context.
+
+An inverted index over guest names/emails/dietary notes, task titles and guestbook authors,
+plus field-aware filters (dietary, plus-ones, task status and priority), selects the rows a
+targeted question is about before the context is rendered. Totals for the full lists are
+always kept in a note under the header, so counts stay exact while prompt size stays
+bounded as weddings grow.
+"""
+
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+
+from app.schemas import AskRequest
+from app.services.aggregates import WeddingAggregates, compute_aggregates
+
+MAX_ROWS_PER_SECTION = 100
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "the and for are was who what which when where how does did has have with about from "
+    "that this they their them our you your any all can will should would could is at of "
+    "to in on a an be do me my we us it its or not".split()
+)
+
+_SECTION_WORDS = {
+    "guests": frozenset(
+        {"guest", "guests", "invitee", "invitees", "rsvp", "attendee", "attendees"}
+    ),
+    "tasks": frozenset({"task", "tasks", "todo", "todos", "checklist"}),
+    "guestbook": frozenset({"guestbook", "message", "messages", "wishes", "note", "notes"}),
+}
+_DIETARY_WORDS = frozenset(
+    {"dietary", "diet", "diets", "allergy", "allergies", "food", "meal", "meals"}
+)
+_PLUS_ONE = re.compile(r"plus[- ]?ones?", re.IGNORECASE)
+_STATUS_WORDS = {
+    "pending": "pending",
+    "todo": "pending",
+    "outstanding": "pending",
+    "open": "pending",
+    "completed": "completed",
+    "complete": "completed",
+    "done": "completed",
+    "finished": "completed",
+    "progress": "in_progress",
+}
+_PRIORITY_WORDS = {"high": "high", "urgent": "high", "medium": "medium", "low": "low"}
+
+
+def _terms(text: str | None) -> set[str]:
+    return {t for t in _TOKEN.findall((text or "").lower()) if len(t) > 2 and t not in _STOPWORDS}
+
+
+@dataclass
+class ContextSlice:
+    """
+    The payload to render (possibly reduced), the totals note for the header, and the
+    aggregates over the full lists when the caller already had them.
+    """
+
+    payload: AskRequest
+    note: str = ""
+    aggregates: WeddingAggregates | None = None
+
+    @property
+    def sliced(self) -> bool:
+        return bool(self.note)
+
+
+class WeddingIndex:
+    """Inverted index term -> row positions for each section of one request's wedding data."""
+
+    def __init__(self, payload: AskRequest):
+        self.payload = payload
+        self.terms: dict[str, defaultdict[str, set[int]]] = {
+            "guests": defaultdict(set),
+            "tasks": defaultdict(set),
+            "guestbook": defaultdict(set),
+        }
+        for i, guest in enumerate(payload.guests):
+            email_user = (guest.email or "").split("@")[0]
+            for term in _terms(guest.name) | _terms(email_user) | _terms(guest.dietary_notes):
+                self.terms["guests"][term].add(i)
+        for i, task in enumerate(payload.tasks):
+            for term in _terms(task.title):
+                self.terms["tasks"][term].add(i)
+        for i, entry in enumerate(payload.guestbook_entries):
+            for term in _terms(entry.guest_name):
+                self.terms["guestbook"][term].add(i)
+
+    def select(self, question: str) -> dict[str, list[int] | None]:
+        """
+        Row positions per section relevant to the question. None keeps the whole section
+        (it is named but no row matched); an empty list drops it. All None when nothing in
+        the question is specific, so untargeted questions see the full context.
+        """
+        words = _terms(question)
+        rows: dict[str, set[int]] = {
+            section: set().union(*(index.get(w, set()) for w in words))
+            for section, index in self.terms.items()
+        }
+
+        payload = self.payload
+        if words & _DIETARY_WORDS:
+            rows["guests"] |= {i for i, g in enumerate(payload.guests) if g.dietary_notes}
+        if _PLUS_ONE.search(question):
+            rows["guests"] |= {i for i, g in enumerate(payload.guests) if g.plus_one_count > 0}
+        statuses = {_STATUS_WORDS[w] for w in words if w in _STATUS_WORDS}
+        priorities = {_PRIORITY_WORDS[w] for w in words if w in _PRIORITY_WORDS}
+        if statuses or priorities:
+            rows["tasks"] |= {
+                i
+                for i, t in enumerate(payload.tasks)
+                if (not statuses or (t.status or "pending") in statuses)
+                and (not priorities or (t.priority or "medium") in priorities)
+            }
+
+        named = {section for section, vocab in _SECTION_WORDS.items() if words & vocab}
+        if not named and not any(rows.values()):
+            return dict.fromkeys(rows)
+        return {
+            section: sorted(found) if found else (None if section in named else [])
+            for section, found in rows.items()
+        }
+
+
+_SECTION_LABELS = {"guests": "guests", "tasks": "tasks", "guestbook": "guestbook entries"}
+
+
+def _shown(section: str, count: int, whole: bool, matched: int) -> str:
+    label = _SECTION_LABELS[section]
+    if whole:
+        return f"all {count} {label}"
+    if matched > count:
+        return f"the first {count} of {matched} matching {label} (list truncated)"
+    return f"{count} {label}"
+
+
+def _totals_note(agg: WeddingAggregates, shown: dict[str, str]) -> str:
+    statuses = ", ".join(f"{len(t)} {s}" for s, t in sorted(agg.tasks_by_status.items()))
+    return (
+        f"Totals (full lists): {agg.guest_count} guests, {agg.plus_one_total} plus-ones "
+        f"(headcount {agg.headcount}); {agg.task_count} tasks"
+        + (f" ({statuses})" if statuses else "")
+        + f"; {agg.guestbook_count} guestbook entries. "
+        f"Listed below are only the rows relevant to the question: {shown['guests']}, "
+        f"{shown['tasks']}, {shown['guestbook']}."
+    )
+
+
+def slice_context(
+    payload: AskRequest,
+    question: str,
+    min_rows: int = 50,
+    max_rows: int = MAX_ROWS_PER_SECTION,
+    index: WeddingIndex | None = None,
+    aggregates: WeddingAggregates | None = None,
+) -> ContextSlice:
+    """
+    Keep only rows relevant to the question when the wedding has more than min_rows rows in
+    total. Rows picked by term match are capped at max_rows per section (the note says when a
+    list was truncated); sections the question names without matching rows are kept whole.
+    Small weddings and untargeted questions are returned unchanged. index and aggregates,
+    when given, must have been built from payload; they are reused instead of rebuilt.
+    """
+    lists = {
+        "guests": payload.guests,
+        "tasks": payload.tasks,
+        "guestbook": payload.guestbook_entries,
+    }
+    if sum(len(items) for items in lists.values()) <= min_rows:
+        return ContextSlice(payload, aggregates=aggregates)
+    selection = (index or WeddingIndex(payload)).select(question)
+    if all(rows is None for rows in selection.values()):
+        return ContextSlice(payload, aggregates=aggregates)
+
+    kept = {}
+    shown = {}
+    for section, items in lists.items():
+        rows = selection[section]
+        if rows is None:
+            kept[section] = list(items)
+        else:
+            kept[section] = [items[i] for i in rows[:max_rows]]
+        shown[section] = _shown(section, len(kept[section]), rows is None, len(rows or []))
+    sliced = payload.model_copy(
+        update={
+            "guests": kept["guests"],
+            "tasks": kept["tasks"],
+            "guestbook_entries": kept["guestbook"],
+        }
+    )
+    aggregates = aggregates or compute_aggregates(payload)
+    return ContextSlice(sliced, _totals_note(aggregates, shown), aggregates)
@@ -1,14 +1,53 @@
 """Context summarization for downstream Q&A using LangChain."""
 
-from typing import Any
+from __future__ import annotations
 
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
+import asyncio
+import functools
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from prometheus_client import Counter
+
+from app.cache import get_summary_cache_backend, summary_cache_key
+from app.clients import get_chat_model
+from app.config import get_settings
+from app.services.context import ContextBlock
+from app.singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from langchain_core.prompts import ChatPromptTemplate
 
 SYSTEM_PROMPT_SUMMARY = (
     "You summarize wedding planning context for downstream Q&A. Keep facts, remove fluff."
 )
 HUMAN_TEMPLATE = "Summarize the context below in bullet points grouped by schedule, guests, and tasks.\n\n{context}"
+REDUCE_HUMAN_TEMPLATE = (
+    "The summaries below each cover one part of the same wedding. Merge them into one summary "
+    "in bullet points grouped by schedule, guests, and tasks. Keep every name, count and date; "
+    "add up totals that span parts.\n\n{context}"
+)
+
+
+@functools.cache
+def _prompt(human_template: str) -> ChatPromptTemplate:
+    """Chat prompt for a human template, built on first use (langchain_core loads lazily)."""
+    from langchain_core.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", SYSTEM_PROMPT_SUMMARY),
+            ("human", human_template),
+        ]
+    )
+
+
+SUMMARY_CACHE_HITS_TOTAL = Counter("summary_cache_hits_total", "Context summary cache hits")
+SUMMARY_CACHE_MISSES_TOTAL = Counter("summary_cache_misses_total", "Context summary cache misses")
+
+_summary_flight = SingleFlight("summary")
 
 
 def normalize_llm_content(content: Any) -> str:
@@ -35,16 +74,131 @@ def summarize_context(
 ) -> str:
     """
     Summarize wedding context markdown into bullet points for the Q&A agent.
-    Uses LangChain ChatOpenAI; model and timeout can be overridden for tests.
+    Uses a pooled LangChain ChatOpenAI per (model, timeout); both can be overridden for tests.
     """
-    summary_prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", SYSTEM_PROMPT_SUMMARY),
-            ("human", HUMAN_TEMPLATE),
-        ]
-    )
-    llm = ChatOpenAI(model=model, temperature=0, timeout=timeout)
-    chain = summary_prompt | llm
+    chain = _prompt(HUMAN_TEMPLATE) | get_chat_model(model, timeout)
     result = chain.invoke({"context": context_markdown})
     summary = normalize_llm_content(getattr(result, "content", result))
     return summary.strip()
+
+
+def reduce_summaries(
+    partial_summaries: list[str],
+    model: str = "gpt-5-nano",
+    timeout: float = 45.0,
+) -> str:
+    """Merge partial summaries of one wedding (map-reduce's reduce step) with one LLM call."""
+    chain = _prompt(REDUCE_HUMAN_TEMPLATE) | get_chat_model(model, timeout)
+    result = chain.invoke({"context": "\n\n---\n\n".join(partial_summaries)})
+    return normalize_llm_content(getattr(result, "content", result)).strip()
+
+
+async def asummarize_context(
+    context_markdown: str,
+    model: str = "gpt-5-nano",
+    timeout: float = 45.0,
+) -> str:
+    """summarize_context on the pooled async HTTP client (no worker thread per call)."""
+    chain = _prompt(HUMAN_TEMPLATE) | get_chat_model(model, timeout)
+    result = await chain.ainvoke({"context": context_markdown})
+    return normalize_llm_content(getattr(result, "content", result)).strip()
+
+
+async def areduce_summaries(
+    partial_summaries: list[str],
+    model: str = "gpt-5-nano",
+    timeout: float = 45.0,
+) -> str:
+    """Async reduce_summaries."""
+    chain = _prompt(REDUCE_HUMAN_TEMPLATE) | get_chat_model(model, timeout)
+    result = await chain.ainvoke({"context": "\n\n---\n\n".join(partial_summaries)})
+    return normalize_llm_content(getattr(result, "content", result)).strip()
+
+
+@dataclass
+class SummaryResult:
+    """A context summary plus how it was produced (for Server-Timing and logs)."""
+
+    summary: str
+    shards: int = 0
+    map_ms: float = 0.0
+    reduce_ms: float = 0.0
+    aggregates: bool = False
+
+
+async def _cached_summary(key: str, compute: Callable[[], Awaitable[str]]) -> str:
+    """Return the cached summary for key, or run compute() once (single-flight) and cache it."""
+    backend = await get_summary_cache_backend()
+    if backend is not None:
+        cached = await backend.get(key)
+        if cached is not None:
+            SUMMARY_CACHE_HITS_TOTAL.inc()
+            return cached
+        SUMMARY_CACHE_MISSES_TOTAL.inc()
+
+    async def run() -> str:
+        summary = await compute()
+        if backend is not None and summary:
+            await backend.set(key, summary, get_settings().summary_cache_ttl_seconds)
+        return summary
+
+    return await _summary_flight.do(key, run)
+
+
+async def summarize_context_cached(
+    context_markdown: str,
+    context_hash: str,
+    model: str = "gpt-5-nano",
+    timeout: float = 45.0,
+) -> str:
+    """
+    Summarize context with a cache keyed only by context hash and model, so every question
+    about an unchanged wedding reuses one summary. Concurrent misses for the same key share
+    a single in-flight summarization.
+    """
+    return await _cached_summary(
+        summary_cache_key(context_hash, model),
+        lambda: asummarize_context(context_markdown, model, timeout),
+    )
+
+
+async def summarize_blocks_cached(
+    blocks: list[ContextBlock],
+    context_hash: str,
+    model: str = "gpt-5-nano",
+    timeout: float = 45.0,
+    *,
+    reduce_above_tokens: int = 0,
+    max_concurrency: int = 4,
+) -> SummaryResult:
+    """
+    Summarize context block by block and merge the partial summaries in block order.
+    The merged summary is cached under the full context hash; on a miss each block is looked
+    up under its own hash, so only blocks whose content changed are sent to the model, at most
+    max_concurrency at a time. Partial summaries are concatenated, or, when the context is
+    larger than reduce_above_tokens (> 0), merged by an LLM reduce step (map-reduce).
+    """
+    result = SummaryResult(summary="")
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def map_block(block: ContextBlock) -> str:
+        if not block.summarize:
+            return block.markdown
+        async with semaphore:
+            return await summarize_context_cached(block.markdown, block.hash, model, timeout)
+
+    async def merge() -> str:
+        t_map = time.perf_counter()
+        result.shards = sum(1 for block in blocks if block.summarize)
+        parts = [p for p in await asyncio.gather(*(map_block(b) for b in blocks)) if p]
+        result.map_ms = (time.perf_counter() - t_map) * 1000
+        total_tokens = sum(block.tokens for block in blocks)
+        if reduce_above_tokens <= 0 or total_tokens <= reduce_above_tokens or len(parts) < 2:
+            return "\n\n".join(parts)
+        t_reduce = time.perf_counter()
+        merged = await areduce_summaries(parts, model, timeout)
+        result.reduce_ms = (time.perf_counter() - t_reduce) * 1000
+        return merged
+
+    result.summary = await _cached_summary(summary_cache_key(context_hash, model), merge)
+    return result
@@ -0,0 +1,54 @@
+"""
+Single-flight: concurrent async calls with the same key share one in-flight computation.
+"""
+
+import asyncio
+import functools
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from prometheus_client import Counter
+
+T = TypeVar("T")
+
+SINGLEFLIGHT_CALLS_TOTAL = Counter(
+    "singleflight_calls_total",
+    "Single-flight calls by outcome (leader ran the work, follower shared it)",
+    ["name", "role"],
+)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls per key. The first caller (leader) starts fn() as a task;
+    callers arriving while it runs (followers) await the same task. The task is shielded,
+    so a cancelled caller does not cancel the work the others are waiting for.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict[str, asyncio.Future[Any]] = {}
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def busy(self, key: str) -> bool:
+        """True if a call for key is in flight (a do() now would join it as a follower)."""
+        return key in self._inflight
+
+    def _done(self, key: str, task: asyncio.Future[Any]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved: callers that were cancelled never will
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            SINGLEFLIGHT_CALLS_TOTAL.labels(name=self.name, role="leader").inc()
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._done, key))
+        else:
+            SINGLEFLIGHT_CALLS_TOTAL.labels(name=self.name, role="follower").inc()
+        return await asyncio.shield(task)
@@ -0,0 +1,221 @@
+"""
+Startup warmup and readiness.
+
+LangChain, Chroma, the OpenAI/Cohere SDKs and pydantic_ai are imported on first use, so a
+worker boots and answers /health in well under a second. run_warmup then brings the replica
+to steady state in stages, each recorded with its status and timing for /ready:
+
+- imports: the heavy modules (WARMUP_IMPORTS)
+- index: open the Chroma/numpy collection, building or syncing it if needed
+- bm25: the BM25 index of the active generation (optional; vector search works without it)
+- clients: pooled chat, embedding, Q&A (and rerank) clients
+- prefill: WARMUP_PREFILL_QUESTIONS through retrieval, filling the query-embedding and RAG caches
+
+The replica is ready once every stage has finished and the required ones (index, clients)
+succeeded. Failed stages are retried with backoff, so a fixed key or docs dir (e.g. after
+POST /admin/reload-settings) makes the replica ready without a restart.
+"""
+
+import asyncio
+import importlib
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from prometheus_client import Gauge
+
+from app.config import Settings, get_settings
+from app.executors import INDEX_POOL, run_blocking
+
+logger = logging.getLogger(__name__)
+
+WARMUP_STAGE_SECONDS = Gauge(
+    "warmup_stage_seconds", "Duration of the last run of each warmup stage", ["stage"]
+)
+SERVICE_READY = Gauge("ai_service_ready", "1 once warmup has finished and /ready returns 200")
+
+HEAVY_MODULES = (
+    "httpx",
+    "langchain_core.documents",
+    "langchain_core.prompts",
+    "langchain_text_splitters",
+    "langchain_community.retrievers",
+    "langchain_openai",
+    "pydantic_ai",
+)
+
+
+def heavy_modules(settings: Settings | None = None) -> list[str]:
+    """Modules the request path will need with these settings (Chroma and Cohere only if used)."""
+    settings = settings or get_settings()
+    modules = list(HEAVY_MODULES)
+    prebuilt = bool(settings.rag_prebuilt_index_dir.strip())
+    if settings.vector_backend.strip().lower() != "numpy" and not prebuilt:
+        modules.append("langchain_chroma")
+    if settings.rag_rerank_enabled and settings.cohere_api_key_stripped:
+        modules.append("langchain_cohere")
+    return modules
+
+
+def warm_imports(modules: list[str] | tuple[str, ...] = HEAVY_MODULES) -> dict[str, float]:
+    """Import modules (blocking); returns seconds per module. Failures are logged and skipped."""
+    timings: dict[str, float] = {}
+    for name in modules:
+        t0 = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning("warmup: could not import %s: %s", name, e)
+            continue
+        timings[name] = round(time.perf_counter() - t0, 4)
+    logger.info("warmup imports done", extra={"import_seconds": timings})
+    return timings
+
+
+class StageSkipped(Exception):
+    """A warmup stage that does not apply with the current settings."""
+
+
+@dataclass
+class StageStatus:
+    status: str = "pending"  # pending, running, ok, skipped or failed
+    seconds: float | None = None
+    detail: str = ""
+
+
+STAGES = ("imports", "index", "bm25", "clients", "prefill")
+REQUIRED_STAGES = frozenset({"index", "clients"})
+
+
+class WarmupState:
+    """Per-stage progress of run_warmup, reported by /ready."""
+
+    def __init__(self) -> None:
+        self.stages = {name: StageStatus() for name in STAGES}
+
+    @property
+    def ready(self) -> bool:
+        finished = all(s.status not in ("pending", "running") for s in self.stages.values())
+        return finished and all(self.stages[name].status == "ok" for name in REQUIRED_STAGES)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"ready": self.ready, "stages": {n: asdict(s) for n, s in self.stages.items()}}
+
+
+async def _imports_stage(settings: Settings) -> str:
+    if not settings.warmup_imports:
+        raise StageSkipped("WARMUP_IMPORTS is off")
+    timings = await run_blocking(INDEX_POOL, warm_imports, heavy_modules(settings))
+    return f"{len(timings)} modules"
+
+
+async def _index_stage(settings: Settings) -> str:
+    from app.index_manager import current_index_version
+    from app.retrieval import get_or_build_store
+
+    if not settings.openai_api_key_stripped:
+        raise RuntimeError("OPENAI_API_KEY is not set")
+    store = await run_blocking(INDEX_POOL, get_or_build_store, Path(settings.docs_dir))
+    if store is None:
+        raise RuntimeError("vector store unavailable")
+    return f"index_version {current_index_version()}"
+
+
+async def _bm25_stage(settings: Settings) -> str:
+    from app.retrieval import _bm25_for, active_store
+
+    bm25 = _bm25_for(active_store())
+    if bm25 is None:
+        raise StageSkipped("no BM25 index; vector search only")
+    return f"{len(bm25.docs)} chunks"
+
+
+async def _clients_stage(settings: Settings) -> str:
+    from app.clients import get_chat_model, get_openai_embeddings, get_reranker
+    from app.retrieval import _pick_k, _rerank_enabled
+    from app.services.qa import get_qa_agent
+
+    if not settings.openai_api_key_stripped:
+        raise RuntimeError("OPENAI_API_KEY is not set")
+    summarization_model = settings.openai_summarization_model or settings.openai_model
+    qa_model = settings.openai_qa_model or settings.openai_model
+
+    def build() -> list[str]:
+        get_chat_model(summarization_model, settings.ai_http_timeout)
+        get_openai_embeddings(settings.openai_embedding_model, settings.ai_http_timeout)
+        get_qa_agent(qa_model)
+        built = ["chat", "embeddings", "qa"]
+        if _rerank_enabled():
+            get_reranker(_pick_k(""), settings.ai_http_timeout)
+            built.append("rerank")
+        return built
+
+    return ", ".join(await run_blocking(INDEX_POOL, build))
+
+
+async def _prefill_stage(settings: Settings) -> str:
+    from app.retrieval import active_store, aget_retrieved_context_cached
+
+    questions = [q for q in settings.warmup_prefill_questions if q.strip()]
+    if not questions:
+        raise StageSkipped("WARMUP_PREFILL_QUESTIONS is empty")
+    store = active_store()
+    if store is None:
+        raise StageSkipped("no index")
+    for question in questions:
+        await aget_retrieved_context_cached(question, store)
+    return f"{len(questions)} questions"
+
+
+Stage = Callable[[Settings], Awaitable[str]]
+
+DEFAULT_STAGES: tuple[tuple[str, Stage], ...] = (
+    ("imports", _imports_stage),
+    ("index", _index_stage),
+    ("bm25", _bm25_stage),
+    ("clients", _clients_stage),
+    ("prefill", _prefill_stage),
+)
+
+
+async def _run_stage(state: WarmupState, name: str, stage: Stage) -> None:
+    status = state.stages[name]
+    status.status, status.detail = "running", ""
+    t0 = time.perf_counter()
+    try:
+        status.detail = await stage(get_settings()) or ""
+        status.status = "ok"
+    except StageSkipped as e:
+        status.status, status.detail = "skipped", str(e)
+    except Exception as e:
+        status.status, status.detail = "failed", f"{type(e).__name__}: {e}"
+        logger.warning("warmup stage %s failed: %s", name, e)
+    status.seconds = round(time.perf_counter() - t0, 3)
+    WARMUP_STAGE_SECONDS.labels(stage=name).set(status.seconds)
+
+
+async def run_warmup(
+    state: WarmupState,
+    stages: tuple[tuple[str, Stage], ...] = DEFAULT_STAGES,
+    retry_seconds: float = 5.0,
+    max_retry_seconds: float = 60.0,
+) -> None:
+    """
+    Run the stages in order, then re-run every stage that is not ok (a failed index also
+    leaves bm25/prefill skipped) with exponential backoff until the replica is ready.
+    """
+    SERVICE_READY.set(0)
+    for name, stage in stages:
+        await _run_stage(state, name, stage)
+    delay = retry_seconds
+    while not state.ready:
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_retry_seconds)
+        for name, stage in stages:
+            if state.stages[name].status != "ok":
+                await _run_stage(state, name, stage)
+    SERVICE_READY.set(1)
+    logger.info("warmup done", extra={"warmup": state.as_dict()["stages"]})
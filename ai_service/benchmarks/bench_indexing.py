@@ -0,0 +1,131 @@
+"""
+Benchmark a full index rebuild: sequential embedding versus batched, concurrent embedding.
+
+Uses a simulated embeddings API (no OpenAI calls): each request costs a fixed round trip
+plus a per-text cost, requests of up to 1000 texts are sent one after another (as
+OpenAIEmbeddings does), and more than --api-concurrency requests in flight get a 429.
+Docs are synthetic Markdown files; vectors go to a temporary numpy index.
+
+Usage (from ai_service/):
+    python benchmarks/bench_indexing.py [--files 200] [--batch-size 128] [--concurrency 8]
+"""
+
+import argparse
+import logging
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+WORDS = "guest task seating dashboard wedding plan venue budget vendor menu rsvp".split()
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+
+class _SimulatedApi:
+    """Embeddings with a per-request latency and a server-side concurrency limit."""
+
+    def __init__(self, round_trip: float, per_text: float, max_in_flight: int):
+        self.round_trip = round_trip
+        self.per_text = per_text
+        self.max_in_flight = max_in_flight
+        self.requests = 0
+        self.rejected = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _request(self, texts: list[str]) -> list[list[float]]:
+        with self._lock:
+            self.requests += 1
+            if self._in_flight >= self.max_in_flight:
+                self.rejected += 1
+                raise _RateLimited("too many concurrent requests")
+            self._in_flight += 1
+        try:
+            time.sleep(self.round_trip + self.per_text * len(texts))
+            return [[float(len(t)), float(sum(map(ord, t[:32])) % 97), 1.0] for t in texts]
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors: list[list[float]] = []
+        for i in range(0, len(texts), 1000):
+            vectors.extend(self._request(texts[i : i + 1000]))
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._request([text])[0]
+
+
+def _write_docs(docs_dir: Path, files: int) -> None:
+    rng = random.Random(0)
+    for n in range(files):
+        sections = [
+            f"## Section {s}\n\n"
+            + "\n\n".join(" ".join(rng.choices(WORDS, k=60)) for _ in range(4))
+            for s in range(8)
+        ]
+        (docs_dir / f"page{n:04d}.md").write_text(f"# Page {n}\n\n" + "\n\n".join(sections))
+
+
+def _rebuild(docs_dir: Path, index_dir: Path, embeddings) -> tuple[int, float]:
+    from app.index_manager import sync_collection
+    from app.numpy_store import NumpyVectorStore
+    from app.retrieval import _iter_docs_from_dir
+
+    store = NumpyVectorStore("bench", embeddings, persist_directory=index_dir)
+    t0 = time.perf_counter()
+    result = sync_collection(store, docs_dir, _iter_docs_from_dir, incremental=False)
+    return len(result.documents), time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--round-trip-ms", type=float, default=300.0)
+    parser.add_argument("--per-text-ms", type=float, default=2.0)
+    parser.add_argument("--api-concurrency", type=int, default=8)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    from app import batched_embeddings, retrieval
+    from app.batched_embeddings import BatchedEmbeddings
+
+    settings = MagicMock(rag_chunk_size=1000, rag_chunk_overlap=150, rag_chunk_workers=4)
+    retrieval.get_settings = lambda: settings
+    batched_embeddings.BACKOFF_SECONDS = 0.1
+
+    def api() -> _SimulatedApi:
+        return _SimulatedApi(
+            args.round_trip_ms / 1000, args.per_text_ms / 1000, args.api_concurrency
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs_dir = Path(tmp) / "docs"
+        docs_dir.mkdir()
+        _write_docs(docs_dir, args.files)
+        sequential = api()
+        chunks, sequential_s = _rebuild(docs_dir, Path(tmp) / "seq", sequential)
+        batched = api()
+        embeddings = BatchedEmbeddings(batched, args.batch_size, args.concurrency)
+        _chunks, batched_s = _rebuild(docs_dir, Path(tmp) / "batched", embeddings)
+
+    print(f"{args.files} files, {chunks} chunks")
+    print("mode | seconds | requests | rate_limited")
+    print(f"sequential | {sequential_s:.2f} | {sequential.requests} | {sequential.rejected}")
+    print(f"batched | {batched_s:.2f} | {batched.requests} | {batched.rejected}")
+    print(f"speedup: {sequential_s / batched_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark the numpy vector index against Chroma: build time, query latency and RSS.
+
+Uses random unit vectors (no OpenAI calls). Each backend runs in its own subprocess so
+resident memory is measured in isolation.
+
+Usage (from ai_service/):
+    python benchmarks/bench_vector_backends.py [--chunks 500] [--dim 1536] [--queries 500]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+SOURCES = ["guests.md", "tasks.md", "dashboard.md", "guestbook.md", "ai-qa.md", "README.md"]
+
+
+def _rss_mb() -> float:
+    """Current resident set size in MiB (Linux /proc; falls back to peak RSS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _RandomEmbeddings:
+    """Deterministic random unit vectors per text."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def _vec(self, text: str) -> list[float]:
+        import numpy as np
+
+        rng = np.random.default_rng(abs(hash(text)) % 2**32)
+        v = rng.standard_normal(self.dim).astype(np.float32)
+        return (v / np.linalg.norm(v)).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._vec(text)
+
+
+def _run_backend(backend: str, chunks: int, dim: int, queries: int) -> dict:
+    from langchain_core.documents import Document
+
+    embed = _RandomEmbeddings(dim)
+    docs = [
+        Document(page_content=f"chunk {i}", metadata={"source": SOURCES[i % len(SOURCES)]})
+        for i in range(chunks)
+    ]
+    vectors = embed.embed_documents([d.page_content for d in docs])
+    query_vectors = [embed.embed_query(f"query {i}") for i in range(queries)]
+    rss_before = _rss_mb()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        if backend == "numpy":
+            from app.numpy_store import NumpyVectorStore
+
+            store = NumpyVectorStore("bench", embed, persist_directory=tmp)
+        else:
+            from langchain_chroma import Chroma
+
+            store = Chroma(collection_name="bench", embedding_function=embed, persist_directory=tmp)
+        store._collection.upsert(
+            ids=[str(i) for i in range(chunks)],
+            embeddings=vectors,
+            documents=[d.page_content for d in docs],
+            metadatas=[d.metadata for d in docs],
+        )
+        build_s = time.perf_counter() - t0
+
+        def timed(filter_: dict | None) -> list[float]:
+            out = []
+            for q in query_vectors:
+                t = time.perf_counter()
+                store.similarity_search_by_vector(q, k=5, filter=filter_)
+                out.append((time.perf_counter() - t) * 1000)
+            return out
+
+        timed(None)  # warm up
+        plain = timed(None)
+        filtered = timed({"source": "guests.md"})
+        rss_after = _rss_mb()
+
+    def pct(values: list[float], p: float) -> float:
+        return round(statistics.quantiles(values, n=100)[int(p) - 1], 3)
+
+    return {
+        "backend": backend,
+        "build_s": round(build_s, 3),
+        "p50_ms": pct(plain, 50),
+        "p95_ms": pct(plain, 95),
+        "filtered_p50_ms": pct(filtered, 50),
+        "filtered_p95_ms": pct(filtered, 95),
+        "rss_delta_mb": round(rss_after - rss_before, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--backend", choices=["numpy", "chroma"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(_run_backend(args.backend, args.chunks, args.dim, args.queries)))
+        return
+
+    rows = []
+    for backend in ("numpy", "chroma"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--backend", backend]
+            + [
+                "--chunks",
+                str(args.chunks),
+                "--dim",
+                str(args.dim),
+                "--queries",
+                str(args.queries),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        rows.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    headers = list(rows[0].keys())
+    print(" | ".join(headers))
+    for row in rows:
+        print(" | ".join(str(row[h]) for h in headers))
+
+
+if __name__ == "__main__":
+    main()
@@ -21,9 +21,26 @@ def mock_settings():
     settings.docs_dir = "./docs"
     settings.rag_top_k = 5
     settings.chroma_persist_dir = "./data/chroma"
+    settings.rag_prebuilt_index_dir = ""
     settings.cache_ttl_seconds = 0
+    settings.cache_soft_ttl_seconds = 0
+    settings.cache_early_refresh_beta = 1.0
+    settings.semantic_cache_threshold = 0.0
     settings.redis_url_stripped = ""
     settings.rag_cache_ttl_seconds = 0
+    settings.summary_cache_ttl_seconds = 0
+    settings.summary_block_size = 50
+    settings.summary_shard_max_tokens = 2000
+    settings.summary_map_reduce_min_tokens = 8000
+    settings.summary_max_concurrency = 4
+    settings.aggregate_fast_path = True
+    settings.context_slicing = True
+    settings.context_slice_min_rows = 50
+    settings.context_slice_max_rows = 100
+    settings.ask_singleflight = True
+    settings.ask_redis_lock = False
+    settings.ask_redis_lock_ttl_seconds = 60
+    settings.admin_token = ""
     return settings
 
 
@@ -33,7 +50,11 @@ def client(mock_settings, fake_rag_store):
     with (
         patch("app.main.get_settings", return_value=mock_settings),
         patch("app.config.get_settings", return_value=mock_settings),
-        patch("app.main.summarize_context", return_value="Summary."),
+        patch(
+            "app.services.summarization.asummarize_context",
+            new_callable=AsyncMock,
+            return_value="Summary.",
+        ),
         patch("app.main.generate_answer", new_callable=AsyncMock, return_value="Mocked answer."),
     ):
         app.dependency_overrides[get_rag_store_dep] = lambda: fake_rag_store
@@ -58,14 +79,17 @@ def client_no_api_key():
 
 @pytest.fixture
 def fake_rag_store():
-    """Fake store that returns fixed chunks for similarity_search."""
+    """Fake store that returns fixed chunks for similarity_search(_by_vector)."""
     store = MagicMock()
     from langchain_core.documents import Document
 
-    store.similarity_search.return_value = [
+    chunks = [
         Document(page_content="Doc chunk one.", metadata={}),
         Document(page_content="Doc chunk two.", metadata={}),
     ]
+    store.embeddings.embed_query.return_value = [0.1, 0.2, 0.3]
+    store.similarity_search.return_value = chunks
+    store.similarity_search_by_vector.return_value = chunks
     return store
 
 
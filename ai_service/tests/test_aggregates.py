@@ -0,0 +1,86 @@
+"""Tests for the aggregate fact table fast path."""
+
+from app.schemas import (
+    AskRequest,
+    GuestbookEntryContext,
+    GuestContext,
+    TaskContext,
+    WeddingContext,
+)
+from app.services.aggregates import (
+    compute_aggregates,
+    format_fact_table,
+    is_aggregate_question,
+    is_count_question,
+)
+
+
+def _payload() -> AskRequest:
+    return AskRequest(
+        question="How many guests?",
+        wedding=WeddingContext(id=1, name="Test", date="2025-06-01", venue_name="Hall"),
+        guests=[
+            GuestContext(name="Alice", plus_one_count=1, dietary_notes="Vegetarian"),
+            GuestContext(name="Bob", plus_one_count=2, dietary_notes=" vegetarian "),
+            GuestContext(name="Cara", dietary_notes="Nut allergy"),
+            GuestContext(name="Dan"),
+        ],
+        tasks=[
+            TaskContext(title="Book caterer", status="pending", priority="high"),
+            TaskContext(title="Send invites", status="completed", priority="high"),
+            TaskContext(title="Order cake"),
+        ],
+        guestbook_entries=[
+            GuestbookEntryContext(guest_name="Alice", message="Congrats!"),
+            GuestbookEntryContext(guest_name="Bob", message="Hi", is_public=False),
+        ],
+    )
+
+
+def test_compute_aggregates_counts_groups_and_totals():
+    """Counts, plus-one totals, dietary groups and task breakdowns are exact."""
+    agg = compute_aggregates(_payload())
+    assert agg.guest_count == 4
+    assert agg.plus_one_total == 3
+    assert agg.guests_with_plus_ones == 2
+    assert agg.headcount == 7
+    assert agg.dietary_groups == {"vegetarian": ["Alice", "Bob"], "nut allergy": ["Cara"]}
+    assert agg.tasks_by_status == {
+        "pending": ["Book caterer", "Order cake"],
+        "completed": ["Send invites"],
+    }
+    assert agg.task_priority_counts == {"high": 2, "medium": 1}
+    assert (agg.guestbook_count, agg.guestbook_public) == (2, 1)
+
+
+def test_format_fact_table_lists_facts():
+    """The fact table carries the numbers the Q&A step needs."""
+    table = format_fact_table(_payload(), compute_aggregates(_payload()))
+    assert "| Total headcount (guests + plus-ones) | 7 |" in table
+    assert "| Tasks pending | 2 (Book caterer, Order cake) |" in table
+    assert "| Dietary: vegetarian | 2 (Alice, Bob) |" in table
+
+
+def test_is_aggregate_question():
+    """Count/total questions take the fast path; questions needing row details do not."""
+    assert is_aggregate_question("How many guests are coming?")
+    assert is_aggregate_question("Number of pending tasks?")
+    assert is_aggregate_question("total plus-ones?")
+    assert not is_aggregate_question("Write a toast for the couple")
+    assert not is_aggregate_question("Which tasks are high priority?")
+    assert not is_aggregate_question("Which guests bring plus-ones?")
+    assert not is_aggregate_question("What's the status of the florist?")
+    assert not is_aggregate_question("Any vegan guests?")
+
+
+def test_count_questions_without_roster_entity_are_not_aggregate():
+    """Counts of things the fact table does not cover keep the full summary."""
+    for question in (
+        "What is the total budget for flowers?",
+        "Can we count on the DJ to arrive early?",
+        "How many hours does the reception last?",
+    ):
+        assert is_count_question(question)
+        assert not is_aggregate_question(question)
+    assert is_aggregate_question("How many RSVPs came back?")
+    assert is_aggregate_question("Total guestbook entries?")
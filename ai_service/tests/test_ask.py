@@ -1,5 +1,14 @@
 """Tests for POST /ask."""
 
+import asyncio
+import json
+from unittest.mock import patch
+
+import httpx
+
+from app import cache, main
+from app.cache import MemoryResponseCacheBackend
+from app.main import app
 from tests.conftest import minimal_ask_payload
 
 
@@ -15,6 +24,15 @@ def test_ask_returns_answer_and_model(client):
     assert "total" in response.headers["Server-Timing"]
 
 
+def test_ask_server_timing_reports_summary_shards_and_phases(client):
+    """The summarize_rag entry describes shard count and map/reduce timings."""
+    payload = {**minimal_ask_payload(), "question": "Suggest a seating plan"}
+    response = client.post("/ask", json=payload)
+    timing = response.headers["Server-Timing"]
+    assert "summarize_rag, dur=" in timing
+    assert 'desc="shards=' in timing and "map=" in timing and "reduce=" in timing
+
+
 def test_ask_blank_question_returns_422(client):
     """POST /ask with blank question returns 422."""
     payload = {**minimal_ask_payload(), "question": "   "}
@@ -40,3 +58,79 @@ def test_ask_no_api_key_returns_503(client_no_api_key):
     response = client_no_api_key.post("/ask", json=minimal_ask_payload())
     assert response.status_code == 503
     assert "OPENAI_API_KEY" in response.json().get("detail", "")
+
+
+def test_ask_aggregate_question_uses_fact_table(client):
+    """Count questions skip summarization and pass the fact table as context."""
+    payload = {
+        **minimal_ask_payload(),
+        "guests": [{"name": "Alice", "plus_one_count": 1}, {"name": "Bob"}],
+    }
+    with patch("app.services.summarization.asummarize_context") as summarize:
+        response = client.post("/ask", json=payload)
+    assert response.status_code == 200
+    summarize.assert_not_called()
+    assert "| Total headcount (guests + plus-ones) | 3 |" in response.json()["context_summary"]
+    assert 'desc="aggregates"' in response.headers["Server-Timing"]
+
+
+def test_non_roster_count_question_keeps_summary_with_fact_table_in_front(client):
+    """A count question not about the roster is summarized, with the fact table first."""
+    payload = {**minimal_ask_payload(), "question": "What is the total budget for flowers?"}
+    response = client.post("/ask", json=payload)
+    assert response.status_code == 200
+    summary = response.json()["context_summary"]
+    assert summary.startswith("Wedding: ") and "| Total headcount" in summary
+    assert summary.index("| Total headcount") < summary.index("Guests:")  # summary follows
+    assert 'desc="aggregates"' not in response.headers["Server-Timing"]
+
+
+def test_identical_concurrent_asks_share_one_computation(client):
+    """Concurrent identical /ask calls run summarization, retrieval and QA once."""
+    calls = 0
+
+    async def slow_answer(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "Shared answer."
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            payload = {**minimal_ask_payload(), "question": "Suggest a seating plan"}
+            return await asyncio.gather(*(ac.post("/ask", json=payload) for _ in range(3)))
+
+    with patch("app.main.generate_answer", side_effect=slow_answer):
+        responses = asyncio.run(run())
+    assert calls == 1
+    assert [r.json()["answer"] for r in responses] == ["Shared answer."] * 3
+    assert sum("coalesced" in r.headers["Server-Timing"] for r in responses) == 2
+
+
+def test_soft_stale_cache_hit_is_served_and_revalidated(client, mock_settings, monkeypatch):
+    """A soft-stale entry is returned immediately while one background task recomputes it."""
+    mock_settings.cache_ttl_seconds = 60
+    mock_settings.cache_soft_ttl_seconds = 30
+    monkeypatch.setattr("app.cache.get_settings", lambda: mock_settings)
+    backend = MemoryResponseCacheBackend(ttl_seconds=60)
+    monkeypatch.setattr(cache, "_response_backend", backend)
+    payload = {**minimal_ask_payload(), "question": "Suggest a seating plan"}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            first = await ac.post("/ask", json=payload)
+            (key,) = list(backend._cache.keys())
+            old = {**first.json(), "answer": "Old answer."}
+            stale = json.dumps({"response": old, "soft_expires_at": 0, "delta": 1.0})
+            await backend.set(key, stale, 60)
+            second = await ac.post("/ask", json=payload)
+            await asyncio.gather(*main._background_tasks)
+            third = await ac.post("/ask", json=payload)
+            return second, third
+
+    second, third = asyncio.run(run())
+    assert second.json()["answer"] == "Old answer."
+    assert 'desc="stale"' in second.headers["Server-Timing"]
+    assert third.json()["answer"] == "Mocked answer."
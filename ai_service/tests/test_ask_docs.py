@@ -1,5 +1,14 @@
 """Tests for POST /ask_docs."""
 
+import asyncio
+import json
+
+import httpx
+
+from app import cache, main
+from app.cache import MemoryResponseCacheBackend
+from app.main import app
+
 
 def test_ask_docs_returns_answer_and_model(client):
     """POST /ask_docs with valid question returns 200 with answer and model."""
@@ -25,3 +34,32 @@ def test_ask_docs_no_api_key_returns_503(client_no_api_key):
         "/ask_docs", json={"question": "What does the dashboard show?"}
     )
     assert response.status_code == 503
+
+
+def test_ask_docs_soft_stale_hit_is_served_and_revalidated(client, mock_settings, monkeypatch):
+    """Like /ask: a soft-stale entry is served while a background task recomputes it."""
+    mock_settings.cache_ttl_seconds = 60
+    mock_settings.cache_soft_ttl_seconds = 30
+    monkeypatch.setattr("app.cache.get_settings", lambda: mock_settings)
+    backend = MemoryResponseCacheBackend(ttl_seconds=60)
+    monkeypatch.setattr(cache, "_response_backend", backend)
+    payload = {"question": "What does the dashboard show?"}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            first = await ac.post("/ask_docs", json=payload)
+            (key,) = list(backend._cache.keys())
+            assert json.loads(backend._cache[key])["soft_expires_at"] is not None
+            old = {**first.json(), "answer": "Old answer."}
+            stale = json.dumps({"response": old, "soft_expires_at": 0, "delta": 1.0})
+            await backend.set(key, stale, 60)
+            second = await ac.post("/ask_docs", json=payload)
+            await asyncio.gather(*main._background_tasks)
+            third = await ac.post("/ask_docs", json=payload)
+            return second, third
+
+    second, third = asyncio.run(run())
+    assert second.json()["answer"] == "Old answer."
+    assert 'desc="stale"' in second.headers["Server-Timing"]
+    assert third.json()["answer"] == "Mocked answer."
@@ -0,0 +1,126 @@
+"""Tests for batched, rate-aware document embedding and parallel chunking."""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app import batched_embeddings
+from app.batched_embeddings import AdaptiveLimit, BatchedEmbeddings
+
+
+class _RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("rate limited")
+        self.response = MagicMock(headers={"retry-after": retry_after} if retry_after else {})
+
+
+class _SlowEmbeddings:
+    """Records batch sizes and the peak number of concurrent calls."""
+
+    def __init__(self, failures=()):
+        self.batches = []
+        self.in_flight = 0
+        self.peak = 0
+        self.failures = list(failures)
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.batches.append(len(texts))
+            if self.failures:
+                raise self.failures.pop(0)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.01)
+        with self._lock:
+            self.in_flight -= 1
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(batched_embeddings.time, "sleep", calls.append)
+    return calls
+
+
+def test_batches_run_concurrently_and_keep_order():
+    underlying = _SlowEmbeddings()
+    texts = ["x" * i for i in range(1, 11)]
+
+    vectors = BatchedEmbeddings(underlying, batch_size=3, max_concurrency=2).embed_documents(texts)
+
+    assert vectors == [[float(i)] for i in range(1, 11)]
+    assert sorted(underlying.batches) == [1, 3, 3, 3]
+    assert underlying.peak == 2
+
+
+def test_rate_limit_retries_batch_and_halves_concurrency(sleeps):
+    underlying = _SlowEmbeddings(failures=[_RateLimitError(), _RateLimitError(retry_after="7")])
+    embeddings = BatchedEmbeddings(underlying, batch_size=10, max_concurrency=4)
+    before = batched_embeddings.EMBEDDING_RATE_LIMITED_TOTAL._value.get()
+
+    assert embeddings.embed_documents(["a", "bb"]) == [[1.0], [2.0]]
+
+    assert underlying.batches == [2, 2, 2]
+    assert embeddings._limit.limit == 2  # 4 -> 2 -> 1, then +1 after the success
+    assert 1.0 <= sleeps[0] <= 1.5 and sleeps[1] == 7.0  # backoff, then Retry-After
+    assert batched_embeddings.EMBEDDING_RATE_LIMITED_TOTAL._value.get() == before + 2
+
+
+def test_rate_limit_gives_up_after_retries(sleeps):
+    failures = [_RateLimitError() for _ in range(batched_embeddings.RATE_LIMIT_RETRIES + 1)]
+    embeddings = BatchedEmbeddings(_SlowEmbeddings(failures=failures), batch_size=10)
+
+    with pytest.raises(_RateLimitError):
+        embeddings.embed_documents(["a"])
+    assert len(sleeps) == batched_embeddings.RATE_LIMIT_RETRIES
+    assert sleeps[-1] <= batched_embeddings.MAX_BACKOFF_SECONDS * 1.5
+
+
+def test_other_errors_are_not_retried(sleeps):
+    underlying = _SlowEmbeddings(failures=[ValueError("bad input")])
+
+    with pytest.raises(ValueError):
+        BatchedEmbeddings(underlying).embed_documents(["a"])
+    assert underlying.batches == [1] and sleeps == []
+
+
+def test_adaptive_limit_recovers_after_successes():
+    limit = AdaptiveLimit(4)
+    limit.acquire()
+    limit.release(rate_limited=True)
+    assert limit.limit == 2
+    for _ in range(2):
+        limit.acquire()
+        limit.release()
+    assert limit.limit == 3
+    for _ in range(10):
+        limit.acquire()
+        limit.release()
+    assert limit.limit == 4
+
+
+def test_parallel_chunking_matches_serial_order(tmp_path, monkeypatch):
+    from app import retrieval
+
+    for i in range(12):
+        (tmp_path / f"page{i:02d}.md").write_text(f"# Page {i}\n\nIntro.\n\n## Steps\n\nStep {i}.")
+    s = MagicMock(rag_chunk_size=512, rag_chunk_overlap=50, rag_chunk_workers=1)
+    monkeypatch.setattr("app.retrieval.get_settings", lambda: s)
+    serial = retrieval._load_docs_from_dir(tmp_path)
+    s.rag_chunk_workers = 4
+    parallel = retrieval._load_docs_from_dir(tmp_path)
+
+    assert [(d.metadata, d.page_content) for d in parallel] == [
+        (d.metadata, d.page_content) for d in serial
+    ]
+    assert [d.metadata["source"] for d in parallel][:2] == ["page00.md", "page00.md"]
+    assert retrieval._splitter(512, 50) is retrieval._splitter(512, 50)
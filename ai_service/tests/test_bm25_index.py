@@ -0,0 +1,48 @@
+"""Tests for the persisted BM25 index."""
+
+from langchain_core.documents import Document
+
+from app.bm25_index import build_bm25_retriever, load_bm25_retriever, save_bm25_index
+
+
+def _docs():
+    return [
+        Document(
+            id="a",
+            page_content="add a guest from the guests page",
+            metadata={"source": "guests.md"},
+        ),
+        Document(id="b", page_content="mark a task as done", metadata={"source": "tasks.md"}),
+        Document(
+            id="c", page_content="the dashboard shows totals", metadata={"source": "dashboard.md"}
+        ),
+    ]
+
+
+def test_bm25_round_trip_preserves_ranking(tmp_path):
+    """A loaded BM25 index ranks exactly like the freshly built one."""
+    built = build_bm25_retriever(_docs())
+    path = tmp_path / "bm25_index.json"
+    save_bm25_index(built, "v1", path=path)
+    loaded = load_bm25_retriever("v1", path=path)
+    assert loaded is not None
+    query = "how do I add a guest"
+    assert [d.id for d in loaded.invoke(query)] == [d.id for d in built.invoke(query)]
+    assert loaded.docs[0].metadata == {"source": "guests.md"}
+
+
+def test_bm25_load_rejects_other_index_version(tmp_path):
+    """A BM25 file built for another index_version is ignored."""
+    path = tmp_path / "bm25_index.json"
+    save_bm25_index(build_bm25_retriever(_docs()), "v1", path=path)
+    assert load_bm25_retriever("v2", path=path) is None
+
+
+def test_bm25_load_missing_returns_none(tmp_path):
+    """No persisted file means no retriever."""
+    assert load_bm25_retriever("v1", path=tmp_path / "missing.json") is None
+
+
+def test_build_bm25_retriever_empty_returns_none():
+    """Nothing to index yields None (pure vector search)."""
+    assert build_bm25_retriever([]) is None
@@ -0,0 +1,162 @@
+"""Tests for the offline index build and serving from the prebuilt artifact."""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from app import build_index as build_index_module
+from app.build_index import build_index, main
+
+
+class _KeywordEmbeddings:
+    """Tiny deterministic embeddings: one axis per known keyword."""
+
+    WORDS = ["guest", "task", "seating"]
+
+    def _vec(self, text):
+        low = text.lower()
+        return [1.0 if w in low else 0.0 for w in self.WORDS] + [0.01]
+
+    def embed_documents(self, texts):
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vec(text)
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    from app import retrieval
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "guests.md").write_text("# Guests\n\nAdd a guest from the guests page.")
+    (docs / "tasks.md").write_text("# Tasks\n\nTrack each task on the board.")
+    s = MagicMock()
+    s.openai_api_key_stripped = "sk-fake"
+    s.openai_embedding_model = "text-embedding-3-small"
+    s.chroma_persist_dir = str(tmp_path / "data")
+    s.rag_prebuilt_index_dir = ""
+    s.docs_dir = str(docs)
+    s.vector_backend = "chroma"
+    s.rag_chunk_size = 512
+    s.rag_chunk_overlap = 50
+    s.rag_chunk_workers = 4
+    for module in ("app.retrieval", "app.index_manager", "app.bm25_index", "app.build_index"):
+        monkeypatch.setattr(f"{module}.get_settings", lambda: s)
+    monkeypatch.setattr("app.index_manager._index_version", None)
+    monkeypatch.setattr(retrieval, "get_embedding_model", lambda: _KeywordEmbeddings())
+    monkeypatch.setattr(retrieval, "_active", None)
+    monkeypatch.setattr(retrieval, "_retired", None)
+    return s
+
+
+def test_build_index_writes_versioned_artifact(settings, tmp_path):
+    out = tmp_path / "prebuilt"
+    manifest = build_index(tmp_path / "docs", out)
+
+    assert manifest["format"] == build_index_module.PREBUILT_FORMAT
+    assert manifest["embedding_model"] == "text-embedding-3-small"
+    assert manifest["doc_count"] == 2
+    assert json.loads((out / "index_manifest.json").read_text()) == manifest
+    bm25 = json.loads((out / "bm25_index.json").read_text())
+    assert bm25["index_version"] == manifest["index_version"]
+    collection = out / "numpy_index" / manifest["collection"]
+    meta = json.loads((collection / "meta.json").read_text())
+    assert (collection / meta["vectors"]).exists()
+    assert not (tmp_path / "data").exists()  # the live index is left alone
+
+
+def test_rebuild_replaces_artifact_in_place(settings, tmp_path):
+    out = tmp_path / "prebuilt"
+    first = build_index(tmp_path / "docs", out)
+    (tmp_path / "docs" / "seating.md").write_text("# Seating\n\nDrag guests to seating tables.")
+    second = build_index(tmp_path / "docs", out)
+
+    assert second["index_version"] != first["index_version"]
+    assert second["doc_count"] == 3
+    assert out.is_symlink()
+    assert json.loads((out / "index_manifest.json").read_text()) == second
+    builds = [p.name for p in tmp_path.iterdir() if p.name.startswith(".prebuilt-")]
+    assert builds == [out.resolve().name]  # the previous build was removed after the swap
+    assert sorted(p.name for p in tmp_path.iterdir() if not p.name.startswith(".")) == [
+        "docs",
+        "prebuilt",
+    ]
+
+
+def test_rebuild_migrates_a_plain_artifact_directory(settings, tmp_path):
+    """An artifact written as a plain directory by an older build is replaced by the link."""
+    out = tmp_path / "prebuilt"
+    out.mkdir()
+    (out / "index_manifest.json").write_text("{}")
+    manifest = build_index(tmp_path / "docs", out)
+    assert out.is_symlink()
+    assert json.loads((out / "index_manifest.json").read_text()) == manifest
+    assert len(list(tmp_path.glob(".prebuilt-*"))) == 1
+
+
+def test_open_prebuilt_retries_when_the_build_is_swapped_out(settings, tmp_path, monkeypatch):
+    """A rebuild that removes the build being opened makes the reader open the new one."""
+    from app import retrieval
+
+    out = tmp_path / "prebuilt"
+    build_index(tmp_path / "docs", out)
+    settings.rag_prebuilt_index_dir = str(out)
+    open_build = retrieval._open_prebuilt_build
+    calls = []
+
+    def swapped_once(path, embed):
+        calls.append(path)
+        if len(calls) == 1:
+            build_index(tmp_path / "docs", out)  # removes the build path points at
+        return open_build(path, embed)
+
+    monkeypatch.setattr(retrieval, "_open_prebuilt_build", swapped_once)
+    generation = retrieval._open_prebuilt(out, _KeywordEmbeddings())
+    assert calls[1] == out.resolve() != calls[0]
+    assert generation.store._collection.count() == 2
+
+
+def test_service_serves_prebuilt_index_read_only(settings, tmp_path):
+    """With RAG_PREBUILT_INDEX_DIR the store is memory-mapped read-only and never rebuilt."""
+    from app import retrieval
+    from app.index_manager import current_index_version
+    from app.numpy_store import NumpyVectorStore
+
+    out = tmp_path / "prebuilt"
+    manifest = build_index(tmp_path / "docs", out)
+    settings.rag_prebuilt_index_dir = str(out)
+    (tmp_path / "docs" / "guests.md").unlink()  # docs are not read at boot
+
+    store = retrieval.get_or_build_store(tmp_path / "docs")
+    assert isinstance(store, NumpyVectorStore)
+    assert store._collection.count() == 2
+    assert current_index_version() == manifest["index_version"]
+    assert len(retrieval._bm25_for(store).docs) == 2
+    assert retrieval.refresh_index(tmp_path / "docs") is False
+    with pytest.raises(PermissionError):
+        store.add_texts(["Plan the seating chart."])
+    docs = retrieval._retrieve_docs("how do I add a guest", store, 1)
+    assert docs[0].metadata["source"] == "guests.md"
+
+
+def test_prebuilt_index_with_other_embedding_model_is_rejected(settings, tmp_path):
+    from app import retrieval
+
+    out = tmp_path / "prebuilt"
+    build_index(tmp_path / "docs", out)
+    settings.rag_prebuilt_index_dir = str(out)
+    settings.openai_embedding_model = "text-embedding-3-large"
+
+    with pytest.raises(ValueError, match="text-embedding-3-small"):
+        retrieval.get_or_build_store()
+    assert retrieval.active_store() is None
+
+
+def test_cli_fails_without_docs(settings, tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        main(["--docs-dir", str(tmp_path / "missing"), "--out", str(tmp_path / "prebuilt")])
+    assert "no Markdown docs" in capsys.readouterr().err
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["docs"]
@@ -0,0 +1,161 @@
+"""Tests for the RAG cache backends and the process-wide backend singleton."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from app import cache
+from app.cache import MemoryRagCacheBackend, MemoryResponseCacheBackend, get_rag_cache_backend
+
+
+@pytest.fixture
+def rag_cache_settings(monkeypatch):
+    """Enable the in-memory RAG cache and reset the process-wide backend."""
+    s = MagicMock()
+    s.rag_cache_ttl_seconds = 60
+    s.rag_cache_maxsize = 100
+    s.rag_cache_eviction_policy = "lru"
+    s.redis_url_stripped = ""
+    monkeypatch.setattr("app.cache.get_settings", lambda: s)
+    monkeypatch.setattr(cache, "_rag_backend", None)
+    return s
+
+
+def test_get_rag_cache_backend_is_process_wide(rag_cache_settings):
+    """Repeated calls return the same backend, so entries survive between requests."""
+    first = get_rag_cache_backend()
+    first.set("rag:q:3", "context", 60)
+    second = get_rag_cache_backend()
+    assert second is first
+    assert second.get("rag:q:3") == "context"
+
+
+def test_get_rag_cache_backend_disabled_returns_none(rag_cache_settings):
+    """RAG_CACHE_TTL_SECONDS <= 0 disables the cache."""
+    rag_cache_settings.rag_cache_ttl_seconds = 0
+    assert get_rag_cache_backend() is None
+
+
+def test_memory_backend_stats_track_hits_misses_and_evictions():
+    """stats() reports size, hit rate and capacity evictions."""
+    backend = MemoryRagCacheBackend(60, maxsize=2)
+    backend.set("a", "1", 60)
+    backend.set("b", "2", 60)
+    assert backend.get("a") == "1"
+    backend.set("c", "3", 60)  # evicts least recently used "b"
+    assert backend.get("b") is None
+    stats = backend.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_rag_backends_async_interface():
+    """aget/aset share entries and stats with get/set; Redis errors fail open."""
+    backend = MemoryRagCacheBackend(60)
+
+    async def run_memory():
+        await backend.aset("k", "ctx", 60)
+        return await backend.aget("k")
+
+    assert asyncio.run(run_memory()) == "ctx"
+    assert backend.get("k") == "ctx"
+    assert backend.stats()["hits"] == 2
+
+    redis_backend = cache.RedisRagCacheBackend("redis://127.0.0.1:1/0", 60)
+
+    async def run_redis():
+        await redis_backend.aset("k", "ctx", 60)
+        return await redis_backend.aget("k")
+
+    assert asyncio.run(run_redis()) is None
+    assert redis_backend.stats()["misses"] == 1
+
+
+def test_memory_backend_expires_entries(monkeypatch):
+    """Entries past their TTL are treated as misses and counted as expirations."""
+    now = [1000.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    backend = MemoryRagCacheBackend(10)
+    backend.set("a", "1", 10)
+    now[0] += 11
+    assert backend.get("a") is None
+    assert backend.stats()["expirations"] == 1
+
+
+def test_memory_backend_lfu_policy_keeps_frequent_entries():
+    """With the lfu policy the least frequently read entry is evicted first."""
+    backend = MemoryRagCacheBackend(60, maxsize=2, eviction_policy="lfu")
+    backend.set("hot", "1", 60)
+    backend.set("cold", "2", 60)
+    backend.get("hot")
+    backend.get("hot")
+    backend.set("new", "3", 60)
+    assert backend.get("hot") == "1"
+    assert backend.get("cold") is None
+
+
+def test_memory_backend_rejects_unknown_policy():
+    """An unknown eviction policy fails fast at construction."""
+    with pytest.raises(ValueError):
+        MemoryRagCacheBackend(60, eviction_policy="random")
+
+
+def test_cache_keys_change_when_index_version_changes():
+    """Every cache namespace embeds the index version, so a rebuild orphans old entries."""
+    from app.cache import response_cache_key_ask, response_cache_key_ask_docs
+
+    def keys(version):
+        return (
+            cache._rag_cache_key("q", 3, version),
+            response_cache_key_ask("q", "ctx", version),
+            response_cache_key_ask_docs("q", version),
+        )
+
+    before, after = keys("v1"), keys("v2")
+    assert all("v1" in key for key in before)
+    assert all(b != a for b, a in zip(before, after, strict=True))
+
+
+def test_memory_response_backend_lock_and_wait_for():
+    """Single-process backends always grant the lock; wait_for returns once a value is set."""
+
+    async def run():
+        backend = MemoryResponseCacheBackend(ttl_seconds=60)
+        token = await backend.acquire_lock("k", 5)
+        assert token is not None
+        await backend.release_lock("k", token)
+        assert await backend.wait_for("k", timeout=0.05, interval=0.01) is None
+
+        async def fill():
+            await asyncio.sleep(0.02)
+            await backend.set("k", "v", 60)
+
+        filler = asyncio.ensure_future(fill())
+        value = await backend.wait_for("k", timeout=1, interval=0.01)
+        await filler
+        return value
+
+    assert asyncio.run(run()) == "v"
+
+
+def test_cached_response_soft_expiry_and_early_refresh():
+    """Entries refresh after the soft TTL, never without one, and XFetch can fire early."""
+    fresh = cache.CachedResponse({"answer": "a"}, soft_expires_at=1000.0, delta=0.0)
+    assert not fresh.should_refresh(now=999.0)
+    assert fresh.should_refresh(now=1000.0)
+    assert not cache.CachedResponse({"answer": "a"}).should_refresh(now=10**12)
+    slow = cache.CachedResponse({"answer": "a"}, soft_expires_at=1000.0, delta=5.0)
+    assert any(slow.should_refresh(now=999.0) for _ in range(200))
+
+
+def test_serialized_response_round_trips_and_reads_legacy_entries():
+    """Envelope entries and bare pre-envelope dicts both deserialize to the response."""
+    raw = cache.serialize_ask_response({"answer": "a"}, soft_ttl_seconds=30, compute_seconds=2.0)
+    entry = cache.load_cached_response(raw)
+    assert entry.data == {"answer": "a"} and entry.delta == 2.0
+    assert entry.soft_expires_at is not None
+    assert cache.deserialize_ask_response('{"answer": "b"}') == {"answer": "b"}
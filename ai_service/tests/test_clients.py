@@ -0,0 +1,58 @@
+"""Tests for the pooled LLM/embedding/rerank client registry."""
+
+import asyncio
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from app import clients
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("COHERE_API_KEY", "co-test")
+    asyncio.run(clients.aclose_clients())
+    yield
+    asyncio.run(clients.aclose_clients())
+
+
+def test_http_clients_are_shared_per_timeout():
+    """One sync and one async pooled client per timeout."""
+    sync = clients.get_http_client(30)
+    assert isinstance(sync, httpx.Client)
+    assert clients.get_http_client(30) is sync
+    assert clients.get_http_client(10) is not sync
+    assert clients.get_async_http_client(30) is clients.get_async_http_client(30.0)
+
+
+def test_models_are_cached_and_share_the_pool():
+    """Chat and embedding clients are built once and reuse the shared httpx clients."""
+    chat = clients.get_chat_model("gpt-5-nano", 30)
+    assert clients.get_chat_model("gpt-5-nano", 30) is chat
+    assert clients.get_chat_model("gpt-5-mini", 30) is not chat
+    assert chat.http_client is clients.get_http_client(30)
+    embeddings = clients.get_openai_embeddings("text-embedding-3-small", 30)
+    assert clients.get_openai_embeddings("text-embedding-3-small", 30) is embeddings
+    assert embeddings.http_async_client is clients.get_async_http_client(30)
+    assert clients.get_reranker(5, 30) is clients.get_reranker(5, 30)
+
+
+def test_aclose_clients_resets_registry():
+    """After shutdown, a new pool and new models are created on demand."""
+    sync = clients.get_http_client(30)
+    chat = clients.get_chat_model("gpt-5-nano", 30)
+    asyncio.run(clients.aclose_clients())
+    assert sync.is_closed
+    assert clients.get_http_client(30) is not sync
+    assert clients.get_chat_model("gpt-5-nano", 30) is not chat
+
+
+def test_pool_gauge_exported():
+    """Pool connection counts are exported per pool and state."""
+    clients.get_async_http_client(12)
+    value = REGISTRY.get_sample_value(
+        "llm_http_pool_connections", {"pool": "async:12", "state": "idle"}
+    )
+    assert value == 0
@@ -0,0 +1,139 @@
+"""Tests for memoized settings, reload_settings and POST /admin/reload-settings."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app import cache, config
+from app.main import app
+
+
+@pytest.fixture
+def fresh_settings(monkeypatch):
+    """Real settings; the memoized snapshot is restored after the test."""
+    monkeypatch.setattr(config, "_settings", None)
+    yield monkeypatch
+    cache._drop_stale_backends()  # sync with the bumped version now, not in a later test
+
+
+def test_get_settings_is_memoized(fresh_settings):
+    """Repeated calls return the same snapshot without re-reading the environment."""
+    fresh_settings.setenv("RAG_TOP_K", "4")
+    first = config.get_settings()
+    fresh_settings.setenv("RAG_TOP_K", "9")
+    assert config.get_settings() is first
+    assert config.get_settings().rag_top_k == 4
+
+
+def test_reload_settings_picks_up_changes_and_bumps_version(fresh_settings):
+    """reload_settings re-reads the environment and increments settings_version."""
+    fresh_settings.setenv("RAG_TOP_K", "4")
+    before = config.get_settings()
+    version = config.settings_version()
+    fresh_settings.setenv("RAG_TOP_K", "7")
+    after = config.reload_settings()
+    assert after is config.get_settings() and after is not before
+    assert after.rag_top_k == 7
+    assert config.settings_version() == version + 1
+
+
+def test_reload_settings_keeps_current_on_invalid_values(fresh_settings):
+    """Invalid values raise and leave the current snapshot and version in place."""
+    current = config.get_settings()
+    version = config.settings_version()
+    fresh_settings.setenv("RAG_TOP_K", "not-a-number")
+    with pytest.raises(ValidationError):
+        config.reload_settings()
+    assert config.get_settings() is current
+    assert config.settings_version() == version
+
+
+def test_cache_backends_rebuilt_after_reload(fresh_settings):
+    """Backends built before a reload are replaced on next use."""
+    fresh_settings.setenv("RAG_CACHE_TTL_SECONDS", "60")
+    fresh_settings.setattr(cache, "_rag_backend", None)
+    config.reload_settings()
+    first = cache.get_rag_cache_backend()
+    assert cache.get_rag_cache_backend() is first
+    fresh_settings.setenv("RAG_CACHE_MAXSIZE", "5")
+    config.reload_settings()
+    second = cache.get_rag_cache_backend()
+    assert second is not first
+    assert second.stats()["maxsize"] == 5
+
+
+def test_unrelated_reload_keeps_cache_backends(fresh_settings):
+    """A reload that does not touch a backend's own settings keeps it (and its entries)."""
+    fresh_settings.setenv("RAG_CACHE_TTL_SECONDS", "60")
+    config.reload_settings()
+    backend = cache.get_rag_cache_backend()
+    vectors = cache.get_query_vector_cache()
+    fresh_settings.setenv("RAG_TOP_K", "9")
+    config.reload_settings()
+    assert cache.get_rag_cache_backend() is backend
+    assert cache.get_query_vector_cache() is vectors
+
+
+def test_replaced_backend_is_closed(fresh_settings):
+    """A backend dropped by a reload has its Redis clients closed."""
+    fresh_settings.setenv("RAG_CACHE_TTL_SECONDS", "60")
+    config.reload_settings()
+    cache.get_rag_cache_backend()
+    old = MagicMock()
+    fresh_settings.setattr(cache, "_rag_backend", old)
+    fresh_settings.setenv("RAG_CACHE_TTL_SECONDS", "120")
+    config.reload_settings()
+    assert cache.get_rag_cache_backend() is not old
+    old.close.assert_called_once()
+
+
+def test_qa_agents_rebuilt_after_reload(fresh_settings):
+    """Q&A agents built before a reload are not reused (they hold the old model client)."""
+    from app.services import qa
+
+    fresh_settings.setattr(qa, "_agents", {})
+    with patch.object(qa, "create_qa_agent", side_effect=lambda model: object()):
+        first = qa.get_qa_agent("gpt-5-nano")
+        assert qa.get_qa_agent("gpt-5-nano") is first
+        config.reload_settings()
+        assert qa.get_qa_agent("gpt-5-nano") is not first
+
+
+def test_admin_reload_settings_endpoint(fresh_settings):
+    """POST /admin/reload-settings reloads and returns the new version."""
+    fresh_settings.setenv("ADMIN_TOKEN", "secret")
+    version = config.settings_version()
+    response = TestClient(app).post("/admin/reload-settings", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.json() == {"settings_version": version + 1}
+
+
+def test_admin_reload_settings_disabled_without_token(mock_settings):
+    """With ADMIN_TOKEN empty the endpoint refuses every request."""
+    with (
+        patch("app.main.get_settings", return_value=mock_settings),
+        patch("app.main.reload_settings") as reload,
+    ):
+        client = TestClient(app)
+        assert client.post("/admin/reload-settings").status_code == 403
+        empty = client.post("/admin/reload-settings", headers={"X-Admin-Token": ""})
+        assert empty.status_code == 403
+    reload.assert_not_called()
+
+
+def test_admin_reload_settings_requires_token_when_configured(mock_settings):
+    """With ADMIN_TOKEN set, a missing or wrong X-Admin-Token is rejected."""
+    mock_settings.admin_token = "secret"
+    with (
+        patch("app.main.get_settings", return_value=mock_settings),
+        patch("app.main.reload_settings") as reload,
+    ):
+        client = TestClient(app)
+        assert client.post("/admin/reload-settings").status_code == 403
+        wrong = client.post("/admin/reload-settings", headers={"X-Admin-Token": "secrets"})
+        assert wrong.status_code == 403
+        ok = client.post("/admin/reload-settings", headers={"X-Admin-Token": "secret"})
+    assert ok.status_code == 200
+    reload.assert_called_once()
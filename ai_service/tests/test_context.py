@@ -1,7 +1,7 @@
-"""Tests for build_context_markdown."""
+"""Tests for build_context_markdown and build_context_blocks."""
 
 from app.schemas import AskRequest, GuestContext, TaskContext, WeddingContext
-from app.services.context import build_context_markdown
+from app.services.context import build_context_blocks, build_context_markdown
 
 
 def test_build_context_markdown_minimal():
@@ -47,3 +47,63 @@ def test_build_context_markdown_with_guests_and_tasks():
     assert "Book caterer" in md
     assert "pending" in md
     assert "high" in md
+
+
+def _payload_with_guests(n: int) -> AskRequest:
+    return AskRequest(
+        question="Who?",
+        wedding=WeddingContext(id=1, name="Test", date=None, venue_name=None),
+        guests=[GuestContext(name=f"Guest {i}") for i in range(n)],
+        tasks=[],
+        guestbook_entries=[],
+    )
+
+
+def test_build_context_blocks_splits_sections_into_blocks():
+    """Guests are cut into labelled runs; header and empty sections are verbatim blocks."""
+    blocks = build_context_blocks(_payload_with_guests(40), block_size=4)
+    guest_blocks = [b for b in blocks if b.markdown.startswith("Guests")]
+    assert len(guest_blocks) > 1
+    assert {b.markdown.splitlines()[0] for b in guest_blocks} == {"Guests (part of the list):"}
+    rows = [line for b in guest_blocks for line in b.markdown.splitlines()[1:]]
+    assert rows == [
+        line
+        for line in build_context_markdown(_payload_with_guests(40)).splitlines()
+        if line.startswith("- Guest ")
+    ]
+    assert all(len(b.markdown.splitlines()) - 1 <= 8 for b in guest_blocks)
+    assert all(b.summarize for b in guest_blocks)
+    assert not blocks[0].summarize and blocks[0].markdown.startswith("Wedding: Test")
+    assert any(b.markdown == "Tasks:\n- No tasks provided." and not b.summarize for b in blocks)
+
+
+def test_build_context_blocks_insert_changes_only_its_block():
+    """Adding a guest leaves every block that does not contain it unchanged."""
+    payload = _payload_with_guests(300)
+    before = {b.hash for b in build_context_blocks(payload, block_size=50)}
+    payload.guests.insert(120, GuestContext(name="Late Addition"))
+    after = [b.hash for b in build_context_blocks(payload, block_size=50)]
+    assert len([h for h in after if h not in before]) <= 2
+    payload.guests.pop(0)
+    removed = [b.hash for b in build_context_blocks(payload, block_size=50)]
+    assert len([h for h in removed if h not in after]) <= 2
+
+
+def test_build_context_blocks_edit_changes_only_one_block_hash():
+    """Editing one guest changes the hash of the block holding it and no other."""
+    payload = _payload_with_guests(6)
+    before = [b.hash for b in build_context_blocks(payload, block_size=2)]
+    payload.guests[3].dietary_notes = "Vegan"
+    after = [b.hash for b in build_context_blocks(payload, block_size=2)]
+    changed = [i for i, (a, b) in enumerate(zip(before, after, strict=True)) if a != b]
+    assert len(changed) == 1
+
+
+def test_build_context_blocks_bounds_blocks_by_tokens():
+    """max_tokens cuts a run into smaller shards, each within the budget."""
+    payload = _payload_with_guests(10)
+    blocks = build_context_blocks(payload, block_size=50, max_tokens=60)
+    guest_blocks = [b for b in blocks if b.markdown.startswith("Guests")]
+    assert len(guest_blocks) > 1
+    assert all(b.tokens <= 60 + 10 for b in guest_blocks)  # + label line
+    assert sum(len(b.markdown.splitlines()) - 1 for b in guest_blocks) == 10
@@ -0,0 +1,138 @@
+"""Tests for the server-side wedding context store and its endpoints."""
+
+import pytest
+
+from app import context_store
+from app.context_store import VersionConflict, WeddingContextStore
+from app.schemas import GuestContext, WeddingContext, WeddingContextPatch, WeddingContextUpsert
+from app.services.context import build_context_markdown
+
+
+def _upsert(*guests: GuestContext) -> WeddingContextUpsert:
+    return WeddingContextUpsert(wedding=WeddingContext(id=7, name="Stored"), guests=list(guests))
+
+
+@pytest.fixture
+def fresh_store(monkeypatch):
+    store = WeddingContextStore(maxsize=10)
+    monkeypatch.setattr(context_store, "_context_store", store)
+    return store
+
+
+def test_patch_upserts_and_deletes_by_id():
+    """Updates replace rows in place, new ids are appended, deletes drop rows."""
+    store = WeddingContextStore()
+    first = store.put(_upsert(GuestContext(id=1, name="Ann"), GuestContext(id=2, name="Ben")))
+    stored = store.patch(
+        7,
+        WeddingContextPatch(
+            upsert_guests=[
+                GuestContext(id=2, name="Ben", dietary_notes="Vegan"),
+                GuestContext(id=3, name="Cy"),
+            ],
+            delete_guest_ids=[1],
+        ),
+    )
+    assert stored.version != first.version
+    assert [(g.id, g.dietary_notes) for g in stored.guests] == [(2, "Vegan"), (3, None)]
+
+
+def test_patch_expected_version_conflict():
+    """A stale expected_version is rejected with the current version."""
+    store = WeddingContextStore()
+    old = store.put(_upsert()).version
+    current = store.put(_upsert(GuestContext(id=1, name="Ann"))).version
+    with pytest.raises(VersionConflict) as excinfo:
+        store.patch(7, WeddingContextPatch(expected_version=old))
+    assert excinfo.value.current == current
+
+
+def test_version_is_content_hash_shared_across_stores():
+    """Two processes holding the same context agree on its version; re-PUTs keep it."""
+    a, b = WeddingContextStore(), WeddingContextStore()
+    version = a.put(_upsert(GuestContext(id=1, name="Ann"))).version
+    assert a.put(_upsert(GuestContext(id=1, name="Ann"))).version == version
+    assert b.put(_upsert(GuestContext(id=1, name="Ann"))).version == version
+    patched = b.patch(7, WeddingContextPatch(upsert_guests=[GuestContext(id=1, name="Ann")]))
+    assert patched.version == version
+    assert a.put(_upsert(GuestContext(id=1, name="Anne"))).version != version
+
+
+def test_stored_markdown_matches_request_rendering():
+    """Memoized markdown equals what /ask would render for the same payload."""
+    store = WeddingContextStore()
+    stored = store.put(_upsert(GuestContext(id=1, name="Ann")))
+    assert stored.context_markdown() == build_context_markdown(stored.as_request("q"))
+    assert stored.context_hash() is stored.context_hash()
+
+
+def test_stored_index_and_aggregates_are_built_once_per_version(monkeypatch):
+    """Questions about an unchanged stored wedding reuse its slicing index and aggregates."""
+    from app.services import slicing
+
+    store = WeddingContextStore()
+    guests = [GuestContext(id=i, name=f"Guest {i}") for i in range(60)]
+    stored = store.put(_upsert(*guests, GuestContext(id=99, name="Priya Shah")))
+    index, aggregates = stored.wedding_index(), stored.aggregates()
+    assert stored.wedding_index() is index and stored.aggregates() is aggregates
+
+    def rebuild(payload):
+        raise AssertionError("stored weddings must not be re-indexed per question")
+
+    monkeypatch.setattr(slicing, "WeddingIndex", rebuild)
+    monkeypatch.setattr(slicing, "compute_aggregates", rebuild)
+    context = slicing.slice_context(
+        stored.as_request("What does Priya eat?"),
+        "What does Priya eat?",
+        index=index,
+        aggregates=aggregates,
+    )
+    assert [g.name for g in context.payload.guests] == ["Priya Shah"]
+    assert context.aggregates is aggregates and "61 guests" in context.note
+
+
+def test_store_evicts_least_recently_used():
+    """maxsize bounds the number of weddings held."""
+    store = WeddingContextStore(maxsize=1)
+    store.put(_upsert())
+    store.put(WeddingContextUpsert(wedding=WeddingContext(id=8, name="Other")))
+    assert len(store) == 1
+
+
+def test_ask_wedding_round_trip(client, fresh_store):
+    """PUT, PATCH, then ask by id and version; stale versions get 409, unknown ids 404."""
+    body = {"wedding": {"id": 7, "name": "Stored"}, "guests": [{"id": 1, "name": "Ann"}]}
+    first = client.put("/weddings/7/context", json=body).json()["version"]
+    patched = client.patch(
+        "/weddings/7/context", json={"upsert_guests": [{"id": 2, "name": "Ben"}]}
+    ).json()
+    assert patched["version"] != first and patched["guests"] == 2
+    current = patched["version"]
+
+    ok = client.post("/ask/wedding", json={"question": "Who?", "wedding_id": 7, "version": current})
+    assert ok.status_code == 200
+    assert ok.json()["answer"] == "Mocked answer."
+
+    stale = client.post(
+        "/ask/wedding", json={"question": "Who?", "wedding_id": 7, "version": first}
+    )
+    assert stale.status_code == 409
+    missing = client.post(
+        "/ask/wedding", json={"question": "Who?", "wedding_id": 99, "version": current}
+    )
+    assert missing.status_code == 404
+
+
+def test_put_rejects_mismatched_wedding_id(client, fresh_store):
+    response = client.put("/weddings/8/context", json={"wedding": {"id": 7, "name": "X"}})
+    assert response.status_code == 422
+
+
+def test_patch_rejects_upserts_without_id(client, fresh_store):
+    """Rows without an id cannot be matched, so PATCH refuses them instead of appending."""
+    client.put("/weddings/7/context", json={"wedding": {"id": 7, "name": "Stored"}})
+    response = client.patch("/weddings/7/context", json={"upsert_guests": [{"name": "Ann"}]})
+    assert response.status_code == 422
+    assert client.get("/weddings/7/context").json()["guests"] == 0
+    with pytest.raises(ValueError):
+        fresh_store.patch(7, WeddingContextPatch(upsert_guests=[GuestContext(name="Ann")]))
@@ -0,0 +1,50 @@
+"""Tests for the debounced docs watcher."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.docs_watcher import DocsWatchUnavailable, watch_docs
+
+
+async def test_watch_docs_calls_on_change_per_batch(tmp_path, monkeypatch):
+    """Each debounced batch of changes triggers one refresh."""
+    seen = {}
+
+    def fake_awatch(path, **kwargs):
+        seen.update(kwargs)
+
+        async def gen():
+            yield {(1, str(path / "a.md")), (2, str(path / "b.md"))}
+            yield {(2, str(path / "a.md"))}
+
+        return gen()
+
+    monkeypatch.setattr("app.docs_watcher._load_awatch", lambda: fake_awatch)
+    on_change = AsyncMock()
+    await watch_docs(tmp_path, on_change, debounce_ms=250)
+    assert on_change.await_count == 2
+    assert seen["debounce"] == 250
+    assert seen["recursive"] is False
+
+
+async def test_watch_docs_missing_dir_is_unavailable(tmp_path):
+    """A missing docs directory makes the caller fall back to polling."""
+    with pytest.raises(DocsWatchUnavailable):
+        await watch_docs(tmp_path / "missing", AsyncMock())
+
+
+async def test_watch_docs_survives_failed_refresh(tmp_path, monkeypatch):
+    """A refresh error is logged and watching continues."""
+
+    def fake_awatch(path, **kwargs):
+        async def gen():
+            yield {(2, str(path / "a.md"))}
+            yield {(2, str(path / "a.md"))}
+
+        return gen()
+
+    monkeypatch.setattr("app.docs_watcher._load_awatch", lambda: fake_awatch)
+    on_change = AsyncMock(side_effect=[ValueError("boom"), None])
+    await watch_docs(tmp_path, on_change)
+    assert on_change.await_count == 2
@@ -0,0 +1,81 @@
+"""Tests for the persistent, content-addressed embedding cache."""
+
+from unittest.mock import MagicMock
+
+from app.embedding_cache import CachedEmbeddings, EmbeddingStore
+
+
+def _fake_embeddings():
+    """Embeddings mock returning a vector derived from the text length."""
+    underlying = MagicMock()
+    underlying.embed_documents.side_effect = lambda texts: [
+        [float(len(t)), 1.0, 0.0] for t in texts
+    ]
+    return underlying
+
+
+def test_cached_embeddings_only_embeds_unseen_texts(tmp_path):
+    """Second call with overlapping texts embeds only the new text."""
+    underlying = _fake_embeddings()
+    embeddings = CachedEmbeddings(underlying, EmbeddingStore(tmp_path, "model-a"))
+    first = embeddings.embed_documents(["alpha", "beta"])
+    second = embeddings.embed_documents(["beta", "gamma!", "alpha"])
+    assert first == [[5.0, 1.0, 0.0], [4.0, 1.0, 0.0]]
+    assert second == [[4.0, 1.0, 0.0], [6.0, 1.0, 0.0], [5.0, 1.0, 0.0]]
+    assert underlying.embed_documents.call_args_list[1].args[0] == ["gamma!"]
+
+
+def test_embedding_store_persists_across_instances(tmp_path):
+    """A new store (cold start / new replica) reuses vectors written by a previous one."""
+    CachedEmbeddings(_fake_embeddings(), EmbeddingStore(tmp_path, "model-a")).embed_documents(
+        ["alpha"]
+    )
+    underlying = _fake_embeddings()
+    reopened = CachedEmbeddings(underlying, EmbeddingStore(tmp_path, "model-a"))
+    assert reopened.embed_documents(["alpha"]) == [[5.0, 1.0, 0.0]]
+    underlying.embed_documents.assert_not_called()
+
+
+def test_embedding_store_keys_include_model(tmp_path):
+    """The same text embedded with another model is a cache miss."""
+    CachedEmbeddings(_fake_embeddings(), EmbeddingStore(tmp_path, "model-a")).embed_documents(
+        ["alpha"]
+    )
+    underlying = _fake_embeddings()
+    CachedEmbeddings(underlying, EmbeddingStore(tmp_path, "model-b")).embed_documents(["alpha"])
+    underlying.embed_documents.assert_called_once_with(["alpha"])
+
+
+def test_embedding_store_trims_partial_rows(tmp_path):
+    """
+    Rows without a matching key (writer crashed mid-append) are ignored on load and only
+    trimmed by the next append, which holds the flock.
+    """
+    store = EmbeddingStore(tmp_path, "model-a")
+    store.put_many([store.key("alpha")], [[1.0, 2.0, 3.0]])
+    vectors = tmp_path / "model-a" / "vectors.f32"
+    with open(vectors, "ab") as f:
+        f.write(b"\x00" * 12)
+    reopened = EmbeddingStore(tmp_path, "model-a")
+    assert len(reopened) == 1
+    assert vectors.stat().st_size == 24  # opening never writes
+    reopened.put_many([reopened.key("beta")], [[4.0, 5.0, 6.0]])
+    assert reopened.get_many([reopened.key("beta")]) == [[4.0, 5.0, 6.0]]
+
+
+def test_embedding_store_compacts_to_newest_rows_past_max_rows(tmp_path):
+    """Past max_rows the oldest rows are dropped; survivors keep their vectors across reopen."""
+    store = EmbeddingStore(tmp_path, "model-a", max_rows=4)
+    texts = [f"text-{i}" for i in range(5)]
+    for i, text in enumerate(texts):
+        store.put_many([store.key(text)], [[float(i), 0.0, 1.0]])
+    assert len(store) == 3
+    reopened = EmbeddingStore(tmp_path, "model-a")
+    assert reopened.get_many([reopened.key(t) for t in texts]) == [
+        None,
+        None,
+        [2.0, 0.0, 1.0],
+        [3.0, 0.0, 1.0],
+        [4.0, 0.0, 1.0],
+    ]
+    assert (tmp_path / "model-a" / "vectors.f32").stat().st_size == 3 * 3 * 4
@@ -0,0 +1,63 @@
+"""Tests for the dedicated blocking executors."""
+
+import asyncio
+import threading
+
+import pytest
+
+from app import executors
+from app.executors import INDEX_POOL, RETRIEVAL_POOL, get_executor, run_blocking
+
+
+@pytest.fixture(autouse=True)
+def fresh_executors():
+    executors.shutdown_executors(wait=True)
+    yield
+    executors.shutdown_executors(wait=True)
+
+
+def test_run_blocking_uses_named_pool():
+    """Work runs in the pool's own threads, not the loop's default executor."""
+
+    async def run():
+        return await asyncio.gather(
+            run_blocking(RETRIEVAL_POOL, lambda: threading.current_thread().name),
+            run_blocking(INDEX_POOL, lambda: threading.current_thread().name),
+        )
+
+    retrieval_thread, index_thread = asyncio.run(run())
+    assert retrieval_thread.startswith("retrieval-worker")
+    assert index_thread.startswith("index-worker")
+
+
+def test_run_blocking_passes_arguments_and_errors():
+    """Arguments are forwarded and exceptions propagate to the awaiting caller."""
+
+    def fail():
+        raise ValueError("boom")
+
+    assert asyncio.run(run_blocking(RETRIEVAL_POOL, max, 1, 3, key=None)) == 3
+    with pytest.raises(ValueError, match="boom"):
+        asyncio.run(run_blocking(RETRIEVAL_POOL, fail))
+
+
+def test_busy_index_pool_does_not_block_retrieval():
+    """A saturated index pool leaves retrieval work unaffected."""
+    release = threading.Event()
+    workers = get_executor(INDEX_POOL)._max_workers
+
+    async def run():
+        blocked = [
+            asyncio.ensure_future(run_blocking(INDEX_POOL, release.wait, 5)) for _ in range(workers)
+        ]
+        result = await asyncio.wait_for(run_blocking(RETRIEVAL_POOL, lambda: "ok"), 1)
+        release.set()
+        await asyncio.gather(*blocked)
+        return result
+
+    assert asyncio.run(run()) == "ok"
+
+
+def test_unknown_pool_rejected():
+    with pytest.raises(ValueError):
+        get_executor("nope")
@@ -1,6 +1,5 @@
 """Tests for index_manager: manifest, needs_rebuild, rebuild."""
 
-import json
 from pathlib import Path
 from unittest.mock import MagicMock
 
@@ -17,7 +16,10 @@ from app.index_manager import (
 @pytest.fixture
 def temp_manifest_dir(tmp_path, monkeypatch):
     """Point chroma_persist_dir to tmp_path."""
-    monkeypatch.setattr("app.index_manager.get_settings", lambda: MagicMock(chroma_persist_dir=str(tmp_path)))
+    monkeypatch.setattr(
+        "app.index_manager.get_settings",
+        lambda: MagicMock(chroma_persist_dir=str(tmp_path), rag_prebuilt_index_dir=""),
+    )
     return tmp_path
 
 
@@ -35,7 +37,9 @@ def test_save_and_load_manifest(temp_manifest_dir):
 
 def test_load_manifest_missing_returns_none(monkeypatch):
     """When manifest file does not exist, load_manifest returns None."""
-    monkeypatch.setattr("app.index_manager._manifest_path", lambda: Path("/nonexistent/manifest.json"))
+    monkeypatch.setattr(
+        "app.index_manager._manifest_path", lambda: Path("/nonexistent/manifest.json")
+    )
     assert load_manifest() is None
 
 
@@ -44,7 +48,10 @@ def test_needs_rebuild_no_manifest(tmp_path, monkeypatch):
     doc_dir = tmp_path / "docs"
     doc_dir.mkdir()
     (doc_dir / "x.md").write_text("# Hi")
-    monkeypatch.setattr("app.index_manager.get_settings", lambda: MagicMock(chroma_persist_dir=str(tmp_path)))
+    monkeypatch.setattr(
+        "app.index_manager.get_settings",
+        lambda: MagicMock(chroma_persist_dir=str(tmp_path), rag_prebuilt_index_dir=""),
+    )
     assert needs_rebuild(doc_dir) is True
 
 
@@ -53,11 +60,15 @@ def test_needs_rebuild_unchanged_returns_false(tmp_path, monkeypatch):
     doc_dir = tmp_path / "docs"
     doc_dir.mkdir()
     (doc_dir / "x.md").write_text("# Hi")
-    monkeypatch.setattr("app.index_manager.get_settings", lambda: MagicMock(chroma_persist_dir=str(tmp_path)))
+    monkeypatch.setattr(
+        "app.index_manager.get_settings",
+        lambda: MagicMock(chroma_persist_dir=str(tmp_path), rag_prebuilt_index_dir=""),
+    )
     hashes = {"x.md": "fakehash"}
     save_manifest(hashes, 1)
     # Stored hashes won't match current (we used fakehash). So we need to compute real hash and save.
     from app.index_manager import _current_doc_hashes
+
     real = _current_doc_hashes(doc_dir)
     save_manifest(real, 1)
     assert needs_rebuild(doc_dir) is False
@@ -68,14 +79,19 @@ def test_rebuild_clears_and_adds(monkeypatch, tmp_path):
     doc_dir = tmp_path / "docs"
     doc_dir.mkdir()
     (doc_dir / "y.md").write_text("# Doc")
-    monkeypatch.setattr("app.index_manager.get_settings", lambda: MagicMock(chroma_persist_dir=str(tmp_path)))
+    monkeypatch.setattr(
+        "app.index_manager.get_settings",
+        lambda: MagicMock(chroma_persist_dir=str(tmp_path), rag_prebuilt_index_dir=""),
+    )
     store = MagicMock()
     deleted = []
     store._collection.get.return_value = {"ids": ["id1", "id2"]}
     store._collection.delete.side_effect = lambda *, ids: deleted.extend(ids)
     from langchain_core.documents import Document
+
     def load_docs(d):
         return [Document(page_content="chunk", metadata={"source": "y.md"})]
+
     n, docs_returned = rebuild(store, doc_dir, load_docs)
     assert n == 1
     assert len(docs_returned) == 1
@@ -84,3 +100,174 @@ def test_rebuild_clears_and_adds(monkeypatch, tmp_path):
     manifest = load_manifest()
     assert manifest is not None
     assert "y.md" in manifest["doc_hashes"]
+
+
+def test_save_manifest_bumps_current_index_version(temp_manifest_dir, monkeypatch):
+    """current_index_version follows save_manifest without re-reading the manifest."""
+    from app.index_manager import current_index_version
+
+    monkeypatch.setattr("app.index_manager._index_version", None)
+    assert current_index_version() == "none"
+    version = save_manifest({"a.md": "abc"}, doc_count=1)
+    assert current_index_version() == version
+    assert load_manifest()["index_version"] == version
+
+
+def test_rebuild_incremental_only_touches_changed_files(monkeypatch, tmp_path):
+    """With a manifest, rebuild re-embeds only chunks of changed files and keeps stable ids."""
+    from langchain_core.documents import Document
+
+    from app.index_manager import _current_doc_hashes, chunk_id
+
+    doc_dir = tmp_path / "docs"
+    doc_dir.mkdir()
+    (doc_dir / "a.md").write_text("# A")
+    (doc_dir / "b.md").write_text("# B")
+    monkeypatch.setattr(
+        "app.index_manager.get_settings",
+        lambda: MagicMock(chroma_persist_dir=str(tmp_path), rag_prebuilt_index_dir=""),
+    )
+    contents = {"a.md": "alpha", "b.md": "beta"}
+
+    def load_docs(d):
+        return [
+            Document(page_content=text, metadata={"source": name, "heading": "", "page": 0})
+            for name, text in contents.items()
+        ]
+
+    old_b = Document(page_content="beta", metadata={"source": "b.md", "heading": "", "page": 0})
+    save_manifest(_current_doc_hashes(doc_dir), 2)
+    (doc_dir / "b.md").write_text("# B changed")
+    contents["b.md"] = "beta v2"
+
+    store = MagicMock()
+    store._collection.get.return_value = {"ids": [chunk_id(old_b)]}
+    n, docs = rebuild(store, doc_dir, load_docs)
+
+    assert n == 2
+    assert store._collection.get.call_args.kwargs["where"] == {"source": "b.md"}
+    store._collection.delete.assert_called_once_with(ids=[chunk_id(old_b)])
+    added = store.add_documents.call_args.args[0]
+    assert [d.page_content for d in added] == ["beta v2"]
+    assert store.add_documents.call_args.kwargs["ids"] == [chunk_id(added[0])]
+    assert load_manifest()["last_sync"]["embeddings_saved"] == 1
+
+
+def test_sync_embeds_chunks_while_later_files_are_still_loading(tmp_path, monkeypatch):
+    """New chunks go to the store in groups as they are produced, not after the last file."""
+    from langchain_core.documents import Document
+
+    from app.index_manager import sync_collection
+
+    doc_dir = tmp_path / "docs"
+    doc_dir.mkdir()
+    monkeypatch.setattr(
+        "app.index_manager.get_settings",
+        lambda: MagicMock(chroma_persist_dir=str(tmp_path), rag_prebuilt_index_dir=""),
+    )
+    monkeypatch.setattr("app.index_manager.EMBED_FLUSH_CHUNKS", 2)
+    events = []
+
+    def load_docs(_d):
+        for i in range(5):
+            events.append(f"chunk {i}")
+            yield Document(page_content=f"text {i}", metadata={"source": f"{i}.md"})
+
+    store = MagicMock()
+    store._collection.get.return_value = {"ids": []}
+    store.add_documents.side_effect = lambda docs, ids: events.append(f"add {len(docs)}")
+    result = sync_collection(store, doc_dir, load_docs, incremental=False)
+
+    assert events == [
+        "chunk 0",
+        "chunk 1",
+        "add 2",
+        "chunk 2",
+        "chunk 3",
+        "add 2",
+        "chunk 4",
+        "add 1",
+    ]
+    assert len(result.documents) == 5 and result.last_sync["chunks_added"] == 5
+
+
+def test_needs_rebuild_skips_hashing_when_stats_unchanged(tmp_path, monkeypatch):
+    """With matching mtime/size in the manifest, needs_rebuild does not read any file."""
+    from app.index_manager import _current_doc_hashes, _current_doc_stats
+
+    doc_dir = tmp_path / "docs"
+    doc_dir.mkdir()
+    (doc_dir / "x.md").write_text("# Hi")
+    monkeypatch.setattr(
+        "app.index_manager.get_settings",
+        lambda: MagicMock(chroma_persist_dir=str(tmp_path), rag_prebuilt_index_dir=""),
+    )
+    save_manifest(_current_doc_hashes(doc_dir), 1, doc_stats=_current_doc_stats(doc_dir))
+
+    def fail(_d):
+        raise AssertionError("hashed docs despite unchanged stats")
+
+    monkeypatch.setattr("app.index_manager._current_doc_hashes", fail)
+    assert needs_rebuild(doc_dir) is False
+
+
+def test_needs_rebuild_detects_edit_after_stat_change(tmp_path, monkeypatch):
+    """A changed file (new size) falls through to hashing and reports a rebuild."""
+    from app.index_manager import _current_doc_hashes, _current_doc_stats
+
+    doc_dir = tmp_path / "docs"
+    doc_dir.mkdir()
+    (doc_dir / "x.md").write_text("# Hi")
+    monkeypatch.setattr(
+        "app.index_manager.get_settings",
+        lambda: MagicMock(chroma_persist_dir=str(tmp_path), rag_prebuilt_index_dir=""),
+    )
+    save_manifest(_current_doc_hashes(doc_dir), 1, doc_stats=_current_doc_stats(doc_dir))
+    (doc_dir / "x.md").write_text("# Hi there")
+    assert needs_rebuild(doc_dir) is True
+
+
+def test_needs_rebuild_does_not_write_manifest_for_touched_docs(tmp_path, monkeypatch):
+    """A touched but unchanged doc is remembered in memory; the manifest is left alone."""
+    import os
+
+    from app.index_manager import _current_doc_hashes, _current_doc_stats
+
+    doc_dir = tmp_path / "docs"
+    doc_dir.mkdir()
+    (doc_dir / "x.md").write_text("# Hi")
+    monkeypatch.setattr(
+        "app.index_manager.get_settings",
+        lambda: MagicMock(chroma_persist_dir=str(tmp_path), rag_prebuilt_index_dir=""),
+    )
+    monkeypatch.setattr("app.index_manager._verified_stats", None)
+    save_manifest(_current_doc_hashes(doc_dir), 1, doc_stats=_current_doc_stats(doc_dir))
+    before = (tmp_path / "index_manifest.json").read_text()
+    st = (doc_dir / "x.md").stat()
+    os.utime(doc_dir / "x.md", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    assert needs_rebuild(doc_dir) is False
+    assert (tmp_path / "index_manifest.json").read_text() == before
+
+    def fail(_d):
+        raise AssertionError("hashed docs again despite verified stats")
+
+    monkeypatch.setattr("app.index_manager._current_doc_hashes", fail)
+    assert needs_rebuild(doc_dir) is False
+
+
+def test_rebuild_without_chunks_commits_empty_manifest(tmp_path, monkeypatch):
+    """Docs that yield no chunks still get a manifest, so needs_rebuild stops reporting True."""
+    doc_dir = tmp_path / "docs"
+    doc_dir.mkdir()
+    (doc_dir / "empty.md").write_text("")
+    monkeypatch.setattr(
+        "app.index_manager.get_settings",
+        lambda: MagicMock(chroma_persist_dir=str(tmp_path), rag_prebuilt_index_dir=""),
+    )
+    store = MagicMock()
+    store._collection.get.return_value = {"ids": []}
+    assert needs_rebuild(doc_dir) is True
+    assert rebuild(store, doc_dir, lambda d: []) == (0, [])
+    assert load_manifest()["doc_count"] == 0
+    assert needs_rebuild(doc_dir) is False
@@ -0,0 +1,127 @@
+"""Tests for the in-process NumPy vector index."""
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.documents import Document
+
+from app.numpy_store import NumpyVectorStore
+
+
+class _AxisEmbeddings:
+    """Embeds text onto a basis vector chosen by its first word; deterministic and tiny."""
+
+    AXES = {"guest": 0, "task": 1, "dashboard": 2}
+
+    def _vec(self, text):
+        vec = [0.0, 0.0, 0.0, 0.1]
+        vec[self.AXES.get(text.split()[0].lower(), 3)] = 1.0
+        return vec
+
+    def embed_documents(self, texts):
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vec(text)
+
+
+def _docs():
+    return [
+        Document(page_content="guest list basics", metadata={"source": "guests.md"}),
+        Document(page_content="task board", metadata={"source": "tasks.md"}),
+        Document(page_content="guest dietary notes", metadata={"source": "guests.md"}),
+        Document(page_content="dashboard totals", metadata={"source": "dashboard.md"}),
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = NumpyVectorStore("docs", _AxisEmbeddings(), persist_directory=tmp_path)
+    s.add_documents(_docs(), ids=["g1", "t1", "g2", "d1"])
+    return s
+
+
+def test_similarity_search_returns_top_k_by_cosine(store):
+    """Top-k is ordered by cosine similarity to the query."""
+    results = store.similarity_search("task help", k=1)
+    assert [d.id for d in results] == ["t1"]
+
+
+def test_similarity_search_applies_source_filter(store):
+    """A source filter restricts candidates via the precomputed mask."""
+    results = store.similarity_search_by_vector(
+        [0.0, 1.0, 0.0, 0.0], k=3, filter={"source": "guests.md"}
+    )
+    assert {d.id for d in results} == {"g1", "g2"}
+
+
+def test_persisted_index_reloads_memory_mapped(store, tmp_path):
+    """A new store over the same directory sees the same rows (memory-mapped)."""
+    reopened = NumpyVectorStore("docs", _AxisEmbeddings(), persist_directory=tmp_path)
+    assert reopened._collection.count() == 4
+    assert [d.id for d in reopened.similarity_search("dashboard", k=1)] == ["d1"]
+
+
+def test_collection_view_supports_index_manager_operations(store):
+    """get/delete/upsert behave like Chroma's collection for index_manager."""
+    assert sorted(store._collection.get(where={"source": "guests.md"}, include=[])["ids"]) == [
+        "g1",
+        "g2",
+    ]
+    store._collection.delete(ids=["g1"])
+    assert store._collection.count() == 3
+    got = store._collection.get(ids=["t1"], include=["embeddings", "documents", "metadatas"])
+    other = NumpyVectorStore("copy", _AxisEmbeddings())
+    other._collection.upsert(
+        ids=got["ids"],
+        embeddings=got["embeddings"],
+        documents=got["documents"],
+        metadatas=got["metadatas"],
+    )
+    assert [d.id for d in other.similarity_search("task", k=1)] == ["t1"]
+
+
+def test_read_only_store_rejects_writes(store, tmp_path):
+    """Read-only stores (prebuilt artifacts) refuse mutation."""
+    ro = NumpyVectorStore("docs", _AxisEmbeddings(), persist_directory=tmp_path, read_only=True)
+    with pytest.raises(PermissionError):
+        ro.delete(ids=["g1"])
+
+
+def test_persist_swaps_meta_and_vectors_together(store, tmp_path, monkeypatch):
+    """A write that dies before meta.json is replaced leaves the previous index intact."""
+    import os
+
+    directory = tmp_path / "docs"
+    store._collection.delete(ids=["d1"])
+    assert len(list(directory.glob("vectors*.f32"))) == 1  # superseded files are removed
+
+    def crash(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", crash)
+    with pytest.raises(OSError):
+        store.add_documents(_docs()[:2], ids=["x1", "x2"])
+    monkeypatch.undo()
+
+    reopened = NumpyVectorStore("docs", _AxisEmbeddings(), persist_directory=tmp_path)
+    assert sorted(reopened._collection.get(include=[])["ids"]) == ["g1", "g2", "t1"]
+    assert [d.id for d in reopened.similarity_search("task", k=1)] == ["t1"]
+
+
+def test_rebuild_works_with_numpy_store(tmp_path, monkeypatch):
+    """index_manager.rebuild syncs a NumpyVectorStore like a Chroma store."""
+    from app.index_manager import rebuild
+
+    doc_dir = tmp_path / "docs"
+    doc_dir.mkdir()
+    (doc_dir / "guests.md").write_text("# Guests")
+    monkeypatch.setattr(
+        "app.index_manager.get_settings",
+        lambda: MagicMock(chroma_persist_dir=str(tmp_path), rag_prebuilt_index_dir=""),
+    )
+    s = NumpyVectorStore("docs", _AxisEmbeddings(), persist_directory=Path(tmp_path) / "idx")
+    n, _docs_returned = rebuild(s, doc_dir, lambda d: _docs()[:1], incremental=False)
+    assert n == 1
+    assert s._collection.count() == 1
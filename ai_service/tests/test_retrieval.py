@@ -1,18 +1,23 @@
 """Tests for RAG retrieve and get_retrieved_context."""
 
+import asyncio
+import threading
 from unittest.mock import MagicMock
 
 import pytest
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
-from app.retrieval import get_retrieved_context, retrieve
+from app.cache import QueryVectorCache
+from app.retrieval import aget_retrieved_context, get_retrieved_context, retrieve
 
 
 @pytest.fixture
 def mock_store():
-    """Chroma-like store with similarity_search returning fake Documents."""
+    """Chroma-like store with similarity_search_by_vector returning fake Documents."""
     store = MagicMock()
-    store.similarity_search.return_value = [
+    store.embeddings.embed_query.return_value = [0.1, 0.2, 0.3]
+    store.similarity_search_by_vector.return_value = [
         Document(page_content="First chunk.", metadata={}),
         Document(page_content="Second chunk.", metadata={}),
     ]
@@ -30,7 +35,9 @@ def mock_settings_retrieval(monkeypatch):
     s.cohere_api_key = ""
     s.cohere_api_key_stripped = ""
     s.rag_max_context_chars = 8000
+    s.openai_embedding_model = "text-embedding-3-small"
     monkeypatch.setattr("app.retrieval.get_settings", lambda: s)
+    monkeypatch.setattr("app.cache._query_vector_cache", QueryVectorCache(maxsize=16))
     return s
 
 
@@ -38,17 +45,67 @@ def test_retrieve_returns_list_of_strings(mock_store, mock_settings_retrieval):
     """retrieve(question, store, k) returns list of page_content strings."""
     result = retrieve("How do I add a guest?", mock_store, k=2)
     assert result == ["First chunk.", "Second chunk."]
-    mock_store.similarity_search.assert_called_once()
-    call_kwargs = mock_store.similarity_search.call_args[1]
+    mock_store.similarity_search_by_vector.assert_called_once()
+    call_kwargs = mock_store.similarity_search_by_vector.call_args[1]
     assert call_kwargs["k"] == 2
-    assert "How do I add a guest?" in mock_store.similarity_search.call_args[0]
+    assert [0.1, 0.2, 0.3] in mock_store.similarity_search_by_vector.call_args[0]
+    mock_store.embeddings.embed_query.assert_called_once_with("How do I add a guest?")
+
+
+class _AsyncOnlyEmbeddings(Embeddings):
+    """Embeddings whose sync methods must not be used on the async path."""
+
+    def __init__(self):
+        self.queries = []
+
+    def embed_documents(self, texts):
+        raise AssertionError("embed_documents should not run")
+
+    def embed_query(self, text):
+        raise AssertionError("the async path should use aembed_query")
+
+    async def aembed_query(self, text):
+        self.queries.append(text)
+        return [0.1, 0.2, 0.3]
+
+
+def test_aget_retrieved_context_embeds_natively_and_searches_in_executor(
+    mock_store, mock_settings_retrieval
+):
+    """Native async embeddings run on the loop; the store search runs in the retrieval pool."""
+    mock_store.embeddings = _AsyncOnlyEmbeddings()
+    search_threads = []
+
+    def search(vector, k, filter):
+        search_threads.append(threading.current_thread().name)
+        return [Document(page_content="First chunk.", metadata={})]
+
+    mock_store.similarity_search_by_vector.side_effect = search
+
+    async def run():
+        first = await aget_retrieved_context("How do I add a guest?", mock_store, k=2)
+        second = await aget_retrieved_context("how do I add a guest?", mock_store, k=2)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert "First chunk." in first and first == second
+    # The question is embedded as asked; the case variant hits the normalized cache key.
+    assert mock_store.embeddings.queries == ["How do I add a guest?"]
+    assert all(name.startswith("retrieval-worker") for name in search_threads)
+
+
+def test_aget_retrieved_context_falls_back_to_sync_embeddings(mock_store, mock_settings_retrieval):
+    """Sync-only embeddings are called in the retrieval executor."""
+    result = asyncio.run(aget_retrieved_context("How do I add a guest?", mock_store, k=2))
+    assert "Second chunk." in result
+    mock_store.embeddings.embed_query.assert_called_once_with("How do I add a guest?")
 
 
 def test_retrieve_empty_question_returns_empty_list(mock_store, mock_settings_retrieval):
     """retrieve with empty question returns []."""
     result = retrieve("", mock_store)
     assert result == []
-    mock_store.similarity_search.assert_not_called()
+    mock_store.similarity_search_by_vector.assert_not_called()
 
 
 def test_retrieve_none_store_returns_empty_list():
@@ -70,7 +127,148 @@ def test_get_retrieved_context_empty_chunks_returns_empty_string(
     mock_store, mock_settings_retrieval
 ):
     """When retrieve returns [], get_retrieved_context returns ''."""
-    mock_store.similarity_search.return_value = []
+    mock_store.similarity_search_by_vector.return_value = []
     result = get_retrieved_context("query", mock_store)
     assert result == ""
-    mock_store.similarity_search.assert_called_once()
+    mock_store.similarity_search_by_vector.assert_called_once()
+
+
+def test_query_embedding_is_cached_across_k_and_endpoints(mock_store, mock_settings_retrieval):
+    """Paraphrase-free repeats (any case/spacing, any k) reuse one query embedding."""
+    retrieve("How do I add a guest?", mock_store, k=2)
+    retrieve("  how do I  add a GUEST? ", mock_store, k=5)
+    get_retrieved_context("How do I add a guest?", mock_store, k=3)
+    mock_store.embeddings.embed_query.assert_called_once()
+    assert mock_store.similarity_search_by_vector.call_count == 3
+
+
+class _KeywordEmbeddings:
+    """Tiny deterministic embeddings: one axis per known keyword."""
+
+    WORDS = ["guest", "task", "seating", "dashboard"]
+
+    def _vec(self, text):
+        low = text.lower()
+        return [1.0 if w in low else 0.0 for w in self.WORDS] + [0.01]
+
+    def embed_documents(self, texts):
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vec(text)
+
+
+@pytest.fixture
+def numpy_index(tmp_path, monkeypatch):
+    """Real numpy-backed index over a temp docs dir, with fake embeddings."""
+    from app import retrieval
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "guests.md").write_text("# Guests\n\nAdd a guest from the guests page.")
+    s = MagicMock()
+    s.openai_api_key_stripped = "sk-fake"
+    s.chroma_persist_dir = str(tmp_path / "data")
+    s.rag_prebuilt_index_dir = ""
+    s.docs_dir = str(docs)
+    s.vector_backend = "numpy"
+    s.rag_chunk_size = 512
+    s.rag_chunk_overlap = 50
+    s.rag_chunk_workers = 4
+    for module in ("app.retrieval", "app.index_manager", "app.bm25_index"):
+        monkeypatch.setattr(f"{module}.get_settings", lambda: s)
+    monkeypatch.setattr("app.index_manager._index_version", None)
+    monkeypatch.setattr(retrieval, "get_embedding_model", lambda: _KeywordEmbeddings())
+    monkeypatch.setattr(retrieval, "_active", None)
+    monkeypatch.setattr(retrieval, "_retired", None)
+    return docs
+
+
+def test_refresh_index_swaps_store_and_bm25_together(numpy_index):
+    """A refresh builds a new generation aside and activates store + BM25 in one step."""
+    from app import retrieval
+
+    first = retrieval.get_or_build_store(numpy_index)
+    old_generation = retrieval._active
+    assert old_generation.bm25 is not None
+    assert retrieval.refresh_index(numpy_index) is False  # nothing changed
+
+    (numpy_index / "tasks.md").write_text("# Tasks\n\nTrack each task on the board.")
+    assert retrieval.refresh_index(numpy_index) is True
+
+    new_store = retrieval.active_store()
+    assert new_store is not first
+    assert retrieval._retired is old_generation
+    assert first._collection.count() == 1  # old generation untouched for in-flight requests
+    assert new_store._collection.count() == 2
+    assert retrieval._bm25_for(new_store) is retrieval._active.bm25
+    assert retrieval._bm25_for(first) is old_generation.bm25
+    assert len(retrieval._active.bm25.docs) == 2
+
+
+def test_each_generation_keys_caches_by_its_own_index_version(numpy_index):
+    """A request still served by the retired store keys its caches under that store's version."""
+    from app import retrieval
+    from app.index_manager import current_index_version
+
+    first = retrieval.get_or_build_store(numpy_index)
+    old_version = retrieval.index_version_for(first)
+    assert old_version == current_index_version()
+
+    (numpy_index / "tasks.md").write_text("# Tasks\n\nTrack each task on the board.")
+    assert retrieval.refresh_index(numpy_index) is True
+
+    new_version = current_index_version()
+    assert new_version != old_version
+    assert retrieval.index_version_for(first) == old_version
+    assert retrieval.index_version_for(retrieval.active_store()) == new_version
+
+
+def test_refresh_index_removes_deleted_docs_and_settles(numpy_index):
+    """Deleting every doc activates an empty index and commits its manifest once."""
+    from app import retrieval
+    from app.index_manager import load_manifest, needs_rebuild
+
+    retrieval.get_or_build_store(numpy_index)
+    (numpy_index / "guests.md").unlink()
+    assert needs_rebuild(numpy_index) is True
+    assert retrieval.refresh_index(numpy_index) is True
+
+    assert retrieval.active_store()._collection.count() == 0
+    assert retrieval._active.bm25 is None
+    assert retrieval._retrieve_docs("add a guest", retrieval.active_store(), 1) == []
+    manifest = load_manifest()
+    assert manifest["doc_hashes"] == {} and manifest["doc_count"] == 0
+    assert needs_rebuild(numpy_index) is False
+    assert retrieval.refresh_index(numpy_index) is False
+
+
+def test_refresh_index_garbage_collects_previous_generation(numpy_index):
+    """The generation retired by the previous swap is dropped on the next swap."""
+    from app import retrieval
+
+    first = retrieval.get_or_build_store(numpy_index)
+    (numpy_index / "tasks.md").write_text("# Tasks\n\nTrack each task.")
+    retrieval.refresh_index(numpy_index)
+    (numpy_index / "tasks.md").write_text("# Tasks\n\nTrack each task on the seating board.")
+    retrieval.refresh_index(numpy_index)
+    assert first._collection.count() == 0
+    assert retrieval.active_store()._collection.count() == 2
+
+
+def test_startup_keeps_recent_generations_of_other_processes(numpy_index, monkeypatch):
+    """Only generations older than the grace period are dropped at startup."""
+    from app import retrieval
+
+    root = numpy_index.parent / "data" / retrieval.NUMPY_INDEX_DIRNAME
+    recent = retrieval._generation_name()
+    old = f"{retrieval.COLLECTION_NAME}_1000_abcdef12"
+    legacy = f"{retrieval.COLLECTION_NAME}_0123456789ab"
+    for name in (recent, old, legacy):
+        (root / name).mkdir(parents=True)
+
+    retrieval.get_or_build_store(numpy_index)
+
+    assert sorted(p.name for p in root.iterdir()) == sorted(
+        [retrieval.COLLECTION_NAME, recent, legacy]
+    )
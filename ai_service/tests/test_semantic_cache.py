@@ -0,0 +1,64 @@
+"""Tests for the semantic (paraphrase) response cache."""
+
+import pytest
+
+from app import cache, semantic_cache
+from app.cache import MemoryResponseCacheBackend
+from app.semantic_cache import SemanticCache
+
+
+def test_lookup_returns_key_of_similar_question():
+    """A close vector in the same scope hits; an orthogonal one misses."""
+    sc = SemanticCache()
+    sc.add("ctx", [1.0, 0.0, 0.0], "ask:v:How many guests?:ctx")
+    key, similarity = sc.lookup("ctx", [0.98, 0.2, 0.0], threshold=0.95)
+    assert key == "ask:v:How many guests?:ctx"
+    assert similarity > 0.95
+    assert sc.lookup("ctx", [0.0, 1.0, 0.0], threshold=0.95)[0] is None
+
+
+def test_lookup_is_scoped():
+    """Entries never match across scopes (contexts or index versions)."""
+    sc = SemanticCache()
+    sc.add("ctx-a", [1.0, 0.0], "k")
+    assert sc.lookup("ctx-b", [1.0, 0.0], threshold=0.5) == (None, 0.0)
+
+
+def test_scope_keeps_newest_entries_and_scopes_are_lru():
+    """max_per_scope trims the oldest questions; max_scopes evicts the least recent scope."""
+    sc = SemanticCache(max_per_scope=2, max_scopes=1)
+    sc.add("ctx", [1.0, 0.0, 0.0], "a")
+    sc.add("ctx", [0.0, 1.0, 0.0], "b")
+    sc.add("ctx", [0.0, 0.0, 1.0], "c")
+    assert sc.lookup("ctx", [1.0, 0.0, 0.0], threshold=0.9)[0] is None
+    assert sc.lookup("ctx", [0.0, 0.0, 1.0], threshold=0.9)[0] == "c"
+    sc.add("other", [1.0, 0.0, 0.0], "d")
+    assert sc.lookup("ctx", [0.0, 0.0, 1.0], threshold=0.9)[0] is None
+
+
+@pytest.fixture
+def semantic_enabled(mock_settings, monkeypatch):
+    """Response cache in memory plus a semantic cache with threshold 0.9."""
+    mock_settings.cache_ttl_seconds = 60
+    mock_settings.semantic_cache_threshold = 0.9
+    mock_settings.query_embedding_cache_size = 0
+    monkeypatch.setattr("app.cache.get_settings", lambda: mock_settings)
+    monkeypatch.setattr(cache, "_response_backend", MemoryResponseCacheBackend(ttl_seconds=60))
+    monkeypatch.setattr(semantic_cache, "_semantic_cache", SemanticCache())
+    return mock_settings
+
+
+def test_ask_docs_paraphrase_is_served_from_semantic_cache(
+    client, fake_rag_store, semantic_enabled
+):
+    """A paraphrase with a near-identical embedding reuses the first answer."""
+    vectors = {"How many guests": [1.0, 0.0], "How many guests are coming": [0.99, 0.05]}
+    fake_rag_store.embeddings.embed_query.side_effect = lambda q: vectors.get(q, [0.0, 1.0])
+
+    first = client.post("/ask_docs", json={"question": "How many guests"})
+    second = client.post("/ask_docs", json={"question": "How many guests are coming"})
+    other = client.post("/ask_docs", json={"question": "Where is the venue"})
+
+    assert first.status_code == second.status_code == other.status_code == 200
+    assert 'desc="semantic"' in second.headers["Server-Timing"]
+    assert "semantic" not in other.headers["Server-Timing"]
@@ -0,0 +1,90 @@
+"""Tests for SingleFlight request coalescing."""
+
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    """Callers with the same key while work is in flight get the leader's result."""
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def run():
+        flight = SingleFlight("test")
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(run())
+    assert results == ["done"] * 5
+    assert calls == 1
+    assert flight.inflight() == 0
+
+
+def test_different_keys_run_separately():
+    """Only identical keys are coalesced."""
+    seen = []
+
+    async def run():
+        flight = SingleFlight("test")
+
+        def make(key):
+            async def work():
+                seen.append(key)
+                return key
+
+            return work
+
+        return await asyncio.gather(flight.do("a", make("a")), flight.do("b", make("b")))
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert sorted(seen) == ["a", "b"]
+
+
+def test_errors_propagate_to_all_callers_and_are_not_cached():
+    """A failure reaches every waiter; the next call after it runs the work again."""
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def run():
+        flight = SingleFlight("test")
+        results = await asyncio.gather(
+            flight.do("k", failing), flight.do("k", failing), return_exceptions=True
+        )
+        with pytest.raises(RuntimeError):
+            await flight.do("k", failing)
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert calls == 2
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    """Cancelling one waiter leaves the computation running for the others."""
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def run():
+        flight = SingleFlight("test")
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "ok"
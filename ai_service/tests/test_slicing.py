@@ -0,0 +1,67 @@
+"""Tests for question-relevant context slicing."""
+
+from app.schemas import AskRequest, GuestbookEntryContext, GuestContext, TaskContext, WeddingContext
+from app.services.context import build_context_markdown
+from app.services.slicing import slice_context
+
+
+def _big_payload() -> AskRequest:
+    guests = [GuestContext(name=f"Guest Number{i}") for i in range(80)]
+    guests[7] = GuestContext(name="Priya Shah", dietary_notes="Vegan", plus_one_count=1)
+    guests[30] = GuestContext(name="Tom Reed", dietary_notes="Gluten free")
+    return AskRequest(
+        question="?",
+        wedding=WeddingContext(id=1, name="Big", date=None, venue_name=None),
+        guests=guests,
+        tasks=[
+            TaskContext(title="Book caterer", status="pending", priority="high"),
+            TaskContext(title="Send invites", status="completed", priority="low"),
+        ],
+        guestbook_entries=[GuestbookEntryContext(guest_name="Priya Shah", message="Yay")],
+    )
+
+
+def test_slice_context_keeps_rows_matching_a_name():
+    """A question about one guest keeps that guest (and their guestbook entry) only."""
+    ctx = slice_context(_big_payload(), "What does Priya eat?")
+    assert [g.name for g in ctx.payload.guests] == ["Priya Shah"]
+    assert ctx.payload.tasks == []
+    assert [e.guest_name for e in ctx.payload.guestbook_entries] == ["Priya Shah"]
+    assert "80 guests" in ctx.note and "1 guests" in ctx.note
+
+
+def test_slice_context_field_filters():
+    """Dietary and task-status words select rows by field, not just by name."""
+    payload = _big_payload()
+    dietary = slice_context(payload, "Any dietary requirements?")
+    assert {g.name for g in dietary.payload.guests} == {"Priya Shah", "Tom Reed"}
+    pending = slice_context(payload, "Show the pending tasks")
+    assert [t.title for t in pending.payload.tasks] == ["Book caterer"]
+
+
+def test_slice_context_untargeted_or_small_is_unchanged():
+    """General questions and small weddings keep the full context."""
+    payload = _big_payload()
+    assert slice_context(payload, "Give me an overview of the wedding").payload is payload
+    assert slice_context(payload, "What does Priya eat?", min_rows=1000).payload is payload
+
+
+def test_sliced_markdown_keeps_totals():
+    """Rendered markdown of a slice carries the full-list totals under the header."""
+    ctx = slice_context(_big_payload(), "Tell me about the guests named Reed")
+    md = build_context_markdown(ctx.payload, ctx.note)
+    assert "Totals (full lists): 80 guests, 1 plus-ones" in md
+    assert "- Tom Reed" in md
+    assert "Guest Number1 " not in md
+    assert "None relevant to the question" in md
+
+
+def test_named_section_is_kept_whole_and_matches_are_capped():
+    """A named section without matches keeps every row; a capped match list says so."""
+    payload = _big_payload()
+    everyone = slice_context(payload, "List all guests", max_rows=10)
+    assert len(everyone.payload.guests) == 80
+    assert "all 80 guests" in everyone.note
+    numbered = slice_context(payload, "Tell me about every Guest", max_rows=10)
+    assert len(numbered.payload.guests) == 10
+    assert "the first 10 of 78 matching guests (list truncated)" in numbered.note
@@ -1,6 +1,17 @@
-"""Tests for normalize_llm_content."""
+"""Tests for normalize_llm_content and the context summary caches."""
 
-from app.services.summarization import normalize_llm_content
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app import cache
+from app.services.context import ContextBlock
+from app.services.summarization import (
+    normalize_llm_content,
+    summarize_blocks_cached,
+    summarize_context_cached,
+)
 
 
 def test_normalize_llm_content_none():
@@ -27,3 +38,113 @@ def test_normalize_llm_content_list_mixed():
 def test_normalize_llm_content_other():
     """Other types are stringified."""
     assert normalize_llm_content(123) == "123"
+
+
+@pytest.fixture
+def summary_cache(monkeypatch):
+    """In-memory summary cache with a fresh backend and a counting asummarize_context."""
+    settings = MagicMock()
+    settings.summary_cache_ttl_seconds = 60
+    settings.redis_url_stripped = ""
+    monkeypatch.setattr("app.cache.get_settings", lambda: settings)
+    monkeypatch.setattr("app.services.summarization.get_settings", lambda: settings)
+    monkeypatch.setattr(cache, "_summary_backend", None)
+    calls = []
+
+    async def fake_summarize(context_markdown, model, timeout):
+        calls.append((context_markdown, model))
+        await asyncio.sleep(0.01)
+        return f"summary of {context_markdown}"
+
+    monkeypatch.setattr("app.services.summarization.asummarize_context", fake_summarize)
+    return calls
+
+
+def test_summarize_context_cached_reuses_summary_for_same_context(summary_cache):
+    """Two lookups with the same context hash and model summarize once."""
+
+    async def run():
+        first = await summarize_context_cached("ctx", "h1", "m")
+        second = await summarize_context_cached("ctx", "h1", "m")
+        return first, second
+
+    assert asyncio.run(run()) == ("summary of ctx", "summary of ctx")
+    assert summary_cache == [("ctx", "m")]
+
+
+def test_summarize_context_cached_keys_on_model_and_hash(summary_cache):
+    """A different model or context hash is a separate entry."""
+
+    async def run():
+        await summarize_context_cached("ctx", "h1", "m")
+        await summarize_context_cached("ctx", "h1", "other")
+        await summarize_context_cached("ctx2", "h2", "m")
+
+    asyncio.run(run())
+    assert len(summary_cache) == 3
+
+
+def test_summarize_context_cached_coalesces_concurrent_misses(summary_cache):
+    """Concurrent misses for one context share a single summarization."""
+
+    async def run():
+        return await asyncio.gather(*(summarize_context_cached("ctx", "h1", "m") for _ in range(4)))
+
+    assert asyncio.run(run()) == ["summary of ctx"] * 4
+    assert summary_cache == [("ctx", "m")]
+
+
+def test_summarize_blocks_cached_recomputes_only_changed_blocks(summary_cache):
+    """After one block changes, only that block is sent to the model again."""
+    blocks = [
+        ContextBlock("Wedding: W", summarize=False),
+        ContextBlock("Guests (1-2 of 4):\n- A\n- B"),
+        ContextBlock("Guests (3-4 of 4):\n- C\n- D"),
+    ]
+    edited = [blocks[0], blocks[1], ContextBlock("Guests (3-4 of 4):\n- C\n- D (vegan)")]
+
+    async def run():
+        first = await summarize_blocks_cached(blocks, "full-1", "m")
+        second = await summarize_blocks_cached(edited, "full-2", "m")
+        return first.summary, second.summary
+
+    first, second = asyncio.run(run())
+    assert first.startswith("Wedding: W\n\nsummary of Guests (1-2 of 4)")
+    assert "D (vegan)" in second
+    assert sorted(ctx for ctx, _model in summary_cache[:2]) == [
+        blocks[1].markdown,
+        blocks[2].markdown,
+    ]
+    assert summary_cache[2:] == [(edited[2].markdown, "m")]
+
+
+def test_summarize_blocks_cached_reduces_large_context(summary_cache, monkeypatch):
+    """Above reduce_above_tokens, partial summaries are merged by one reduce call."""
+    reduced = []
+
+    async def fake_reduce(partials, model, timeout):
+        reduced.append(partials)
+        return "merged"
+
+    monkeypatch.setattr("app.services.summarization.areduce_summaries", fake_reduce)
+    blocks = [ContextBlock(f"Guests ({i}):\n- " + "x" * 400) for i in range(3)]
+
+    result = asyncio.run(
+        summarize_blocks_cached(blocks, "big", "m", reduce_above_tokens=200, max_concurrency=2)
+    )
+    assert result.summary == "merged"
+    assert result.shards == 3
+    assert len(reduced) == 1 and len(reduced[0]) == 3
+    assert result.reduce_ms >= 0 and result.map_ms > 0
+
+
+def test_summarize_blocks_cached_concatenates_below_threshold(summary_cache, monkeypatch):
+    """Small contexts skip the reduce call."""
+    monkeypatch.setattr(
+        "app.services.summarization.areduce_summaries",
+        AsyncMock(side_effect=AssertionError("reduce should not run")),
+    )
+    blocks = [ContextBlock("Guests:\n- A"), ContextBlock("Tasks:\n- T")]
+    result = asyncio.run(summarize_blocks_cached(blocks, "small", "m", reduce_above_tokens=8000))
+    assert result.summary == "summary of Guests:\n- A\n\nsummary of Tasks:\n- T"
+    assert result.reduce_ms == 0
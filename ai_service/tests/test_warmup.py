@@ -0,0 +1,147 @@
+"""Tests for lazy imports (import-time budget), the warmup stages and GET /ready."""
+
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from app import main
+from app.warmup import StageSkipped, WarmupState, heavy_modules, run_warmup, warm_imports
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+
+# Measured at ~1 s (mostly FastAPI) after deferring LangChain/Chroma/pydantic_ai; importing
+# them eagerly took ~2.5 s. Generous so slow CI machines do not flake.
+IMPORT_BUDGET_SECONDS = 2.0
+DEFERRED_MODULES = (
+    "chromadb",
+    "cohere",
+    "httpx",
+    "langchain_chroma",
+    "langchain_community",
+    "langchain_core",
+    "langchain_openai",
+    "langchain_text_splitters",
+    "openai",
+    "pydantic_ai",
+)
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - t0
+print(json.dumps({"seconds": elapsed, "loaded": sorted(m for m in %r if m in sys.modules)}))
+"""
+
+
+def _import_app_main() -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE % (DEFERRED_MODULES,)],
+        cwd=SERVICE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_import_app_main_defers_heavy_dependencies():
+    """A fresh interpreter imports app.main without LangChain, Chroma, SDKs or pydantic_ai."""
+    result = _import_app_main()
+    assert result["loaded"] == []
+
+
+def test_import_app_main_within_budget():
+    """Cold import of app.main stays within the boot budget (best of two runs)."""
+    seconds = min(_import_app_main()["seconds"] for _ in range(2))
+    assert seconds < IMPORT_BUDGET_SECONDS
+
+
+def test_heavy_modules_follow_settings():
+    """Chroma is only warmed when Chroma serves the index, Cohere only when rerank is enabled."""
+    settings = MagicMock(vector_backend="numpy", rag_rerank_enabled=False)
+    settings.rag_prebuilt_index_dir = ""
+    assert "langchain_chroma" not in heavy_modules(settings)
+    settings = MagicMock(
+        vector_backend="chroma", rag_rerank_enabled=True, cohere_api_key_stripped="co-key"
+    )
+    settings.rag_prebuilt_index_dir = ""
+    modules = heavy_modules(settings)
+    assert "langchain_chroma" in modules and "langchain_cohere" in modules
+    settings.rag_prebuilt_index_dir = "/app/prebuilt_index"
+    assert "langchain_chroma" not in heavy_modules(settings)
+
+
+def test_warm_imports_times_modules_and_skips_failures():
+    """Importable modules get a timing; missing ones are skipped."""
+    timings = warm_imports(["json", "app_missing_module_for_test"])
+    assert list(timings) == ["json"]
+    assert timings["json"] >= 0
+
+
+def _stages(**overrides):
+    async def ok(settings):
+        return "done"
+
+    names = ("imports", "index", "bm25", "clients", "prefill")
+    return tuple((name, overrides.get(name, ok)) for name in names)
+
+
+def test_run_warmup_records_each_stage():
+    """Every stage gets a status, timing and detail; skipped optional stages keep it ready."""
+
+    async def skip(settings):
+        raise StageSkipped("nothing to prefill")
+
+    state = WarmupState()
+    assert not state.ready
+    asyncio.run(run_warmup(state, _stages(prefill=skip)))
+    report = state.as_dict()
+    assert report["ready"] is True
+    assert report["stages"]["index"]["status"] == "ok"
+    assert report["stages"]["index"]["detail"] == "done"
+    assert report["stages"]["prefill"] == {
+        "status": "skipped",
+        "seconds": report["stages"]["prefill"]["seconds"],
+        "detail": "nothing to prefill",
+    }
+    assert all(stage["seconds"] is not None for stage in report["stages"].values())
+
+
+def test_run_warmup_retries_failed_required_stage():
+    """A failed index stage keeps the replica unready until a retry succeeds."""
+    attempts = []
+    seen_unready = []
+    state = WarmupState()
+
+    async def flaky_index(settings):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("OPENAI_API_KEY is not set")
+        return "ok now"
+
+    async def watch(settings):
+        seen_unready.append(state.stages["index"].status)
+        return "done"
+
+    asyncio.run(run_warmup(state, _stages(index=flaky_index, clients=watch), retry_seconds=0.01))
+    assert len(attempts) == 2
+    assert seen_unready[0] == "failed"
+    assert state.ready and state.stages["index"].detail == "ok now"
+
+
+def test_ready_endpoint_reports_503_until_warm(client, monkeypatch):
+    """GET /ready is 503 with pending stages before warmup, 200 after."""
+    state = WarmupState()
+    monkeypatch.setattr(main, "_warmup", state)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["stages"]["index"]["status"] == "pending"
+
+    asyncio.run(run_warmup(state, _stages()))
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True